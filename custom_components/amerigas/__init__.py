@@ -2,7 +2,9 @@
 from __future__ import annotations
 
 import logging
+from collections.abc import Mapping
 from datetime import timedelta
+from typing import Any
 
 import voluptuous as vol
 
@@ -10,21 +12,43 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_PASSWORD, CONF_USERNAME, Platform
 from homeassistant.core import HomeAssistant, ServiceCall, callback
 from homeassistant.helpers import config_validation as cv
-from homeassistant.helpers.event import async_track_time_change
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.helpers import entity_registry as er
 
 from .api import AmeriGasAPI
-from .const import DOMAIN
-from .delivery_tracker import DeliveryTracker
+from .const import (
+    API_TIMEOUT,
+    CONF_API_TIMEOUT,
+    CONF_JUMP_THRESHOLD,
+    CONF_NOISE_THRESHOLD,
+    CONF_REFRESH_HOURS,
+    CONF_SCAN_INTERVAL,
+    DATA_VALIDATED,
+    DEFAULT_SCAN_INTERVAL,
+    DOMAIN,
+    NOISE_THRESHOLD_GALLONS,
+    TRIGGER_MANUAL,
+)
+from .coordinator import (
+    AmeriGasDataUpdateCoordinator,
+    async_remove_schema_issue,
+    async_remove_snapshot,
+)
+from .cost_statistics import CostStatistics, async_remove_cost_statistics
+from .delivery_state import DELIVERY_LEVEL_JUMP_THRESHOLD
+from .delivery_tracker import DeliveryTracker, async_remove_delivery_state
+from .delivery_windows import DeliveryWindowScheduler
+from .lifetime import LifetimeAccumulator, async_remove_lifetime
+from .price_ledger import PriceLedger, async_remove_price_ledger
+from .profiler import MAX_PROFILE_REFRESHES
+from .thresholds import ThresholdMonitor
 
 _LOGGER = logging.getLogger(__name__)
 
 SERVICE_SET_PRE_DELIVERY_LEVEL = "set_pre_delivery_level"
 SERVICE_REFRESH_DATA = "refresh_data"
+SERVICE_PROFILE_REFRESHES = "profile_refreshes"
 ATTR_GALLONS = "gallons"
-
-# Cron schedule: refresh at 00:00, 06:00, 12:00, 18:00
-REFRESH_HOURS = [0, 6, 12, 18]
+ATTR_REFRESHES = "refreshes"
 
 SERVICE_SET_PRE_DELIVERY_LEVEL_SCHEMA = vol.Schema(
     {
@@ -34,7 +58,15 @@ SERVICE_SET_PRE_DELIVERY_LEVEL_SCHEMA = vol.Schema(
     }
 )
 
-PLATFORMS: list[Platform] = [Platform.SENSOR, Platform.NUMBER]
+SERVICE_PROFILE_REFRESHES_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_REFRESHES, default=3): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=MAX_PROFILE_REFRESHES)
+        ),
+    }
+)
+
+PLATFORMS: list[Platform] = [Platform.SENSOR, Platform.BINARY_SENSOR, Platform.NUMBER]
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
@@ -42,58 +74,62 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     username = entry.data[CONF_USERNAME]
     password = entry.data[CONF_PASSWORD]
     
+    # A new entry starts from the snapshot the config flow validated with,
+    # instead of logging in and fetching the dashboard a second time
+    validated = hass.data.get(DATA_VALIDATED, {}).pop(username, None)
     api = AmeriGasAPI(username, password)
     
-    async def async_update_data():
-        """Fetch data from AmeriGas."""
-        _LOGGER.debug("Starting scheduled data update from AmeriGas API")
-        try:
-            data = await api.async_get_data()
-            _LOGGER.info("Successfully updated data from AmeriGas API")
-            return data
-        except Exception as err:
-            _LOGGER.error(f"Error communicating with AmeriGas: {err}")
-            raise UpdateFailed(f"Error communicating with AmeriGas: {err}") from err
-    
-    # Create coordinator without automatic update_interval (we use cron instead)
-    coordinator = DataUpdateCoordinator(
-        hass,
-        _LOGGER,
-        name=DOMAIN,
-        update_method=async_update_data,
-        update_interval=None,  # Disabled - using cron schedule instead
-    )
-    
-    # Fetch initial data
-    await coordinator.async_config_entry_first_refresh()
-    
-    # Set up cron-based refresh at 00:00, 06:00, 12:00, 18:00
-    @callback
-    def async_scheduled_refresh(now):
-        """Handle scheduled refresh at cron times."""
-        _LOGGER.debug(f"Cron trigger at {now.strftime('%H:%M')} - requesting data refresh")
-        hass.async_create_task(coordinator.async_request_refresh())
-    
-    # Register time-based triggers for each hour in the schedule
-    unsub_cron = async_track_time_change(
-        hass,
-        async_scheduled_refresh,
-        hour=REFRESH_HOURS,
-        minute=0,
-        second=0,
-    )
+    coordinator = AmeriGasDataUpdateCoordinator(hass, api, entry.entry_id, config_entry=entry)
+
+    if validated is not None:
+        coordinator.async_seed(validated)
+    else:
+        # Serve the last good snapshot immediately when one exists. The portal
+        # is never awaited here: the first fetch runs after HA has started.
+        await coordinator.async_restore_snapshot()
     
-    # Set up delivery tracker for automatic pre-delivery level capture
+    # Set up delivery tracker for automatic pre-delivery level capture. Its
+    # detection state survives restarts, so load it before the first refresh.
     tracker = DeliveryTracker(hass, coordinator, entry.entry_id)
+    await tracker.async_load()
+    
+    # Lifetime consumption, restored from its own checkpoint and journal. It
+    # listens ahead of the sensors, which only read its total.
+    lifetime = LifetimeAccumulator(hass, coordinator, entry.entry_id)
+    await lifetime.async_load()
+    
+    # Price of every delivery seen, for rolling averages and cost per period
+    prices = PriceLedger(hass, coordinator, entry.entry_id)
+    await prices.async_load()
+    
+    # Hourly cost for the Energy Dashboard, priced from the ledger
+    cost = CostStatistics(hass, lifetime, prices, entry.entry_id)
+    await cost.async_load()
+    
+    # Events at the start and end of each open order's delivery window
+    windows = DeliveryWindowScheduler(hass, coordinator, entry.entry_id)
+    windows.async_start()
+    
+    # Low-tank checks, evaluated once per refresh ahead of the entities
+    thresholds = ThresholdMonitor(hass, coordinator, entry.entry_id, entry.options)
+    thresholds.async_start()
     
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN][entry.entry_id] = {
         "coordinator": coordinator,
         "tracker": tracker,
+        "lifetime": lifetime,
+        "prices": prices,
+        "cost": cost,
+        "windows": windows,
+        "thresholds": thresholds,
         "api": api,  # Store API for cleanup on unload
-        "unsub_cron": unsub_cron,  # Store for cleanup on unload
     }
     
+    # Cron refresh schedule (00:00, 06:00, 12:00, 18:00 by default), API
+    # timeout and detection thresholds from the options
+    _async_apply_options(hass, entry)
+    
     # Register service for manual pre-delivery level setting
     async def async_handle_set_pre_delivery_level(call: ServiceCall) -> None:
         """Handle the set_pre_delivery_level service call."""
@@ -101,8 +137,6 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         
         # Find the number entity using entity registry (handles dynamic naming)
         try:
-            from homeassistant.helpers import entity_registry as er
-            
             entity_reg = er.async_get(hass)
             
             # Find the pre-delivery level number entity by unique_id
@@ -143,6 +177,13 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         except Exception as e:
             _LOGGER.error(f"Error during manual refresh: {e}")
     
+    # Register service for opt-in refresh profiling
+    async def async_handle_profile_refreshes(call: ServiceCall) -> None:
+        """Arm the sampling profiler on every entry for the next N refreshes."""
+        for loaded_entry in hass.config_entries.async_loaded_entries(DOMAIN):
+            if entry_data := hass.data[DOMAIN].get(loaded_entry.entry_id):
+                entry_data["coordinator"].async_start_profiling(call.data[ATTR_REFRESHES])
+    
     # Register the services (only once for the domain)
     if not hass.services.has_service(DOMAIN, SERVICE_SET_PRE_DELIVERY_LEVEL):
         hass.services.async_register(
@@ -159,8 +200,24 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             async_handle_refresh_data,
         )
     
+    if not hass.services.has_service(DOMAIN, SERVICE_PROFILE_REFRESHES):
+        hass.services.async_register(
+            DOMAIN,
+            SERVICE_PROFILE_REFRESHES,
+            async_handle_profile_refreshes,
+            schema=SERVICE_PROFILE_REFRESHES_SCHEMA,
+        )
+    
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     
+    if validated is not None:
+        # The config flow's fetch stands in for the first refresh
+        coordinator.async_update_listeners()
+    else:
+        # Fetch (or revalidate the cached snapshot) once entities and the
+        # tracker are listening and Home Assistant has finished starting
+        coordinator.async_schedule_first_refresh()
+    
     # Register cleanup on shutdown
     async def _async_close_session(event):
         """Close API session on shutdown."""
@@ -172,27 +229,113 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         hass.bus.async_listen_once("homeassistant_stop", _async_close_session)
     )
     
+    # Options changes apply live, without reloading the entry
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
+    
     return True
 
 
+def _refresh_hours(options: Mapping[str, Any]) -> list[int]:
+    """Return the cron hours: the ones chosen, else every scan interval from midnight."""
+    if hours := options.get(CONF_REFRESH_HOURS):
+        return sorted(int(hour) for hour in hours)
+    return list(range(0, 24, int(options.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL))))
+
+
+@callback
+def _async_apply_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Push the entry options to the running services.
+
+    Runs at setup and on every options change; nothing is torn down. The
+    cron schedule is only replaced when the hours change.
+    """
+    data = hass.data[DOMAIN][entry.entry_id]
+    options = entry.options
+    jump_threshold = float(options.get(CONF_JUMP_THRESHOLD, DELIVERY_LEVEL_JUMP_THRESHOLD))
+
+    data["api"].timeout = float(options.get(CONF_API_TIMEOUT, API_TIMEOUT))
+    data["coordinator"].async_schedule_refresh_hours(_refresh_hours(options))
+    data["tracker"].machine.jump_threshold = jump_threshold
+    data["lifetime"].set_thresholds(
+        float(options.get(CONF_NOISE_THRESHOLD, NOISE_THRESHOLD_GALLONS)), jump_threshold
+    )
+    data["thresholds"].async_set_options(options)
+
+
+@callback
+def async_apply_credentials(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Swap the entry's credentials into the running client and resume polling.
+
+    A snapshot a flow validated the credentials with is adopted as this
+    refresh, whether or not they changed: re-auth with the same password
+    (e.g. after a temporary lockout) must resume polling too. Returns True
+    when the credentials changed with no such snapshot waiting, so a refresh
+    has to verify them.
+    """
+    if (data := hass.data.get(DOMAIN, {}).get(entry.entry_id)) is None:
+        return False
+    coordinator = data["coordinator"]
+    changed = data["api"].set_credentials(entry.data[CONF_USERNAME], entry.data[CONF_PASSWORD])
+    validated = hass.data.get(DATA_VALIDATED, {}).pop(entry.data[CONF_USERNAME], None)
+    if not changed and validated is None:
+        return False
+
+    _LOGGER.info("AmeriGas credentials confirmed; polling resumes")
+    # Resume polling if it was paused by a rejected login
+    coordinator.auth_failed = False
+    if validated is None:
+        return True
+    coordinator.async_seed(validated, TRIGGER_MANUAL)
+    coordinator.async_update_listeners()
+    return False
+
+
+async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Apply changed credentials and options to the running services.
+
+    New credentials go through async_apply_credentials(); the portal is only
+    fetched again when no validated snapshot came with them. Entities,
+    listeners and the lifetime accumulator keep running, so no consumption
+    sample is missed as a full reload would risk.
+    """
+    if async_apply_credentials(hass, entry):
+        await hass.data[DOMAIN][entry.entry_id]["coordinator"].async_request_refresh()
+    _async_apply_options(hass, entry)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
         # Close API session and clean up cron subscription
         data = hass.data[DOMAIN].pop(entry.entry_id)
         
-        # Unsubscribe from cron schedule
-        if unsub_cron := data.get("unsub_cron"):
-            unsub_cron()
-            _LOGGER.debug("Cron schedule unsubscribed on integration unload")
+        # Unsubscribe from cron schedule and pending refresh timers
+        await data["coordinator"].async_shutdown()
+        await data["lifetime"].async_shutdown()
+        data["prices"].async_shutdown()
+        data["cost"].async_shutdown()
+        data["windows"].async_shutdown()
+        data["thresholds"].async_shutdown()
         
         if api := data.get("api"):
             await api.close()
             _LOGGER.debug("API session closed on integration unload")
         
-        # Unregister services if no other instances are running
-        if not hass.data[DOMAIN]:
+        # Unregister services if no other instances are running. Checked on
+        # the entries, as hass.data[DOMAIN] also holds shared values.
+        if not hass.config_entries.async_loaded_entries(DOMAIN):
             hass.services.async_remove(DOMAIN, SERVICE_SET_PRE_DELIVERY_LEVEL)
             hass.services.async_remove(DOMAIN, SERVICE_REFRESH_DATA)
+            hass.services.async_remove(DOMAIN, SERVICE_PROFILE_REFRESHES)
     
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove persisted data when a config entry is deleted."""
+    await async_remove_snapshot(hass, entry.entry_id)
+    await async_remove_delivery_state(hass, entry.entry_id)
+    await async_remove_lifetime(hass, entry.entry_id)
+    await async_remove_price_ledger(hass, entry.entry_id)
+    await async_remove_cost_statistics(hass, entry.entry_id)
+    async_remove_schema_issue(hass, entry.entry_id)
@@ -5,16 +5,24 @@ import aiohttp
 import base64
 import json
 import logging
-import re
+import time
+from collections import deque
 from datetime import datetime
 from typing import Any
 
 from homeassistant.util import dt as dt_util
 
-from .const import API_LOGIN_URL, API_DASHBOARD_URL, API_TIMEOUT
+from .const import API_BASE_URL, API_DASHBOARD_PATH, API_LOGIN_PATH, API_TIMEOUT
+from .metrics import RefreshMetrics
+from .parser import PARSER
+from .schema import PortalSchemaValidator
+from .snapshot import AccountSnapshot
 
 _LOGGER = logging.getLogger(__name__)
 
+# Raw accountSummaryViewModel payloads kept in memory for diagnostics
+RAW_PAYLOAD_HISTORY = 5
+
 
 class AmeriGasAPIError(Exception):
     """Base exception for AmeriGas API errors."""
@@ -27,11 +35,33 @@ class AmeriGasAuthError(AmeriGasAPIError):
 class AmeriGasAPI:
     """API client for AmeriGas customer portal."""
 
-    def __init__(self, username: str, password: str) -> None:
-        """Initialize the API client."""
+    def __init__(
+        self,
+        username: str,
+        password: str,
+        base_url: str = API_BASE_URL,
+        timeout: float = API_TIMEOUT,
+    ) -> None:
+        """Initialize the API client.
+
+        base_url is only overridden by tests, to point the client at a local
+        stand-in for myamerigas.com. ``timeout`` (seconds per request) may be
+        changed between refreshes.
+        """
         self.username = username
         self.password = password
+        self.timeout = timeout
+        self._login_url = base_url + API_LOGIN_PATH
+        self._dashboard_url = base_url + API_DASHBOARD_PATH
         self._session: aiohttp.ClientSession | None = None
+        self.last_metrics: RefreshMetrics | None = None
+        # (fetched at, accountSummaryViewModel) of the latest fetches, oldest first
+        self.recent_payloads: deque[tuple[datetime, dict[str, Any]]] = deque(
+            maxlen=RAW_PAYLOAD_HISTORY
+        )
+        self._address_strategy: str | None = None
+        # Payload shape checks; the coordinator reads schema.last_report
+        self.schema = PortalSchemaValidator()
 
     async def _get_session(self) -> aiohttp.ClientSession:
         """Get or create aiohttp session."""
@@ -40,6 +70,20 @@ class AmeriGasAPI:
             _LOGGER.debug("Created new aiohttp session")
         return self._session
 
+    def set_credentials(self, username: str, password: str) -> bool:
+        """Swap in new credentials; return whether they changed.
+
+        Cookies of an open session belong to the old login and are cleared,
+        so the next fetch authenticates with the new credentials.
+        """
+        if (username, password) == (self.username, self.password):
+            return False
+        self.username = username
+        self.password = password
+        if self._session is not None and not self._session.closed:
+            self._session.cookie_jar.clear()
+        return True
+
     async def close(self) -> None:
         """Close the aiohttp session."""
         if self._session and not self._session.closed:
@@ -47,27 +91,60 @@ class AmeriGasAPI:
             _LOGGER.debug("Closed aiohttp session")
             self._session = None
 
-    async def async_get_data(self) -> dict[str, Any]:
-        """Fetch data from AmeriGas portal."""
+    async def async_get_data(self) -> AccountSnapshot:
+        """Fetch data from AmeriGas portal.
+
+        Timings and outcome of the call are left in ``last_metrics``.
+        """
+        metrics = self.last_metrics = RefreshMetrics(started_at=dt_util.utcnow())
+        started = time.perf_counter()
         try:
             # Login and get dashboard data
-            account_data, dashboard_html = await self._async_fetch_dashboard()
-
-            # Parse and return clean data
-            return self._parse_account_data(account_data, dashboard_html)
+            dashboard_html = await self._async_fetch_dashboard(metrics)
+
+            # Extract and parse into clean data
+            parse_started = time.perf_counter()
+            account_data = self._extract_account_data(dashboard_html)
+            self.recent_payloads.append((metrics.started_at, account_data))
+            self.schema.validate(account_data)
+            data = self._parse_account_data(account_data, dashboard_html)
+            metrics.parse_seconds = time.perf_counter() - parse_started
+            metrics.address_strategy = self._address_strategy
+            metrics.success = True
+            return data
 
         except aiohttp.ClientError as err:
+            metrics.error = type(err).__name__
             _LOGGER.error(f"Network error: {err}")
             raise AmeriGasAPIError(f"Network error: {err}") from err
         except json.JSONDecodeError as err:
+            metrics.error = type(err).__name__
             _LOGGER.error(f"JSON parsing error: {err}")
             raise AmeriGasAPIError(f"JSON parsing error: {err}") from err
+        except Exception as err:
+            metrics.error = type(err).__name__
+            raise
         finally:
+            metrics.total_seconds = time.perf_counter() - started
+            _LOGGER.debug("Fetch metrics: %s", metrics)
             # Close session after each fetch to prevent unclosed connection warnings
             await self.close()
 
-    async def _async_fetch_dashboard(self) -> tuple[dict[str, Any], str]:
-        """Login and fetch dashboard data."""
+    async def _async_fetch_dashboard(self, metrics: RefreshMetrics) -> str:
+        """Login and fetch the dashboard page, timing both requests."""
+        started = time.perf_counter()
+        metrics.logins += 1
+        await self._async_login()
+        metrics.login_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        dashboard_text = await self._async_get_dashboard()
+        metrics.dashboard_seconds = time.perf_counter() - started
+        metrics.payload_bytes = len(dashboard_text)
+        return dashboard_text
+
+    async def _async_login(self) -> None:
+        """Log in to the portal; the session cookie is kept on the client session."""
         session = await self._get_session()
         
         # Base64 encode credentials
@@ -89,228 +166,43 @@ class AmeriGasAPI:
 
         # Login
         async with session.post(
-            API_LOGIN_URL,
+            self._login_url,
             data=login_data,
             headers=headers,
-            timeout=aiohttp.ClientTimeout(total=API_TIMEOUT)
+            timeout=aiohttp.ClientTimeout(total=self.timeout)
         ) as response:
             if response.status != 200:
-                raise AmeriGasAuthError(f"Login failed with status {response.status}")
+                # An outage, not a verdict on the credentials: only an
+                # explicit rejection below may start re-auth
+                raise AmeriGasAPIError(f"Login failed with status {response.status}")
 
             login_result = await response.json()
             if not login_result.get('success'):
                 error_msg = login_result.get('message', 'Unknown error')
                 raise AmeriGasAuthError(f"Login failed: {error_msg}")
 
-        # Get dashboard
+    async def _async_get_dashboard(self) -> str:
+        """Fetch the dashboard page HTML."""
+        session = await self._get_session()
         async with session.get(
-            API_DASHBOARD_URL,
-            timeout=aiohttp.ClientTimeout(total=API_TIMEOUT)
+            self._dashboard_url,
+            timeout=aiohttp.ClientTimeout(total=self.timeout)
         ) as response:
             if response.status != 200:
                 raise AmeriGasAPIError(f"Dashboard fetch failed with status {response.status}")
 
-            dashboard_text = await response.text()
+            return await response.text()
 
-        # Parse accountSummaryViewModel from JavaScript
-        pattern = r'accountSummaryViewModel\s*=\s*({.*?});'
-        match = re.search(pattern, dashboard_text, re.DOTALL)
-
-        if not match:
+    @staticmethod
+    def _extract_account_data(dashboard_text: str) -> dict[str, Any]:
+        """Extract the accountSummaryViewModel JSON embedded in the dashboard page."""
+        if (account_data := PARSER.extract_account_data(dashboard_text)) is None:
             raise AmeriGasAPIError("Could not find accountSummaryViewModel in page")
+        return account_data
 
-        return json.loads(match.group(1)), dashboard_text
-
-    def _parse_account_data(self, account_data: dict[str, Any], dashboard_html: str | None = None) -> dict[str, Any]:
+    def _parse_account_data(
+        self, account_data: dict[str, Any], dashboard_html: str | None = None
+    ) -> AccountSnapshot:
         """Parse raw account data into clean format."""
-        # Helper functions
-        def safe_float(value, default=0.0):
-            if value is None or value == '':
-                return default
-            if isinstance(value, str):
-                value = value.replace('$', '').replace(',', '').strip()
-            try:
-                return float(value)
-            except (ValueError, TypeError):
-                return default
-
-        def safe_int(value, default=0):
-            try:
-                return int(value) if value else default
-            except (ValueError, TypeError):
-                return default
-
-        def parse_date(date_str):
-            """Parse AmeriGas date in multiple formats, always returns timezone-aware datetime.
-
-            Naive datetimes (date-only strings like MM/DD/YYYY) are treated as local time
-            using the HA-configured timezone, so dates never roll back a day due to UTC offset.
-            Datetimes that already carry timezone info are left unchanged.
-            """
-            if not date_str or date_str in ['', 'N/A', 'Unknown', 'None']:
-                return None
-
-            try:
-                dt_obj = None
-
-                # ISO format with T
-                if 'T' in str(date_str):
-                    if date_str.endswith('Z'):
-                        dt_obj = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-                    else:
-                        dt_obj = datetime.fromisoformat(date_str)
-
-                # US date format
-                elif '/' in str(date_str):
-                    parts = str(date_str).split('/')
-                    if len(parts) == 3:
-                        if len(parts[2]) == 2:
-                            dt_obj = datetime.strptime(str(date_str), '%m/%d/%y')
-                        else:
-                            dt_obj = datetime.strptime(str(date_str), '%m/%d/%Y')
-
-                # Fallback
-                else:
-                    dt_obj = datetime.fromisoformat(str(date_str))
-
-                if dt_obj:
-                    if dt_obj.tzinfo is None:
-                        # Treat as local time — date-only strings have no timezone context,
-                        # so attaching UTC would cause them to roll back a day for US timezones.
-                        dt_obj = dt_obj.replace(tzinfo=dt_util.get_default_time_zone())
-                    return dt_obj
-
-                return None
-
-            except (ValueError, AttributeError, TypeError) as e:
-                _LOGGER.warning(f"Could not parse date '{date_str}': {e}")
-                return None
-
-        # Extract delivery data
-        my_orders = account_data.get('myOrdersViewModel', {})
-        one_click = my_orders.get('OneClickOrderViewModel', {}) if my_orders else {}
-
-        last_delivery_date_raw = one_click.get('LastDeliveryDate', '') if one_click else ''
-        last_delivery_gallons = safe_float(one_click.get('LastDeliveredGallons'), 0.0) if one_click else 0.0
-
-        # Parse dates
-        last_tank_reading = parse_date(account_data.get('TMReadDate', ''))
-        last_delivery_date = parse_date(last_delivery_date_raw)
-
-        # v3.0.12: Parse payment date as a timezone-aware datetime for correlation logic.
-        # The raw string is no longer exposed — the parsed datetime is the only form used,
-        # consistent with all other date fields. Previously returned raw string which meant
-        # AmeriGasLastPaymentDateSensor could not use SensorDeviceClass.TIMESTAMP correctly.
-        last_payment_date = parse_date(account_data.get('LastPaymentDate', ''))
-
-        # Next delivery date - check open orders first, then fall back
-        next_delivery_date_raw = None
-        if my_orders:
-            open_orders = my_orders.get('LstOpenOrders', [])
-            if open_orders and len(open_orders) > 0:
-                # 1. Primary: firm end of delivery window
-                next_delivery_date_raw = open_orders[0].get('estDeliveryWindowTo')
-                # 2. Start of delivery window
-                if not next_delivery_date_raw:
-                    next_delivery_date_raw = open_orders[0].get('estDeliveryWindowFrom')
-                # 3. General order date if window not set
-                if not next_delivery_date_raw:
-                    next_delivery_date_raw = open_orders[0].get('orderDate')
-
-        # 4. OneClick fallback
-        if not next_delivery_date_raw and one_click:
-            next_delivery_date_raw = one_click.get('NextDeliveryDate')
-
-        # 5. Account level final fallback
-        if not next_delivery_date_raw and account_data:
-            next_delivery_date_raw = account_data.get('NextDeliveryDate', '')
-
-        next_delivery_date = parse_date(next_delivery_date_raw)
-
-        # v3.0.12: Parse payment terms days from human-readable string e.g. "Due within 1 day".
-        # Used by the payment correlation window in _calculate_cost_per_gallon() to determine
-        # whether last_payment_date is plausibly for a propane delivery vs an unrelated charge
-        # such as an annual tank rental fee. Falls back to 30 days if missing or unparseable.
-        payment_terms_str = account_data.get('PaymentTermsUpDate', '')
-        terms_match = re.search(r'\d+', str(payment_terms_str))
-        payment_terms_days = int(terms_match.group()) if terms_match else 30
-
-        # Build service address from accountSummaryViewModel JSON (Street/City/State/Zip)
-        street = account_data.get('Street', '')
-        city = account_data.get('City', '')
-        state_code = account_data.get('State', '')
-        zip_code = account_data.get('Zip', '')
-        service_address = f"{street}, {city}, {state_code} {zip_code}" if all([street, city, state_code, zip_code]) else None
-
-        # Build delivery address from dashboard HTML — customers may have a separate
-        # delivery address that only appears in page markup, not in accountSummaryViewModel.
-        # Two locations are checked in priority order:
-        #   1. "Delivery Address:" <span> — single element with full formatted address
-        #   2. aria-label="Street/City/State/Zipcode" <label> cluster
-        delivery_address = None
-        if dashboard_html:
-            # Strategy 1: "Delivery Address:" span — most reliable for will-call accounts
-            delivery_span = re.search(
-                r'Delivery Address:</div>\s*'
-                r'<div[^>]*>\s*<span>([^<]+)</span>',
-                dashboard_html,
-                re.IGNORECASE,
-            )
-            if delivery_span:
-                delivery_address = delivery_span.group(1).strip()
-                _LOGGER.debug("Delivery address sourced from Delivery Address span: %s", delivery_address)
-
-            # Strategy 2: aria-label label cluster (Street / City / State / Zipcode)
-            if not delivery_address:
-                s_match = re.search(r'aria-label="Street"[^>]*>\s*([^<]+)<', dashboard_html, re.IGNORECASE)
-                c_match = re.search(r'aria-label="City"[^>]*>\s*([^<]+)<', dashboard_html, re.IGNORECASE)
-                st_match = re.search(r'aria-label="State"[^>]*>\s*([^<]+)<', dashboard_html, re.IGNORECASE)
-                z_match = re.search(r'aria-label="Zipcode"[^>]*>\s*([^<]+)<', dashboard_html, re.IGNORECASE)
-                if s_match and c_match and st_match and z_match:
-                    h_street = s_match.group(1).strip()
-                    h_city = c_match.group(1).strip().rstrip(',').strip()
-                    h_state = st_match.group(1).strip()
-                    h_zip = z_match.group(1).strip()
-                    if all([h_street, h_city, h_state, h_zip]):
-                        delivery_address = f"{h_street}, {h_city}, {h_state} {h_zip}"
-                        _LOGGER.debug("Delivery address sourced from aria-label labels: %s", delivery_address)
-
-        return {
-            # Tank Info
-            'tank_level': safe_int(account_data.get('ForecastTankLevel'), 0),
-            'tank_size': safe_int(account_data.get('TankSize'), 0),
-            'days_remaining': safe_int(account_data.get('RunOutDays'), 0),
-
-            # Financial
-            'amount_due': safe_float(account_data.get('AmounDue'), 0.0),
-            'account_balance': safe_float(account_data.get('AccountBalance'), 0.0),
-            'last_payment_date': last_payment_date,
-            'last_payment_amount': safe_float(account_data.get('LastPaymentAmount'), 0.0),
-            'payment_terms': payment_terms_str,
-            'payment_terms_days': payment_terms_days,
-
-            # Tank Monitor
-            'last_tank_reading': last_tank_reading,
-            'tank_monitor': 'Yes' if account_data.get('TankMonitor') == '1' else 'No',
-
-            # Delivery
-            'last_delivery_date': last_delivery_date,
-            'last_delivery_gallons': last_delivery_gallons,
-            'next_delivery_date': next_delivery_date,
-
-            # Account Settings
-            'auto_pay': account_data.get('AutoPayment', 'Unknown'),
-            'paperless': account_data.get('Paperless', 'Unknown'),
-            'account_number': account_data.get('ShipToAccount', 'Unknown'),
-
-            # Address
-            'service_address': service_address,
-            'delivery_address': delivery_address,
-            'street': street,
-            'city': city,
-            'state': state_code,
-            'zip': zip_code,
-
-            # Metadata
-            'delivery_type': account_data.get('ForecastLongName', 'Unknown'),
-        }
\ No newline at end of file
+        data, self._address_strategy = PARSER.parse_account_data(account_data, dashboard_html)
+        return data
@@ -0,0 +1,97 @@
+"""Binary sensor platform for AmeriGas integration."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.binary_sensor import (
+    BinarySensorDeviceClass,
+    BinarySensorEntity,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .const import DOMAIN
+from .thresholds import (
+    THRESHOLD_LOW_DAYS,
+    THRESHOLD_LOW_GALLONS,
+    THRESHOLD_LOW_LEVEL,
+    THRESHOLDS,
+    ThresholdMonitor,
+    ThresholdSpec,
+)
+
+# Threshold key -> (name, icon)
+THRESHOLD_ENTITIES: dict[str, tuple[str, str]] = {
+    THRESHOLD_LOW_LEVEL: ("Low Tank Level", "mdi:gauge-low"),
+    THRESHOLD_LOW_GALLONS: ("Low Gallons Remaining", "mdi:propane-tank-outline"),
+    THRESHOLD_LOW_DAYS: ("Low Days Remaining", "mdi:calendar-alert"),
+}
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up AmeriGas binary sensors based on a config entry."""
+    data = hass.data[DOMAIN][entry.entry_id]
+    async_add_entities(
+        AmeriGasThresholdBinarySensor(data["coordinator"], entry.entry_id, data["thresholds"], spec)
+        for spec in THRESHOLDS
+    )
+
+
+class AmeriGasThresholdBinarySensor(CoordinatorEntity, BinarySensorEntity):
+    """On while a threshold check is tripped.
+
+    The ThresholdMonitor evaluates the check once per refresh, ahead of the
+    entities; this only reads its state. Unknown while the check is turned
+    off (limit 0) or the portal has not reported the value yet.
+    """
+
+    _attr_has_entity_name = True
+    _attr_device_class = BinarySensorDeviceClass.PROBLEM
+
+    def __init__(
+        self, coordinator, entry_id: str, monitor: ThresholdMonitor, spec: ThresholdSpec
+    ) -> None:
+        """Initialize the binary sensor."""
+        super().__init__(coordinator)
+        self._monitor = monitor
+        self._key = spec.key
+        self._hysteresis = spec.hysteresis
+        self._attr_name, self._attr_icon = THRESHOLD_ENTITIES[spec.key]
+        self._attr_unique_id = f"{entry_id}_{spec.key}"
+        self._attr_device_info = {
+            "identifiers": {(DOMAIN, entry_id)},
+            "name": "AmeriGas Propane",
+            "manufacturer": "AmeriGas",
+            "model": "AmeriGas Account",
+        }
+
+    async def async_added_to_hass(self) -> None:
+        """Also update when the limits change in the options."""
+        await super().async_added_to_hass()
+        self.async_on_remove(self._monitor.async_add_listener(self.async_write_ha_state))
+
+    @property
+    def available(self) -> bool:
+        """Unavailable until the first snapshot arrives (deferred first refresh)."""
+        return super().available and self.coordinator.data is not None
+
+    @property
+    def is_on(self) -> bool | None:
+        """Return whether the check is tripped."""
+        return self._monitor.states[self._key]
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the value checked and the limits."""
+        limit = self._monitor.limits[self._key]
+        return {
+            "value": self._monitor.values[self._key],
+            "limit": limit or None,
+            "clears_above": limit + self._hysteresis if limit else None,
+        }
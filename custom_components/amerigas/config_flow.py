@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 import logging
+from collections.abc import Mapping
 from typing import Any
 
 import voluptuous as vol
@@ -10,9 +11,30 @@ from homeassistant import config_entries
 from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
 
+from . import async_apply_credentials
 from .api import AmeriGasAPI, AmeriGasAPIError, AmeriGasAuthError
-from .const import DOMAIN
+from .const import (
+    API_TIMEOUT,
+    CONF_API_TIMEOUT,
+    CONF_JUMP_THRESHOLD,
+    CONF_LOW_DAYS,
+    CONF_LOW_GALLONS,
+    CONF_LOW_LEVEL_PERCENT,
+    CONF_NOISE_THRESHOLD,
+    CONF_REFRESH_HOURS,
+    CONF_SCAN_INTERVAL,
+    DATA_VALIDATED,
+    DEFAULT_LOW_DAYS,
+    DEFAULT_LOW_GALLONS,
+    DEFAULT_LOW_LEVEL_PERCENT,
+    DEFAULT_SCAN_INTERVAL,
+    DOMAIN,
+    NOISE_THRESHOLD_GALLONS,
+)
+from .delivery_state import DELIVERY_LEVEL_JUMP_THRESHOLD
+from .snapshot import AccountSnapshot
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -23,18 +45,24 @@ STEP_USER_DATA_SCHEMA = vol.Schema(
     }
 )
 
+# Scan intervals that divide the day evenly, in hours
+SCAN_INTERVAL_CHOICES = [1, 2, 3, 4, 6, 8, 12, 24]
+REFRESH_HOUR_CHOICES = {str(hour): f"{hour:02d}:00" for hour in range(24)}
+
 
 async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str, Any]:
     """Validate the user input allows us to connect.
 
     Called from both the initial setup flow and the options flow so that
-    credential validation logic only lives in one place.
+    credential validation logic only lives in one place. The snapshot it
+    fetched is returned as ``snapshot``, so a new entry can start from it
+    instead of fetching the portal again.
     """
     api = AmeriGasAPI(data[CONF_USERNAME], data[CONF_PASSWORD])
 
     try:
         # Attempt to fetch data to validate credentials
-        await api.async_get_data()
+        snapshot = await api.async_get_data()
     except AmeriGasAuthError as err:
         raise InvalidAuth from err
     except AmeriGasAPIError as err:
@@ -44,7 +72,22 @@ async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str,
         await api.close()
     
     # Return info that you want to store in the config entry.
-    return {"title": "AmeriGas Propane"}
+    return {"title": "AmeriGas Propane", "snapshot": snapshot}
+
+
+@callback
+def _async_hand_over(hass: HomeAssistant, username: str, snapshot: AccountSnapshot) -> None:
+    """Leave a validated snapshot for setup to seed the coordinator with."""
+    hass.data.setdefault(DATA_VALIDATED, {})[username] = snapshot
+
+
+@callback
+def _async_drop_hand_over(hass: HomeAssistant, username: str) -> None:
+    """Discard a validated snapshot setup did not take."""
+    validated = hass.data.get(DATA_VALIDATED, {})
+    validated.pop(username, None)
+    if not validated:
+        hass.data.pop(DATA_VALIDATED, None)
 
 
 class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
@@ -52,6 +95,8 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
 
+    _handed_over: str | None = None
+
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> config_entries.ConfigFlowResult:
@@ -69,12 +114,72 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 _LOGGER.exception("Unexpected exception")
                 errors["base"] = "unknown"
             else:
+                # Setup seeds the coordinator with this fetch: one portal
+                # round trip for the whole onboarding
+                self._handed_over = user_input[CONF_USERNAME]
+                _async_hand_over(self.hass, self._handed_over, info["snapshot"])
                 return self.async_create_entry(title=info["title"], data=user_input)
 
         return self.async_show_form(
             step_id="user", data_schema=STEP_USER_DATA_SCHEMA, errors=errors
         )
 
+    async def async_step_reauth(
+        self, entry_data: Mapping[str, Any]
+    ) -> config_entries.ConfigFlowResult:
+        """Start re-auth after the portal rejected the stored credentials.
+
+        Started by the coordinator from the failed refresh itself; polling of
+        the entry is paused until this flow finishes.
+        """
+        return await self.async_step_reauth_confirm()
+
+    async def async_step_reauth_confirm(
+        self, user_input: dict[str, Any] | None = None
+    ) -> config_entries.ConfigFlowResult:
+        """Ask for the new password and validate it with one fetch."""
+        errors: dict[str, str] = {}
+        entry = self._get_reauth_entry()
+
+        if user_input is not None:
+            data = {**entry.data, CONF_PASSWORD: user_input[CONF_PASSWORD]}
+            try:
+                info = await validate_input(self.hass, data)
+            except CannotConnect:
+                errors["base"] = "cannot_connect"
+            except InvalidAuth:
+                errors["base"] = "invalid_auth"
+            except Exception:
+                _LOGGER.exception("Unexpected exception in re-auth flow")
+                errors["base"] = "unknown"
+            else:
+                # The entry's update listener swaps the password into the
+                # running API client and resumes polling from this fetch,
+                # without a reload or a second portal round trip
+                self._handed_over = data[CONF_USERNAME]
+                _async_hand_over(self.hass, self._handed_over, info["snapshot"])
+                if not self.hass.config_entries.async_update_entry(entry, data=data):
+                    # Same password (e.g. after a lockout): no update
+                    # listener runs, so resume polling here
+                    async_apply_credentials(self.hass, entry)
+                return self.async_abort(reason="reauth_successful")
+
+        return self.async_show_form(
+            step_id="reauth_confirm",
+            data_schema=vol.Schema({vol.Required(CONF_PASSWORD): str}),
+            description_placeholders={"username": entry.data[CONF_USERNAME]},
+            errors=errors,
+        )
+
+    @callback
+    def async_remove(self) -> None:
+        """Drop the handed-over snapshot if setup did not take it.
+
+        Called once the flow has finished, after the new entry's setup.
+        """
+        if self._handed_over is not None:
+            _async_drop_hand_over(self.hass, self._handed_over)
+
     @staticmethod
     @callback
     def async_get_options_flow(config_entry: config_entries.ConfigEntry) -> OptionsFlow:
@@ -95,24 +200,42 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 class OptionsFlow(config_entries.OptionsFlow):
     """Handle options for AmeriGas.
 
+    The first step is a menu: credentials or low-tank thresholds.
+
     v3.0.12: Allows credentials to be updated in place. The username field is
     pre-filled with the current value; the password field is always blank so
     the user must deliberately re-enter it (avoids storing it in form state).
 
     HA 2025.12+: No __init__ override — config_entry is a read-only property
     that HA injects after instantiation. Access it via self.config_entry in
-    async_step_init directly.
+    the steps directly.
     """
 
+    _handed_over: str | None = None
+
+    @callback
+    def async_remove(self) -> None:
+        """Drop the validated snapshot if the update listener did not take it."""
+        if self._handed_over is not None:
+            _async_drop_hand_over(self.hass, self._handed_over)
+
     async def async_step_init(
         self, user_input: dict[str, Any] | None = None
     ) -> config_entries.ConfigFlowResult:
-        """Manage the options."""
+        """Show the options menu."""
+        return self.async_show_menu(
+            step_id="init", menu_options=["credentials", "thresholds", "tuning"]
+        )
+
+    async def async_step_credentials(
+        self, user_input: dict[str, Any] | None = None
+    ) -> config_entries.ConfigFlowResult:
+        """Update the account credentials."""
         errors: dict[str, str] = {}
 
         if user_input is not None:
             try:
-                await validate_input(self.hass, user_input)
+                info = await validate_input(self.hass, user_input)
             except CannotConnect:
                 errors["base"] = "cannot_connect"
             except InvalidAuth:
@@ -122,12 +245,18 @@ class OptionsFlow(config_entries.OptionsFlow):
                 errors["base"] = "unknown"
             else:
                 # Update the config entry data with the new credentials.
-                # This takes effect on the next coordinator refresh without
-                # requiring a full HA restart.
-                self.hass.config_entries.async_update_entry(
+                # The entry's update listener swaps them into the running
+                # API client and adopts this fetch, without a reload or a
+                # second portal round trip.
+                self._handed_over = user_input[CONF_USERNAME]
+                _async_hand_over(self.hass, self._handed_over, info["snapshot"])
+                if not self.hass.config_entries.async_update_entry(
                     self.config_entry, data=user_input
-                )
-                return self.async_create_entry(title="", data={})
+                ):
+                    # Unchanged credentials: no update listener runs
+                    async_apply_credentials(self.hass, self.config_entry)
+                # Keep the other options as they are
+                return self.async_create_entry(title="", data=dict(self.config_entry.options))
 
         # Pre-fill username so the user only needs to re-enter the password
         schema = vol.Schema(
@@ -141,9 +270,75 @@ class OptionsFlow(config_entries.OptionsFlow):
         )
 
         return self.async_show_form(
-            step_id="init", data_schema=schema, errors=errors
+            step_id="credentials", data_schema=schema, errors=errors
+        )
+
+    async def async_step_thresholds(
+        self, user_input: dict[str, Any] | None = None
+    ) -> config_entries.ConfigFlowResult:
+        """Set the low-tank thresholds; applied without reloading the entry."""
+        options = self.config_entry.options
+        if user_input is not None:
+            return self.async_create_entry(title="", data={**options, **user_input})
+
+        schema = vol.Schema(
+            {
+                vol.Required(
+                    CONF_LOW_LEVEL_PERCENT,
+                    default=options.get(CONF_LOW_LEVEL_PERCENT, DEFAULT_LOW_LEVEL_PERCENT),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=100)),
+                vol.Required(
+                    CONF_LOW_GALLONS,
+                    default=options.get(CONF_LOW_GALLONS, DEFAULT_LOW_GALLONS),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=2000)),
+                vol.Required(
+                    CONF_LOW_DAYS,
+                    default=options.get(CONF_LOW_DAYS, DEFAULT_LOW_DAYS),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=365)),
+            }
         )
 
+        return self.async_show_form(step_id="thresholds", data_schema=schema)
+
+    async def async_step_tuning(
+        self, user_input: dict[str, Any] | None = None
+    ) -> config_entries.ConfigFlowResult:
+        """Tune the refresh schedule, API timeout and detection thresholds.
+
+        Applied live by the entry's update listener. Leaving every refresh
+        hour unticked refreshes every scan interval from midnight instead.
+        """
+        options = self.config_entry.options
+        if user_input is not None:
+            return self.async_create_entry(title="", data={**options, **user_input})
+
+        schema = vol.Schema(
+            {
+                vol.Required(
+                    CONF_SCAN_INTERVAL,
+                    default=options.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL),
+                ): vol.All(vol.Coerce(int), vol.In(SCAN_INTERVAL_CHOICES)),
+                vol.Optional(
+                    CONF_REFRESH_HOURS,
+                    default=options.get(CONF_REFRESH_HOURS, []),
+                ): cv.multi_select(REFRESH_HOUR_CHOICES),
+                vol.Required(
+                    CONF_API_TIMEOUT,
+                    default=options.get(CONF_API_TIMEOUT, API_TIMEOUT),
+                ): vol.All(vol.Coerce(int), vol.Range(min=10, max=300)),
+                vol.Required(
+                    CONF_JUMP_THRESHOLD,
+                    default=options.get(CONF_JUMP_THRESHOLD, DELIVERY_LEVEL_JUMP_THRESHOLD),
+                ): vol.All(vol.Coerce(float), vol.Range(min=1, max=500)),
+                vol.Required(
+                    CONF_NOISE_THRESHOLD,
+                    default=options.get(CONF_NOISE_THRESHOLD, NOISE_THRESHOLD_GALLONS),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=50)),
+            }
+        )
+
+        return self.async_show_form(step_id="tuning", data_schema=schema)
+
 
 class CannotConnect(HomeAssistantError):
     """Error to indicate we cannot connect."""
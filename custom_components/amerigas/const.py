@@ -3,15 +3,52 @@ from typing import Final
 
 DOMAIN: Final = "amerigas"
 
+# hass.data key of the snapshots the config flow fetched to validate
+# credentials, by username, until setup seeds the coordinator with them.
+# The flow drops a snapshot nobody took when it finishes.
+DATA_VALIDATED: Final = f"{DOMAIN}_validated"
+
 # Configuration
 CONF_SCAN_INTERVAL: Final = "scan_interval"
 DEFAULT_SCAN_INTERVAL: Final = 6  # hours
 
+# Tuning options; each defaults to the constant it overrides
+CONF_REFRESH_HOURS: Final = "refresh_hours"  # explicit hours, else every scan interval
+CONF_API_TIMEOUT: Final = "api_timeout"
+CONF_JUMP_THRESHOLD: Final = "jump_threshold"
+CONF_NOISE_THRESHOLD: Final = "noise_threshold"
+
+# Threshold options; a limit of 0 turns the check off
+CONF_LOW_LEVEL_PERCENT: Final = "low_level_percent"
+CONF_LOW_GALLONS: Final = "low_gallons"
+CONF_LOW_DAYS: Final = "low_days"
+DEFAULT_LOW_LEVEL_PERCENT: Final = 20
+DEFAULT_LOW_GALLONS: Final = 0
+DEFAULT_LOW_DAYS: Final = 14
+
 # API Constants
-API_LOGIN_URL: Final = "https://www.myamerigas.com/Login/Login"
-API_DASHBOARD_URL: Final = "https://www.myamerigas.com/Dashboard/Dashboard"
+API_BASE_URL: Final = "https://www.myamerigas.com"
+API_LOGIN_PATH: Final = "/Login/Login"
+API_DASHBOARD_PATH: Final = "/Dashboard/Dashboard"
+API_LOGIN_URL: Final = API_BASE_URL + API_LOGIN_PATH
+API_DASHBOARD_URL: Final = API_BASE_URL + API_DASHBOARD_PATH
 API_TIMEOUT: Final = 45 #seconds; increase if you have a slow connection (or AmeriGas is slow)
 
+# Events
+EVENT_REFRESH: Final = "amerigas_refresh"
+EVENT_DELIVERY_DETECTED: Final = "amerigas_delivery_detected"
+EVENT_DELIVERY_WINDOW: Final = "amerigas_delivery_window"
+EVENT_THRESHOLD: Final = "amerigas_threshold"
+
+# Refresh triggers reported in EVENT_REFRESH
+TRIGGER_SCHEDULED: Final = "scheduled"
+TRIGGER_STARTUP: Final = "startup"
+TRIGGER_MANUAL: Final = "manual"
+
+# Window boundaries reported in EVENT_DELIVERY_WINDOW
+WINDOW_START: Final = "start"
+WINDOW_END: Final = "end"
+
 # Sensor Keys
 TANK_LEVEL: Final = "tank_level"
 TANK_SIZE: Final = "tank_size"
@@ -0,0 +1,436 @@
+"""Data update coordinator for the AmeriGas integration."""
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import replace
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import CALLBACK_TYPE, HassJob, HomeAssistant, callback
+from homeassistant.exceptions import ConfigEntryAuthFailed
+from homeassistant.helpers import issue_registry as ir
+from homeassistant.helpers.event import async_call_later, async_track_time_change
+from homeassistant.helpers.start import async_at_started
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
+
+from .api import AmeriGasAPI, AmeriGasAuthError
+from .const import (
+    DOMAIN,
+    EVENT_REFRESH,
+    TRIGGER_MANUAL,
+    TRIGGER_SCHEDULED,
+    TRIGGER_STARTUP,
+)
+from .metrics import RefreshMetricsHistory
+from .profiler import RefreshProfiler
+from .schema import SchemaReport
+from .snapshot import AccountSnapshot
+
+_LOGGER = logging.getLogger(__name__)
+
+SNAPSHOT_STORAGE_VERSION = 1
+# Delay before a fresh snapshot is flushed to disk. Coalesces the write with
+# any other Store saves HA performs around the same time.
+SNAPSHOT_SAVE_DELAY = 10  # seconds
+
+# Backoff between background attempts at the first refresh after startup.
+# The last delay repeats until the portal answers.
+FIRST_REFRESH_RETRY_DELAYS: tuple[int, ...] = (60, 300, 900, 1800)  # seconds
+
+# Minimum spacing of EVENT_REFRESH per entry. Events inside the window are
+# dropped unless the status changed; the next one carries the dropped count.
+REFRESH_EVENT_MIN_INTERVAL = 60  # seconds
+
+
+def _snapshot_store(hass: HomeAssistant, entry_id: str) -> Store[dict[str, Any]]:
+    """Return the Store holding the last good snapshot for an entry."""
+    return Store(hass, SNAPSHOT_STORAGE_VERSION, f"{DOMAIN}.{entry_id}.snapshot")
+
+
+async def async_remove_snapshot(hass: HomeAssistant, entry_id: str) -> None:
+    """Delete the persisted snapshot for an entry."""
+    await _snapshot_store(hass, entry_id).async_remove()
+
+
+def _schema_issue_id(entry_id: str) -> str:
+    """Return the repair issue ID used for an entry's portal schema drift."""
+    return f"schema_drift_{entry_id}"
+
+
+@callback
+def async_remove_schema_issue(hass: HomeAssistant, entry_id: str) -> None:
+    """Delete an entry's schema drift repair issue, if raised."""
+    ir.async_delete_issue(hass, DOMAIN, _schema_issue_id(entry_id))
+
+
+class AmeriGasDataUpdateCoordinator(DataUpdateCoordinator[AccountSnapshot]):
+    """Coordinator that serves the last good snapshot while the portal revalidates.
+
+    Every successful refresh is persisted with a Store. On startup the stored
+    snapshot is loaded into ``data`` before any portal request is made, so
+    entities come up immediately with the previous values and are flagged
+    ``stale`` until the background revalidation succeeds. If that
+    revalidation fails, the stale snapshot keeps being served rather than
+    marking every entity unavailable.
+
+    The first portal fetch never runs on the setup path. It is scheduled for
+    after Home Assistant has started and retried in the background with
+    backoff, so startup time does not depend on the portal's response time.
+    Entities without a cached snapshot stay unavailable until it succeeds.
+
+    A rejected login starts Home Assistant's re-auth flow from the failed
+    refresh itself and sets ``auth_failed``: cron ticks, refresh requests and
+    first-refresh retries are then skipped, so the portal sees no more logins
+    with the old password. Credentials confirmed through a flow clear the
+    flag. Re-auth is started on ``config_entry``; without one (tests) the
+    refresh only fails.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        api: AmeriGasAPI,
+        entry_id: str,
+        config_entry: ConfigEntry | None = None,
+    ) -> None:
+        """Initialize the coordinator without an update_interval (cron driven)."""
+        super().__init__(
+            hass,
+            _LOGGER,
+            config_entry=config_entry,
+            name=DOMAIN,
+            update_interval=None,  # Disabled - using cron schedule instead
+        )
+        self.api = api
+        self.entry_id = entry_id
+        self.stale: bool = False
+        self.auth_failed: bool = False
+        self.snapshot_fetched_at: datetime | None = None
+        # Snapshot fields carried over from the previous refresh because the
+        # portal payload no longer provides them in the expected shape
+        self.stale_fields: frozenset[str] = frozenset()
+        self._schema_issue_report: SchemaReport | None = None
+        self._store = _snapshot_store(hass, entry_id)
+        self.metrics = RefreshMetricsHistory()
+        self.profiler: RefreshProfiler | None = None
+        self.last_profile: dict[str, Any] | None = None
+        # Reason for the next refresh, reported in EVENT_REFRESH. Anything
+        # that does not set it (service call, entity update) counts as manual.
+        self._next_trigger: str = TRIGGER_MANUAL
+        self._last_event_at: float | None = None
+        self._last_event_status: str | None = None
+        self._suppressed_events = 0
+        self._first_refresh_attempts = 0
+        self._unsub_started: CALLBACK_TYPE | None = None
+        self._unsub_retry: CALLBACK_TYPE | None = None
+        self._unsub_cron: CALLBACK_TYPE | None = None
+        self.refresh_hours: list[int] = []
+        self._first_refresh_job = HassJob(
+            self._async_background_first_refresh,
+            f"{DOMAIN} first refresh",
+            cancel_on_shutdown=True,
+        )
+
+    async def _async_update_data(self) -> AccountSnapshot:
+        """Fetch data from AmeriGas."""
+        _LOGGER.debug("Starting scheduled data update from AmeriGas API")
+        trigger, self._next_trigger = self._next_trigger, TRIGGER_MANUAL
+        try:
+            data = await self.api.async_get_data()
+        except AmeriGasAuthError as err:
+            # Every further poll would repeat the rejected login and risk
+            # locking the account: stop polling until re-auth succeeds
+            self._record_refresh(trigger, "auth_failed")
+            self.auth_failed = True
+            _LOGGER.warning("AmeriGas rejected the credentials, polling paused: %s", err)
+            raise ConfigEntryAuthFailed(f"AmeriGas rejected the credentials: {err}") from err
+        except Exception as err:
+            self._record_refresh(trigger, "stale" if self.stale and self.data is not None else "failed")
+            if self.stale and self.data is not None:
+                # Stale-while-revalidate: keep serving the restored snapshot
+                # instead of flipping every entity to unavailable.
+                _LOGGER.warning(
+                    "Revalidation of cached AmeriGas snapshot failed, "
+                    "continuing to serve data from %s: %s",
+                    self.snapshot_fetched_at,
+                    err,
+                )
+                return self.data
+            _LOGGER.error(f"Error communicating with AmeriGas: {err}")
+            raise UpdateFailed(f"Error communicating with AmeriGas: {err}") from err
+
+        self._record_refresh(trigger, "success")
+        _LOGGER.info("Successfully updated data from AmeriGas API")
+        data = self._apply_schema_fallback(data, self.api.schema.last_report)
+        self.stale = False
+        self.snapshot_fetched_at = dt_util.utcnow()
+        self._store.async_delay_save(self._snapshot_to_store, SNAPSHOT_SAVE_DELAY)
+        return data
+
+    def _apply_schema_fallback(self, data: AccountSnapshot, report: SchemaReport) -> AccountSnapshot:
+        """Keep the last good value of every field built from a drifted payload key.
+
+        A renamed or retyped key otherwise parses to a default (e.g. an
+        amount due of 0.0) that looks like a real reading.
+        """
+        self.stale_fields = report.stale_fields
+        self._async_update_schema_issue(report)
+        if self.stale_fields and self.data is not None:
+            data = replace(data, **{name: getattr(self.data, name) for name in self.stale_fields})
+        return data
+
+    @callback
+    def _async_update_schema_issue(self, report: SchemaReport) -> None:
+        """Raise, update or clear the entry's single schema drift repair issue."""
+        issue_id = _schema_issue_id(self.entry_id)
+        if report.drifted:
+            if report != self._schema_issue_report:
+                ir.async_create_issue(
+                    self.hass,
+                    DOMAIN,
+                    issue_id,
+                    is_fixable=False,
+                    severity=ir.IssueSeverity.WARNING,
+                    translation_key="schema_drift",
+                    translation_placeholders={"fields": report.describe()},
+                )
+            self._schema_issue_report = report
+        elif self._schema_issue_report is not None:
+            ir.async_delete_issue(self.hass, DOMAIN, issue_id)
+            self._schema_issue_report = None
+
+    async def async_refresh(self) -> None:
+        """Refresh data, sampling the whole refresh while profiling is armed.
+
+        Wraps the base implementation so the profile covers the fetch, parse,
+        DeliveryTracker and every entity state write triggered by the update.
+        """
+        if (profiler := self.profiler) is None or not profiler.active:
+            await super().async_refresh()
+            return
+
+        profiler.start()
+        try:
+            await super().async_refresh()
+        finally:
+            profiler.stop()
+            # The sampler may be mid-sample; never join it on the event loop
+            await self.hass.async_add_executor_job(profiler.join)
+        if not profiler.active:
+            self.profiler = None
+            await self._async_save_profile(profiler)
+
+    async def async_request_refresh(self) -> None:
+        """Request a debounced refresh, unless polling is paused for re-auth."""
+        if self.auth_failed:
+            _LOGGER.debug("AmeriGas refresh skipped: waiting for new credentials")
+            return
+        await super().async_request_refresh()
+
+    @callback
+    def async_start_profiling(self, refreshes: int) -> None:
+        """Profile the next ``refreshes`` refreshes, replacing any armed profile."""
+        self.profiler = RefreshProfiler(refreshes)
+        _LOGGER.info("Profiling the next %d AmeriGas refresh(es)", refreshes)
+
+    async def _async_save_profile(self, profiler: RefreshProfiler) -> None:
+        """Write a finished profile to the config directory and keep its summary."""
+        path = self.hass.config.path(
+            f"{DOMAIN}_profile_{self.entry_id}_{dt_util.utcnow().strftime('%Y%m%dT%H%M%S')}.txt"
+        )
+        try:
+            await self.hass.async_add_executor_job(Path(path).write_text, profiler.collapsed())
+        except OSError as err:
+            _LOGGER.warning("Could not write AmeriGas refresh profile: %s", err)
+            path = None
+        self.last_profile = {"path": path, **profiler.summary()}
+        _LOGGER.info(
+            "AmeriGas refresh profile of %d refresh(es) saved to %s (%d samples, %.1f%% overhead)",
+            profiler.profiled,
+            path,
+            profiler.samples,
+            self.last_profile["overhead"] * 100,
+        )
+
+    @callback
+    def _record_refresh(self, trigger: str, status: str) -> None:
+        """Record the API's metrics for the fetch that just finished and fire EVENT_REFRESH.
+
+        status is ``success``, ``failed``, or ``stale`` when a failed
+        revalidation kept serving the cached snapshot.
+        """
+        metrics = self.api.last_metrics
+        if metrics is not None and metrics is not self.metrics.last:
+            self.metrics.append(metrics)
+        else:
+            metrics = None
+
+        now = time.monotonic()
+        if (
+            self._last_event_at is not None
+            and now - self._last_event_at < REFRESH_EVENT_MIN_INTERVAL
+            and status == self._last_event_status
+        ):
+            self._suppressed_events += 1
+            return
+
+        # Background attempts at the first refresh before this one
+        retries = max(0, self._first_refresh_attempts - 1) if trigger == TRIGGER_STARTUP else 0
+        self.hass.bus.async_fire(
+            EVENT_REFRESH,
+            {
+                "entry_id": self.entry_id,
+                "trigger": trigger,
+                "status": status,
+                "duration_ms": round(metrics.total_seconds * 1000) if metrics else None,
+                "bytes": metrics.payload_bytes if metrics else None,
+                "retries": retries,
+                "error": metrics.error if metrics else None,
+                "suppressed": self._suppressed_events,
+            },
+        )
+        self._last_event_at = now
+        self._last_event_status = status
+        self._suppressed_events = 0
+
+    async def async_restore_snapshot(self) -> bool:
+        """Load the last persisted snapshot into ``data``.
+
+        Returns True when a snapshot was restored. The coordinator is then
+        marked stale until the next successful refresh.
+        """
+        try:
+            stored = await self._store.async_load()
+        except Exception as err:  # Corrupt file must never block setup
+            _LOGGER.warning("Could not load cached AmeriGas snapshot: %s", err)
+            return False
+
+        if not stored or not isinstance(stored.get("data"), dict):
+            return False
+
+        try:
+            data = AccountSnapshot.from_dict(stored["data"])
+        except (TypeError, ValueError) as err:
+            _LOGGER.warning("Could not load cached AmeriGas snapshot: %s", err)
+            return False
+
+        fetched_at = stored.get("fetched_at")
+        self.snapshot_fetched_at = dt_util.parse_datetime(fetched_at) if fetched_at else None
+        self.stale = True
+        self.data = data
+        _LOGGER.info(
+            "Restored cached AmeriGas snapshot from %s; revalidating in background",
+            self.snapshot_fetched_at,
+        )
+        return True
+
+    @callback
+    def async_seed(self, data: AccountSnapshot, trigger: str = TRIGGER_STARTUP) -> None:
+        """Adopt a snapshot the config flow has just fetched, as a refresh would.
+
+        The flow validated the credentials with it, so a new entry starts
+        fresh without a first refresh, and changed credentials need no second
+        fetch. Listeners are not notified; call async_update_listeners() once
+        they are all registered.
+        """
+        self._record_refresh(trigger, "success")
+        self.last_update_success = True
+        self.data = data
+        self.stale = False
+        self.snapshot_fetched_at = dt_util.utcnow()
+        self._store.async_delay_save(self._snapshot_to_store, SNAPSHOT_SAVE_DELAY)
+        _LOGGER.info("Seeded AmeriGas data from the config flow's fetch")
+
+    @callback
+    def async_schedule_first_refresh(self) -> None:
+        """Run the first refresh once Home Assistant has started.
+
+        Fires immediately when the entry is set up on a running instance
+        (e.g. straight after the config flow).
+        """
+        self._unsub_started = async_at_started(self.hass, self._async_at_started)
+
+    async def _async_at_started(self, hass: HomeAssistant) -> None:
+        """Start the first refresh now that Home Assistant is running."""
+        self._unsub_started = None
+        await self._async_background_first_refresh()
+
+    async def _async_background_first_refresh(self, _now: datetime | None = None) -> None:
+        """Attempt the first refresh, re-arming a backoff timer until it succeeds."""
+        self._unsub_retry = None
+        self._first_refresh_attempts += 1
+        self._next_trigger = TRIGGER_STARTUP
+        await self.async_refresh()
+
+        if self.last_update_success and not self.stale:
+            self._first_refresh_attempts = 0
+            return
+        if self.auth_failed:
+            # Retrying cannot help; the re-auth flow takes over
+            return
+
+        delay = FIRST_REFRESH_RETRY_DELAYS[
+            min(self._first_refresh_attempts, len(FIRST_REFRESH_RETRY_DELAYS)) - 1
+        ]
+        _LOGGER.info(
+            "First AmeriGas refresh attempt %d did not succeed; retrying in %ds",
+            self._first_refresh_attempts,
+            delay,
+        )
+        self._unsub_retry = async_call_later(self.hass, delay, self._first_refresh_job)
+
+    @callback
+    def async_schedule_refresh_hours(self, hours: list[int]) -> None:
+        """Register the cron refresh at minute 0 of each hour in ``hours``.
+
+        Replaces any previously registered schedule; the same hours again
+        keep the current one.
+        """
+        if self._unsub_cron:
+            if hours == self.refresh_hours:
+                return
+            self._unsub_cron()
+        self.refresh_hours = hours
+        _LOGGER.debug("Refreshing at hours %s", hours)
+        self._unsub_cron = async_track_time_change(
+            self.hass,
+            self._async_scheduled_refresh,
+            hour=hours,
+            minute=0,
+            second=0,
+        )
+
+    @callback
+    def _async_scheduled_refresh(self, now: datetime) -> None:
+        """Handle scheduled refresh at cron times."""
+        if self.auth_failed:
+            return
+        _LOGGER.debug(f"Cron trigger at {now.strftime('%H:%M')} - requesting data refresh")
+        self._next_trigger = TRIGGER_SCHEDULED
+        self.hass.async_create_task(self.async_request_refresh())
+
+    async def async_shutdown(self) -> None:
+        """Cancel the cron schedule and pending first-refresh timers."""
+        if self._unsub_cron:
+            self._unsub_cron()
+            self._unsub_cron = None
+            _LOGGER.debug("Cron schedule unsubscribed")
+        if self._unsub_started:
+            self._unsub_started()
+            self._unsub_started = None
+        if self._unsub_retry:
+            self._unsub_retry()
+            self._unsub_retry = None
+        await super().async_shutdown()
+
+    def _snapshot_to_store(self) -> dict[str, Any]:
+        """Return the payload written by the Store."""
+        return {
+            "fetched_at": self.snapshot_fetched_at.isoformat() if self.snapshot_fetched_at else None,
+            "data": self.data.as_dict() if self.data is not None else None,
+        }
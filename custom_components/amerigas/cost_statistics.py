@@ -0,0 +1,206 @@
+"""Hourly propane cost statistic for the Energy Dashboard."""
+from __future__ import annotations
+
+import logging
+from bisect import bisect_left
+from datetime import datetime
+from typing import Any
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+from .lifetime import LifetimeAccumulator
+from .price_ledger import PriceLedger
+
+_LOGGER = logging.getLogger(__name__)
+
+COST_STORAGE_VERSION = 1
+COST_SAVE_DELAY = 10  # seconds
+# Hourly rows handed to the recorder per import job. A price correction
+# rewrites every hour after the corrected delivery; batching keeps each
+# recorder transaction small.
+COST_BACKFILL_BATCH = 500
+
+
+def cost_statistic_id(entry_id: str) -> str:
+    """Return the external statistic id of an entry's cost."""
+    return f"{DOMAIN}:propane_cost_{entry_id.lower()}"
+
+
+def _cost_store(hass: HomeAssistant, entry_id: str) -> Store[dict[str, Any]]:
+    """Return the Store holding an entry's hourly consumption."""
+    return Store(hass, COST_STORAGE_VERSION, f"{DOMAIN}.{entry_id}.cost")
+
+
+def _hour(when: datetime) -> datetime:
+    """Return the start of the UTC hour containing ``when``."""
+    return dt_util.as_utc(when).replace(minute=0, second=0, microsecond=0)
+
+
+async def async_remove_cost_statistics(hass: HomeAssistant, entry_id: str) -> None:
+    """Delete the hourly consumption of an entry and its recorded statistic."""
+    await _cost_store(hass, entry_id).async_remove()
+    if "recorder" in hass.config.components:
+        from homeassistant.components.recorder import get_instance
+
+        get_instance(hass).async_clear_statistics([cost_statistic_id(entry_id)])
+
+
+class CostStatistics:
+    """Propane cost per hour, written as an external statistic.
+
+    The Lifetime Gallons sensor feeds the Energy Dashboard's gas usage; this
+    is the matching cost. Each consumption delta from the lifetime
+    accumulator is added to the gallons of its UTC hour, and each hour is
+    priced at the delivery price in effect at its start, from the price
+    ledger. Hours before the first delivery on record use its price.
+
+    Rows from ``_dirty`` on still have to be (re)written: new hours, and
+    every hour from a delivery whose price was recorded or corrected, since
+    the running sum shifts for all later hours. They are sent to the recorder
+    in batches of COST_BACKFILL_BATCH rows. Nothing is written until the
+    recorder is loaded and the ledger has a price; the rows wait until then.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        accumulator: LifetimeAccumulator,
+        ledger: PriceLedger,
+        entry_id: str,
+    ) -> None:
+        """Initialize; call async_load() before use."""
+        self.hass = hass
+        self.accumulator = accumulator
+        self.ledger = ledger
+        self.entry_id = entry_id
+        self.statistic_id = cost_statistic_id(entry_id)
+
+        # Parallel lists sorted by hour; _sums[i] is the cost up to hour i
+        self.hours: list[datetime] = []
+        self.gallons: list[float] = []
+        self._sums: list[float] = []
+        self._dirty = 0
+
+        self._store = _cost_store(hass, entry_id)
+        self._unsubs: list[CALLBACK_TYPE] = []
+
+    @property
+    def total_cost(self) -> float:
+        """Return the cost of all hours written so far."""
+        return self._sums[self._dirty - 1] if self._dirty else 0.0
+
+    async def async_load(self) -> None:
+        """Restore the hourly consumption, catch up, then start listening."""
+        try:
+            if stored := await self._store.async_load():
+                for hour, gallons, total in stored["hours"]:
+                    self.hours.append(dt_util.parse_datetime(hour))
+                    self.gallons.append(gallons)
+                    self._sums.append(total)
+                self._dirty = stored["written"]
+        except Exception as err:  # Corrupt file must never block setup
+            _LOGGER.warning("Could not load AmeriGas cost statistics: %s", err)
+            self.hours, self.gallons, self._sums, self._dirty = [], [], [], 0
+
+        self._unsubs = [
+            self.accumulator.async_add_consumption_listener(self._handle_consumption),
+            self.ledger.async_add_price_listener(self._handle_price_change),
+        ]
+        self._async_write()
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Stop listening."""
+        while self._unsubs:
+            self._unsubs.pop()()
+
+    @callback
+    def _handle_consumption(self, at: datetime, gallons: float) -> None:
+        """Add a consumption delta to its hour."""
+        hour = _hour(at)
+        index = bisect_left(self.hours, hour)
+        if index < len(self.hours) and self.hours[index] == hour:
+            self.gallons[index] += gallons
+        else:
+            self.hours.insert(index, hour)
+            self.gallons.insert(index, gallons)
+            self._sums.insert(index, 0.0)
+        self._dirty = min(self._dirty, index)
+        self._async_write()
+
+    @callback
+    def _handle_price_change(self, date: datetime) -> None:
+        """Reprice every hour from a recorded or corrected delivery on."""
+        # The earliest delivery also prices the hours before it
+        index = 0 if date == self.ledger.dates[0] else bisect_left(self.hours, _hour(date))
+        if index < self._dirty:
+            _LOGGER.debug(
+                "Delivery price of %s changed, rewriting %s hours of cost",
+                date,
+                len(self.hours) - index,
+            )
+            self._dirty = index
+        self._async_write()
+
+    @callback
+    def _async_write(self) -> None:
+        """Price the dirty hours and send them to the recorder in batches."""
+        start = self._dirty
+        if start == len(self.hours) or not len(self.ledger):
+            return
+        if "recorder" not in self.hass.config.components:
+            return
+        from homeassistant.components.recorder.models import StatisticData, StatisticMeanType
+        from homeassistant.components.recorder.statistics import async_add_external_statistics
+
+        fallback = self.ledger.prices[0]
+        total = self._sums[start - 1] if start else 0.0
+        rows: list[StatisticData] = []
+        for index in range(start, len(self.hours)):
+            hour = self.hours[index]
+            price = self.ledger.price_at(hour)
+            cost = self.gallons[index] * (fallback if price is None else price)
+            total += cost
+            self._sums[index] = total
+            rows.append(StatisticData(start=hour, state=round(cost, 4), sum=round(total, 4)))
+
+        metadata = {
+            "has_sum": True,
+            "mean_type": StatisticMeanType.NONE,
+            "name": "AmeriGas Propane cost",
+            "source": DOMAIN,
+            "statistic_id": self.statistic_id,
+            "unit_class": None,
+            # The Energy Dashboard prices in the instance currency
+            "unit_of_measurement": self.hass.config.currency,
+        }
+        for batch in range(0, len(rows), COST_BACKFILL_BATCH):
+            async_add_external_statistics(
+                self.hass, metadata, rows[batch : batch + COST_BACKFILL_BATCH]
+            )
+        self._dirty = len(self.hours)
+        self._store.async_delay_save(self._data_to_store, COST_SAVE_DELAY)
+
+    def _data_to_store(self) -> dict[str, Any]:
+        """Return the compact Store payload: one row per hour."""
+        return {
+            "written": self._dirty,
+            "hours": [
+                [hour.isoformat(), gallons, total]
+                for hour, gallons, total in zip(self.hours, self.gallons, self._sums)
+            ],
+        }
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a summary for diagnostics."""
+        return {
+            "statistic_id": self.statistic_id,
+            "hours": len(self.hours),
+            "pending_hours": len(self.hours) - self._dirty,
+            "first_hour": self.hours[0].isoformat() if self.hours else None,
+            "total_gallons": round(sum(self.gallons), 2),
+            "total_cost": round(self.total_cost, 2),
+        }
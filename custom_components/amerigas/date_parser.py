@@ -0,0 +1,144 @@
+"""Fast parsing of the date strings the AmeriGas portal returns."""
+from __future__ import annotations
+
+import logging
+from collections import OrderedDict
+from collections.abc import Callable
+from datetime import datetime, tzinfo
+from typing import Any, Final
+
+from homeassistant.util import dt as dt_util
+
+_LOGGER = logging.getLogger(__name__)
+
+EMPTY_DATES: Final = frozenset({"", "N/A", "Unknown", "None"})
+
+# Parsed values remembered across polls. Each account contributes a handful
+# of dates that rarely change, so this covers many entries.
+DATE_CACHE_SIZE = 256
+
+
+def _parse_iso(value: str) -> datetime:
+    """ISO 8601, e.g. ``2026-10-18T11:45:00Z`` (TMReadDate, estDeliveryWindowTo)."""
+    return datetime.fromisoformat(value)
+
+
+def _parse_us_long(value: str) -> datetime:
+    """``MM/DD/YYYY`` (LastDeliveryDate, LastPaymentDate), without strptime."""
+    month, day, year = value.split("/")
+    if len(year) != 4:
+        raise ValueError(f"not MM/DD/YYYY: {value}")
+    return datetime(int(year), int(month), int(day))
+
+
+def _parse_us_short(value: str) -> datetime:
+    """``MM/DD/YY``, with strptime's century pivot (69-99 -> 19xx)."""
+    month, day, year = value.split("/")
+    if len(year) != 2:
+        raise ValueError(f"not MM/DD/YY: {value}")
+    short_year = int(year)
+    return datetime(short_year + (1900 if short_year >= 69 else 2000), int(month), int(day))
+
+
+def _date_format(value: str) -> str | None:
+    """Classify a portal date string: ``iso``, ``us_short``, ``us_long`` or None."""
+    if "T" in value:
+        return "iso"
+    if "/" in value:
+        parts = value.split("/")
+        if len(parts) == 3:
+            return "us_short" if len(parts[2]) == 2 else "us_long"
+        return None
+    return "iso"
+
+
+# Format name -> parser. Built once; _date_format() picks the entry.
+DATE_PARSERS: Final[dict[str, Callable[[str], datetime]]] = {
+    "iso": _parse_iso,
+    "us_short": _parse_us_short,
+    "us_long": _parse_us_long,
+}
+
+# Used when the fast path rejects a US date that strptime would still accept
+# (e.g. a three-digit year)
+_STRPTIME_FORMATS: Final = {"us_short": "%m/%d/%y", "us_long": "%m/%d/%Y"}
+
+
+class PortalDateParser:
+    """Parses portal dates into timezone-aware datetimes.
+
+    Remembers the format each portal field used last time and tries that
+    parser first, only classifying the string again when it fails. Parsed
+    values are memoized in a bounded LRU keyed on (string, timezone), since
+    the same dates come back on every poll until a delivery or payment.
+    """
+
+    def __init__(self, cache_size: int = DATE_CACHE_SIZE) -> None:
+        """Initialize empty caches."""
+        self._cache_size = cache_size
+        self._field_formats: dict[str, str] = {}
+        self._memo: OrderedDict[tuple[str, tzinfo], datetime | None] = OrderedDict()
+
+    def parse(self, date_str: Any, field: str | None = None, tz: tzinfo | None = None) -> datetime | None:
+        """Parse AmeriGas date in multiple formats, always returns timezone-aware datetime.
+
+        Naive datetimes (date-only strings like MM/DD/YYYY) are treated as local time
+        using the HA-configured timezone, so dates never roll back a day due to UTC offset.
+        Datetimes that already carry timezone info are left unchanged.
+
+        ``field`` names the portal field for the format hint; ``tz`` lets a
+        caller parsing several fields look the default timezone up once.
+        """
+        if not date_str or date_str in EMPTY_DATES:
+            return None
+
+        value = str(date_str)
+        try:
+            if tz is None:
+                tz = dt_util.get_default_time_zone()
+            key = (value, tz)
+            if key in self._memo:
+                self._memo.move_to_end(key)
+                return self._memo[key]
+
+            result = self._parse_uncached(value, field, tz)
+        except (ValueError, AttributeError, TypeError) as e:
+            _LOGGER.warning(f"Could not parse date '{date_str}': {e}")
+            return None
+
+        self._memo[key] = result
+        if len(self._memo) > self._cache_size:
+            self._memo.popitem(last=False)
+        return result
+
+    def _parse_uncached(self, value: str, field: str | None, tz: tzinfo) -> datetime | None:
+        """Parse via the field's last format, falling back to classification."""
+        dt_obj = None
+        if field is not None and (hint := self._field_formats.get(field)):
+            try:
+                dt_obj = DATE_PARSERS[hint](value)
+            except ValueError:
+                dt_obj = None
+
+        if dt_obj is None:
+            if (date_format := _date_format(value)) is None:
+                return None
+            try:
+                dt_obj = DATE_PARSERS[date_format](value)
+            except ValueError:
+                if date_format not in _STRPTIME_FORMATS:
+                    raise
+                dt_obj = datetime.strptime(value, _STRPTIME_FORMATS[date_format])
+            if field is not None:
+                self._field_formats[field] = date_format
+
+        if dt_obj.tzinfo is None:
+            # Treat as local time — date-only strings have no timezone context,
+            # so attaching UTC would cause them to roll back a day for US timezones.
+            dt_obj = dt_obj.replace(tzinfo=tz)
+        return dt_obj
+
+    def clear(self) -> None:
+        """Drop all memoized values and format hints."""
+        self._field_formats.clear()
+        self._memo.clear()
@@ -0,0 +1,159 @@
+"""Delivery detection state machine.
+
+Kept free of Home Assistant objects so recorded or synthetic snapshot
+sequences can be replayed through it directly (see tests/delivery_replay.py).
+"""
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, Final, NamedTuple
+
+from homeassistant.util import dt as dt_util
+
+from .snapshot import AccountSnapshot
+
+# Minimum gallon increase between coordinator polls to be treated as a delivery.
+# Sized to be well above normal noise (tank monitor accuracy ~1–2%) but safely
+# below any real delivery (smallest realistic fill ~10 gal).
+DELIVERY_LEVEL_JUMP_THRESHOLD: float = 10.0
+
+# No snapshot seen yet: the next one only sets the baseline
+PHASE_UNINITIALIZED: Final = "uninitialized"
+# Baseline known, no delivery in progress
+PHASE_IDLE: Final = "idle"
+# Level jump captured; waiting for the portal's last_delivery_date to move
+PHASE_AWAITING_DATE: Final = "awaiting_date"
+# last_delivery_date moved; waiting for last_delivery_gallons to catch up
+PHASE_AWAITING_GALLONS: Final = "awaiting_gallons"
+
+TRIGGER_LEVEL_JUMP: Final = "level_jump"
+TRIGGER_DATE_CHANGE: Final = "date_change"
+TRIGGER_DEFERRED_API: Final = "deferred_api"
+
+
+@dataclass(frozen=True, slots=True)
+class DeliveryState:
+    """Everything detection needs to carry from one snapshot to the next.
+
+    ``delivery_date`` and ``delivery_gallons`` are the portal's last
+    reported delivery, ``previous_gallons`` the last tank reading.
+    """
+
+    phase: str = PHASE_UNINITIALIZED
+    previous_gallons: float | None = None
+    delivery_date: datetime | None = None
+    delivery_gallons: float = 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a JSON-friendly representation (the Store payload)."""
+        result = asdict(self)
+        result["delivery_date"] = self.delivery_date.isoformat() if self.delivery_date else None
+        return result
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> DeliveryState:
+        """Build a state from ``as_dict()`` output."""
+        delivery_date = data.get("delivery_date")
+        return cls(
+            phase=data.get("phase", PHASE_UNINITIALIZED),
+            previous_gallons=data.get("previous_gallons"),
+            delivery_date=dt_util.parse_datetime(delivery_date) if delivery_date else None,
+            delivery_gallons=data.get("delivery_gallons", 0.0),
+        )
+
+
+class DeliveryDetection(NamedTuple):
+    """A delivery found by one of the triggers.
+
+    ``post_fill`` is the tank monitor reading after the fill, only known to
+    the level-jump trigger; the API triggers derive ``pre_fill`` from the
+    current level minus the delivered gallons.
+    """
+
+    trigger: str
+    pre_fill: float
+    post_fill: float | None
+
+
+class DeliveryStateMachine:
+    """Detects deliveries from consecutive snapshots.
+
+    Two independent triggers feed one set of phases:
+
+    1. **Level jump** (telemetry-first): the tank reading rose by at least
+       ``jump_threshold`` gallons since the previous snapshot. Detected at
+       once with pre/post fill from the monitor, then ``awaiting_date``
+       until the portal's delivery date confirms it.
+    2. **Date change** (API): the portal's last delivery date moved without
+       a level jump. Detected at once when the delivered gallons moved too,
+       otherwise ``awaiting_gallons`` until they do (portal lag).
+
+    ``state`` is replaced, never mutated, so callers can tell a transition
+    happened with an identity check.
+    """
+
+    def __init__(
+        self,
+        state: DeliveryState | None = None,
+        jump_threshold: float = DELIVERY_LEVEL_JUMP_THRESHOLD,
+    ) -> None:
+        """Initialize from a persisted state, or uninitialized."""
+        self.state = state if state is not None else DeliveryState()
+        self.jump_threshold = jump_threshold
+
+    def observe(self, snapshot: AccountSnapshot) -> DeliveryDetection | None:
+        """Advance on one snapshot and return the delivery it revealed, if any."""
+        state = self.state
+        current = snapshot.current_gallons
+        delivery_date = snapshot.last_delivery_date
+        delivery_gallons = snapshot.last_delivery_gallons
+        detection: DeliveryDetection | None = None
+        phase = state.phase
+
+        if phase == PHASE_UNINITIALIZED:
+            phase = PHASE_IDLE
+        else:
+            # The first delivery date an account reports is a baseline, not a change
+            date_changed = (
+                delivery_date is not None
+                and state.delivery_date is not None
+                and delivery_date != state.delivery_date
+            )
+            gallons_changed = delivery_gallons != state.delivery_gallons
+            if (
+                current is not None
+                and state.previous_gallons is not None
+                and current - state.previous_gallons >= self.jump_threshold
+            ):
+                detection = DeliveryDetection(TRIGGER_LEVEL_JUMP, state.previous_gallons, current)
+                # A date that already moved confirms the jump straight away
+                confirmed = date_changed or phase == PHASE_AWAITING_GALLONS
+                phase = PHASE_IDLE if confirmed else PHASE_AWAITING_DATE
+            elif date_changed:
+                if phase == PHASE_AWAITING_DATE:
+                    phase = PHASE_IDLE
+                elif gallons_changed:
+                    detection = self._api_detection(TRIGGER_DATE_CHANGE, current, delivery_gallons)
+                    phase = PHASE_IDLE
+                else:
+                    phase = PHASE_AWAITING_GALLONS
+            elif phase == PHASE_AWAITING_GALLONS and gallons_changed:
+                detection = self._api_detection(TRIGGER_DEFERRED_API, current, delivery_gallons)
+                phase = PHASE_IDLE
+
+        new_state = DeliveryState(
+            phase=phase,
+            # A snapshot without a level keeps the last reading as baseline
+            previous_gallons=current if current is not None else state.previous_gallons,
+            delivery_date=delivery_date or state.delivery_date,
+            delivery_gallons=delivery_gallons,
+        )
+        if new_state != state:
+            self.state = new_state
+        return detection
+
+    @staticmethod
+    def _api_detection(trigger: str, current: float | None, delivery_gallons: float) -> DeliveryDetection:
+        """Derive the pre-delivery level from the post-delivery API data."""
+        return DeliveryDetection(trigger, round(max(0.0, (current or 0.0) - delivery_gallons), 2), None)
@@ -0,0 +1,123 @@
+"""Timers at the boundaries of open orders' delivery windows."""
+from __future__ import annotations
+
+import logging
+from datetime import datetime
+from typing import Any
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_point_in_time
+from homeassistant.util import dt as dt_util
+
+from .const import EVENT_DELIVERY_WINDOW, WINDOW_END, WINDOW_START
+
+_LOGGER = logging.getLogger(__name__)
+
+Window = tuple[datetime, datetime]
+
+
+class DeliveryWindowScheduler:
+    """Fires EVENT_DELIVERY_WINDOW when a delivery window opens and closes.
+
+    Each open order's estimated window (``delivery_windows`` in the
+    snapshot) gets one-shot timers at its start and end, so automations are
+    told on time without polling a template against Next Delivery Date.
+    Windows are diffed on every new snapshot: timers of an unchanged window
+    stay armed, a window that moved or disappeared is cancelled, and a new
+    one is armed. Boundaries already in the past are skipped, so a restart
+    never replays them.
+    """
+
+    def __init__(self, hass: HomeAssistant, coordinator, entry_id: str) -> None:
+        """Initialize; call async_start() to follow the coordinator."""
+        self.hass = hass
+        self.coordinator = coordinator
+        self.entry_id = entry_id
+
+        # Window -> cancel callbacks of its pending timers
+        self._timers: dict[Window, list[CALLBACK_TYPE]] = {}
+        self._unsub: CALLBACK_TYPE | None = None
+
+    @property
+    def windows(self) -> list[Window]:
+        """Return the windows currently scheduled, by start."""
+        return sorted(self._timers)
+
+    @callback
+    def async_start(self) -> None:
+        """Arm the windows of the current snapshot, then follow new ones."""
+        self._unsub = self.coordinator.async_add_listener(self._handle_coordinator_update)
+        self._handle_coordinator_update()
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Stop listening and cancel every pending timer."""
+        if self._unsub:
+            self._unsub()
+            self._unsub = None
+        for window in list(self._timers):
+            self._cancel(window)
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Re-arm only the windows that changed."""
+        data = self.coordinator.data
+        # Keep the armed timers through a failed refresh
+        if not data:
+            return
+        windows = set(data.delivery_windows)
+        for window in self._timers.keys() - windows:
+            _LOGGER.debug("Delivery window %s - %s is gone, cancelling", *window)
+            self._cancel(window)
+        for window in sorted(windows - self._timers.keys()):
+            self._arm(window)
+
+    def _arm(self, window: Window) -> None:
+        """Schedule the start and end timers of a window that are still ahead."""
+        now = dt_util.utcnow()
+        timers = []
+        for boundary, when in zip((WINDOW_START, WINDOW_END), window):
+            if when > now:
+                timers.append(
+                    async_track_point_in_time(
+                        self.hass, self._boundary_action(window, boundary), when
+                    )
+                )
+        # Tracked even when both boundaries passed, so it is not re-checked
+        self._timers[window] = timers
+        _LOGGER.debug("Delivery window %s - %s armed with %s timers", *window, len(timers))
+
+    def _cancel(self, window: Window) -> None:
+        """Cancel the pending timers of a window."""
+        for cancel in self._timers.pop(window):
+            cancel()
+
+    def _boundary_action(self, window: Window, boundary: str):
+        """Return the timer action firing the event for one boundary."""
+
+        @callback
+        def fire(now: datetime) -> None:
+            timers = self._timers.get(window)
+            if timers:
+                # The fired timer is spent: drop it from the cancel list
+                timers.pop(0)
+            self.hass.bus.async_fire(
+                EVENT_DELIVERY_WINDOW,
+                {
+                    "entry_id": self.entry_id,
+                    "boundary": boundary,
+                    "window_start": window[0].isoformat(),
+                    "window_end": window[1].isoformat(),
+                },
+            )
+
+        return fire
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the scheduled windows for diagnostics."""
+        return {
+            "windows": [
+                {"start": start.isoformat(), "end": end.isoformat(), "pending_timers": len(timers)}
+                for (start, end), timers in sorted(self._timers.items())
+            ]
+        }
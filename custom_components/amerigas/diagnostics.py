@@ -0,0 +1,73 @@
+"""Diagnostics support for the AmeriGas integration."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+
+# Credentials, account identifiers and addresses, in both the raw portal
+# payload (PascalCase) and the parsed snapshot (snake_case)
+TO_REDACT: set[str] = {
+    CONF_USERNAME,
+    CONF_PASSWORD,
+    "ShipToAccount",
+    "Street",
+    "City",
+    "State",
+    "Zip",
+    "orderNumber",
+    "account_number",
+    "service_address",
+    "delivery_address",
+    "street",
+    "city",
+    "state",
+    "zip",
+}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry.
+
+    Everything comes from memory: the raw payloads are the API client's
+    bounded buffer of recent fetches, so no portal request is made.
+    """
+    data = hass.data[DOMAIN][entry.entry_id]
+    coordinator = data["coordinator"]
+    api = data["api"]
+
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "coordinator": {
+            "last_update_success": coordinator.last_update_success,
+            "last_exception": repr(coordinator.last_exception) if coordinator.last_exception else None,
+            "stale": coordinator.stale,
+            "auth_failed": coordinator.auth_failed,
+            "snapshot_fetched_at": coordinator.snapshot_fetched_at,
+            "stale_fields": sorted(coordinator.stale_fields),
+        },
+        "schema": api.schema.last_report.as_dict(),
+        "parsed": async_redact_data(coordinator.data.as_dict(), TO_REDACT) if coordinator.data else None,
+        "raw_payloads": [
+            {"fetched_at": fetched_at, "payload": async_redact_data(payload, TO_REDACT)}
+            for fetched_at, payload in api.recent_payloads
+        ],
+        "delivery_tracker": data["tracker"].as_dict(),
+        "lifetime": data["lifetime"].as_dict(),
+        "price_ledger": data["prices"].as_dict(),
+        "cost_statistics": data["cost"].as_dict(),
+        "delivery_windows": data["windows"].as_dict(),
+        "thresholds": data["thresholds"].as_dict(),
+        "refresh_metrics": {
+            "summary": coordinator.metrics.summary(),
+            "refreshes": [metrics.as_dict() for metrics in coordinator.metrics],
+        },
+        "last_profile": coordinator.last_profile,
+    }
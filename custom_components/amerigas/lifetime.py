@@ -0,0 +1,399 @@
+"""Durable lifetime consumption accumulator."""
+from __future__ import annotations
+
+import json
+import logging
+import os
+from collections.abc import Callable
+from contextlib import suppress
+from datetime import datetime
+from typing import Any
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.storage import STORAGE_DIR, Store
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, NOISE_THRESHOLD_GALLONS
+from .delivery_state import DELIVERY_LEVEL_JUMP_THRESHOLD
+
+_LOGGER = logging.getLogger(__name__)
+
+LIFETIME_STORAGE_VERSION = 1
+# Journal entries folded into a new checkpoint at once. Bounds the tail a
+# restart has to replay.
+LIFETIME_COMPACT_EVERY = 32
+# Weight of the newest small rise in ConsumptionFilter's noise estimate
+NOISE_FIT_WEIGHT = 0.2
+
+
+def _lifetime_store(hass: HomeAssistant, entry_id: str) -> Store[dict[str, Any]]:
+    """Return the Store holding an entry's lifetime checkpoint."""
+    return Store(hass, LIFETIME_STORAGE_VERSION, f"{DOMAIN}.{entry_id}.lifetime")
+
+
+def _journal_path(hass: HomeAssistant, entry_id: str) -> str:
+    """Return the path of an entry's lifetime journal, beside its checkpoint."""
+    return hass.config.path(STORAGE_DIR, f"{DOMAIN}.{entry_id}.lifetime.journal")
+
+
+def _append_lines(path: str, lines: list[str]) -> None:
+    """Append journal lines and fsync them (runs in the executor)."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a", encoding="utf-8") as journal:
+        journal.write("".join(lines))
+        journal.flush()
+        os.fsync(journal.fileno())
+
+
+def _read_lines(path: str) -> list[str]:
+    """Return the journal's lines, or none if it does not exist (executor)."""
+    try:
+        with open(path, encoding="utf-8") as journal:
+            return journal.readlines()
+    except FileNotFoundError:
+        return []
+
+
+def _truncate(path: str) -> None:
+    """Empty the journal after a checkpoint (executor)."""
+    with suppress(FileNotFoundError):
+        os.truncate(path, 0)
+
+
+def _remove(path: str) -> None:
+    """Delete the journal (executor)."""
+    with suppress(FileNotFoundError):
+        os.remove(path)
+
+
+async def async_remove_lifetime(hass: HomeAssistant, entry_id: str) -> None:
+    """Delete the persisted lifetime checkpoint and journal for an entry."""
+    await _lifetime_store(hass, entry_id).async_remove()
+    await hass.async_add_executor_job(_remove, _journal_path(hass, entry_id))
+
+
+def _reading_to_json(reading: datetime | float | None) -> str | float | None:
+    """Serialize a reading key for the journal and checkpoint."""
+    return reading.isoformat() if isinstance(reading, datetime) else reading
+
+
+def _reading_from_json(reading: str | float | None) -> datetime | float | None:
+    """Restore a reading key written by _reading_to_json()."""
+    return dt_util.parse_datetime(reading) if isinstance(reading, str) else reading
+
+
+class ConsumptionFilter:
+    """Hysteresis band fitted to one tank's reading noise.
+
+    Propane only rises on a delivery, so any smaller rise is noise. The band
+    is the largest of ``min_band`` (NOISE_THRESHOLD_GALLONS unless tuned in
+    the options), the tank's reading resolution
+    (the smallest change seen between two readings: 1% of the tank for a
+    monitor reporting whole percents) and twice the running mean of the
+    small rises seen.
+
+    A drop of at least the band from the baseline is consumption; a rise of
+    at least ``jump_threshold`` (the DeliveryTracker's delivery threshold)
+    and of more than one reading step is a refill. Unlike the band, this does
+    not grow with noise, so a delivery the tracker sees is never taken for
+    flicker. Anything in between leaves the baseline where it was, so a
+    reading that flickers between two values is counted once instead of on
+    every dip.
+    """
+
+    def __init__(
+        self,
+        resolution: float = 0.0,
+        noise: float = 0.0,
+        min_band: float = NOISE_THRESHOLD_GALLONS,
+        jump_threshold: float = DELIVERY_LEVEL_JUMP_THRESHOLD,
+    ) -> None:
+        """Initialize, optionally from a previous fit."""
+        self.resolution = resolution
+        self.noise = noise
+        self.min_band = min_band
+        self.jump_threshold = jump_threshold
+        self._last: float | None = None
+
+    @property
+    def band(self) -> float:
+        """Return the smallest drop counted as consumption."""
+        return max(self.min_band, self.resolution, 2 * self.noise)
+
+    def update(self, baseline: float, gallons: float) -> float | None:
+        """Fold in a new reading against the baseline.
+
+        Returns the gallons consumed, 0.0 when the reading should become the
+        new baseline without counting anything (a refill), or None when the
+        baseline stays.
+        """
+        if self._last is not None and (step := round(abs(gallons - self._last), 2)):
+            self.resolution = min(self.resolution, step) if self.resolution else step
+        self._last = gallons
+
+        change = gallons - baseline
+        if change >= self.jump_threshold and change > self.resolution:
+            return 0.0
+        if change > 0:
+            self.noise += NOISE_FIT_WEIGHT * (change - self.noise)
+            return None
+        if -change >= self.band:
+            return -change
+        return None
+
+
+class LifetimeAccumulator:
+    """Lifetime propane consumption for one account.
+
+    Owns the running total behind the Lifetime Gallons sensor, independent of
+    the entity and its restore timing. Every change to the total or to the
+    baseline reading is appended to a journal (one JSON line, fsynced) before
+    the next one is written, so each accepted delta is durable on its own.
+    Every LIFETIME_COMPACT_EVERY entries the state is saved as a checkpoint
+    in a Store and the journal is emptied. Loading reads the checkpoint and
+    replays at most that many journal entries after it.
+
+    Entries carry a sequence number and the checkpoint records the last one
+    it includes, so a crash between saving a checkpoint and emptying the
+    journal cannot count a delta twice. A torn last line (crash mid-write) is
+    skipped.
+
+    Only a new tank monitor reading (``last_tank_reading``, the portal's
+    ``TMReadDate``) is ingested; repeated polls of the same reading return
+    at once. Accounts without a monitor timestamp are keyed on the level
+    itself. Readings go through the tank's ConsumptionFilter.
+
+    ``total_triggers`` and ``ignored_triggers`` (readings the filter held
+    back) are diagnostic counters and, like the filter's fit, only persisted
+    with checkpoints.
+
+    Consumption listeners are called with the time and gallons of each live
+    delta, after it is applied; replayed entries are not reported again.
+    """
+
+    def __init__(self, hass: HomeAssistant, coordinator, entry_id: str) -> None:
+        """Initialize an empty accumulator; call async_load() before use."""
+        self.hass = hass
+        self.coordinator = coordinator
+        self.entry_id = entry_id
+
+        self.total_gallons: float = 0.0
+        self.previous_gallons: float | None = None
+        self.last_consumption_event: datetime | None = None
+        self.total_triggers: int = 0
+        self.ignored_triggers: int = 0
+        self.largest_consumption: float = 0.0
+        self.filter = ConsumptionFilter()
+        # True once a checkpoint or journal was found (or a total imported)
+        self.restored: bool = False
+
+        self._store = _lifetime_store(hass, entry_id)
+        self._journal = _journal_path(hass, entry_id)
+        self._seq = 0
+        self._checkpoint_seq = 0
+        self._pending: list[str] = []
+        self._flushing = False
+        self._checkpoint_requested = False
+        self._last_reading: datetime | float | None = None
+        self._consumption_listeners: list[Callable[[datetime, float], None]] = []
+        self._unsub: CALLBACK_TYPE | None = None
+
+    async def async_load(self) -> None:
+        """Restore the checkpoint and replay the journal, then start listening."""
+        try:
+            if stored := await self._store.async_load():
+                self._restore_checkpoint(stored)
+                self.restored = True
+            lines = await self.hass.async_add_executor_job(_read_lines, self._journal)
+        except Exception as err:  # Corrupt files must never block setup
+            _LOGGER.warning("Could not load AmeriGas lifetime consumption: %s", err)
+            lines = []
+
+        replayed = 0
+        for line in lines:
+            try:
+                entry = json.loads(line)
+                if entry["seq"] <= self._seq:
+                    continue
+                self._apply(entry)
+            except (ValueError, TypeError, KeyError):
+                _LOGGER.debug("Skipping torn lifetime journal line: %r", line)
+                continue
+            replayed += 1
+        self.restored = self.restored or replayed > 0
+        _LOGGER.debug(
+            "Restored lifetime total %.2f gal (checkpoint seq %s, %s journal entries replayed)",
+            self.total_gallons,
+            self._checkpoint_seq,
+            replayed,
+        )
+
+        self._unsub = self.coordinator.async_add_listener(self._handle_coordinator_update)
+
+    async def async_import(self, total_gallons: float, previous_gallons: float | None) -> None:
+        """Adopt a total kept by the sensor before this accumulator existed.
+
+        Only applies when nothing was restored, i.e. the first start after
+        upgrading; any consumption counted since is kept on top.
+        """
+        if self.restored:
+            return
+        self.restored = True
+        self.total_gallons += total_gallons
+        if self.previous_gallons is None:
+            self.previous_gallons = previous_gallons
+        _LOGGER.info("Imported lifetime total of %.2f gal from the sensor state", total_gallons)
+        self._checkpoint_requested = True
+        await self._async_flush()
+
+    @callback
+    def async_add_consumption_listener(
+        self, consumption_listener: Callable[[datetime, float], None]
+    ) -> CALLBACK_TYPE:
+        """Call ``consumption_listener(at, gallons)`` for each consumption counted."""
+        self._consumption_listeners.append(consumption_listener)
+
+        @callback
+        def remove_consumption_listener() -> None:
+            self._consumption_listeners.remove(consumption_listener)
+
+        return remove_consumption_listener
+
+    def set_thresholds(self, min_band: float, jump_threshold: float) -> None:
+        """Apply tuned noise and delivery thresholds to the filter, keeping its fit."""
+        self.filter.min_band = min_band
+        self.filter.jump_threshold = jump_threshold
+
+    async def async_shutdown(self) -> None:
+        """Stop listening and write out any queued journal entries."""
+        if self._unsub:
+            self._unsub()
+            self._unsub = None
+        await self._async_flush()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Fold a new tank reading into the total."""
+        data = self.coordinator.data
+        # Keep the existing total while the portal reports no level
+        if not data or (current_gallons := data.current_gallons) is None:
+            return
+        reading = data.last_tank_reading or current_gallons
+        if reading == self._last_reading:
+            return
+        self._last_reading = reading
+
+        if self.previous_gallons is None:
+            self._record(current_gallons, 0.0)
+            return
+
+        self.total_triggers += 1
+        consumed = self.filter.update(self.previous_gallons, current_gallons)
+        if consumed is None:
+            self.ignored_triggers += 1
+        elif consumed:
+            self._record(current_gallons, consumed)
+            _LOGGER.info(
+                "Lifetime consumption: +%.2f gal, total now %.2f gal", consumed, self.total_gallons
+            )
+            for consumption_listener in list(self._consumption_listeners):
+                consumption_listener(self.last_consumption_event, consumed)
+        else:
+            _LOGGER.info("Delivery detected: +%.2f gal", current_gallons - self.previous_gallons)
+            self._record(current_gallons, 0.0)
+
+    def _record(self, gallons: float, delta: float) -> None:
+        """Apply a change and queue it for the journal."""
+        self._seq += 1
+        entry = {
+            "seq": self._seq,
+            "gallons": gallons,
+            "delta": delta,
+            "at": dt_util.now().isoformat() if delta else None,
+            "reading": _reading_to_json(self._last_reading),
+        }
+        self._apply(entry)
+        self._pending.append(json.dumps(entry) + "\n")
+        if not self._flushing:
+            # A tracked task: Home Assistant waits for it when stopping
+            self.hass.async_create_task(
+                self._async_flush(), f"{DOMAIN} lifetime journal {self.entry_id}"
+            )
+
+    def _apply(self, entry: dict[str, Any]) -> None:
+        """Apply one journal entry (live or replayed)."""
+        self._seq = entry["seq"]
+        self.previous_gallons = entry["gallons"]
+        self._last_reading = _reading_from_json(entry.get("reading"))
+        if delta := entry["delta"]:
+            self.total_gallons += delta
+            self.largest_consumption = max(self.largest_consumption, delta)
+            self.last_consumption_event = dt_util.parse_datetime(entry["at"])
+
+    async def _async_flush(self) -> None:
+        """Write queued entries in order, checkpointing when the journal is full.
+
+        The only writer of both files: a flush already running picks up
+        whatever is queued or requested while it awaits.
+        """
+        if self._flushing:
+            return
+        self._flushing = True
+        try:
+            while self._pending or self._checkpoint_requested:
+                if self._pending:
+                    lines, self._pending = self._pending, []
+                    await self.hass.async_add_executor_job(_append_lines, self._journal, lines)
+                if (
+                    self._checkpoint_requested
+                    or self._seq - self._checkpoint_seq >= LIFETIME_COMPACT_EVERY
+                ):
+                    self._checkpoint_requested = False
+                    await self._async_checkpoint()
+        except OSError as err:
+            _LOGGER.error("Could not write AmeriGas lifetime journal: %s", err)
+        finally:
+            self._flushing = False
+
+    async def _async_checkpoint(self) -> None:
+        """Save the state as a checkpoint and empty the journal."""
+        seq = self._seq
+        await self._store.async_save(self.as_dict())
+        self._checkpoint_seq = seq
+        # Entries recorded meanwhile are still queued, not in the journal yet
+        await self.hass.async_add_executor_job(_truncate, self._journal)
+
+    def _restore_checkpoint(self, stored: dict[str, Any]) -> None:
+        """Restore the state saved by _async_checkpoint()."""
+        self._seq = self._checkpoint_seq = stored["seq"]
+        self.total_gallons = stored["total_gallons"]
+        self.previous_gallons = stored.get("previous_gallons")
+        last_event = stored.get("last_consumption_event")
+        self.last_consumption_event = dt_util.parse_datetime(last_event) if last_event else None
+        self.total_triggers = stored.get("total_triggers", 0)
+        self.ignored_triggers = stored.get("ignored_triggers", 0)
+        self.largest_consumption = stored.get("largest_consumption", 0.0)
+        self._last_reading = _reading_from_json(stored.get("last_reading"))
+        self.filter = ConsumptionFilter(
+            stored.get("resolution_gallons", 0.0),
+            stored.get("noise_gallons", 0.0),
+            self.filter.min_band,
+            self.filter.jump_threshold,
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the state as stored in a checkpoint (also used by diagnostics)."""
+        return {
+            "seq": self._seq,
+            "total_gallons": self.total_gallons,
+            "previous_gallons": self.previous_gallons,
+            "last_consumption_event": (
+                self.last_consumption_event.isoformat() if self.last_consumption_event else None
+            ),
+            "total_triggers": self.total_triggers,
+            "ignored_triggers": self.ignored_triggers,
+            "largest_consumption": self.largest_consumption,
+            "last_reading": _reading_to_json(self._last_reading),
+            "resolution_gallons": self.filter.resolution,
+            "noise_gallons": self.filter.noise,
+        }
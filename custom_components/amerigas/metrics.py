@@ -0,0 +1,100 @@
+"""Per-refresh instrumentation of the portal fetch pipeline."""
+from __future__ import annotations
+
+import math
+from collections import deque
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any
+
+# Refreshes kept for rolling percentiles. At the default four cron refreshes
+# a day this covers roughly the last week.
+METRICS_HISTORY = 28
+
+# RefreshMetrics fields summarised as rolling percentiles
+TIMING_FIELDS: tuple[str, ...] = (
+    "login_seconds",
+    "dashboard_seconds",
+    "parse_seconds",
+    "total_seconds",
+    "payload_bytes",
+)
+
+
+@dataclass(slots=True)
+class RefreshMetrics:
+    """Timings and outcome of one ``AmeriGasAPI.async_get_data()`` call.
+
+    Timings are wall-clock seconds. ``logins`` counts login requests; a
+    fetch makes one, so anything else points at the fetch path.
+    ``address_strategy`` is the HTML source the delivery address came from:
+    ``span``, ``labels`` or ``none``.
+    """
+
+    started_at: datetime
+    login_seconds: float = 0.0
+    dashboard_seconds: float = 0.0
+    parse_seconds: float | None = None
+    total_seconds: float | None = None
+    payload_bytes: int | None = None
+    logins: int = 0
+    address_strategy: str | None = None
+    success: bool = False
+    error: str | None = None
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a JSON-friendly representation."""
+        result = asdict(self)
+        result["started_at"] = self.started_at.isoformat()
+        return result
+
+
+class RefreshMetricsHistory:
+    """Bounded history of RefreshMetrics with rolling percentiles."""
+
+    def __init__(self, maxlen: int = METRICS_HISTORY) -> None:
+        """Initialize an empty history."""
+        self._history: deque[RefreshMetrics] = deque(maxlen=maxlen)
+
+    def __len__(self) -> int:
+        """Return the number of refreshes held."""
+        return len(self._history)
+
+    def __iter__(self):
+        """Iterate oldest first."""
+        return iter(self._history)
+
+    @property
+    def last(self) -> RefreshMetrics | None:
+        """Return the most recent refresh, if any."""
+        return self._history[-1] if self._history else None
+
+    def append(self, metrics: RefreshMetrics) -> None:
+        """Record a refresh, evicting the oldest beyond ``maxlen``."""
+        self._history.append(metrics)
+
+    def percentile(self, field: str, q: float) -> float | None:
+        """Return the nearest-rank ``q`` percentile (0-100) of ``field``.
+
+        Refreshes where the field was never measured (e.g. parse time of a
+        failed fetch) are skipped.
+        """
+        values = sorted(
+            value for metrics in self._history if (value := getattr(metrics, field)) is not None
+        )
+        if not values:
+            return None
+        rank = max(1, math.ceil(q / 100 * len(values)))
+        return values[rank - 1]
+
+    def summary(self) -> dict[str, Any]:
+        """Return p50/p95 of every timing field plus outcome counts."""
+        summary: dict[str, Any] = {
+            "refreshes": len(self._history),
+            "failures": sum(not metrics.success for metrics in self._history),
+            "logins": sum(metrics.logins for metrics in self._history),
+        }
+        for field in TIMING_FIELDS:
+            summary[f"{field}_p50"] = self.percentile(field, 50)
+            summary[f"{field}_p95"] = self.percentile(field, 95)
+        return summary
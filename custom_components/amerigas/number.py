@@ -1,12 +1,20 @@
 """Number platform for AmeriGas integration."""
 from __future__ import annotations
 
+import logging
+from typing import Any
+
+from homeassistant.components.number import NumberEntity, NumberMode
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import UnitOfVolume
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.restore_state import RestoreEntity
 
 from .const import DOMAIN
-from .delivery_tracker import PreDeliveryLevelNumber
+
+_LOGGER = logging.getLogger(__name__)
 
 
 async def async_setup_entry(
@@ -21,3 +29,133 @@ async def async_setup_entry(
     async_add_entities([
         PreDeliveryLevelNumber(coordinator, entry),
     ])
+
+
+class PreDeliveryLevelNumber(NumberEntity, RestoreEntity):
+    """Number entity storing the auto-captured pre-delivery tank level.
+
+    Automatically updated by DeliveryTracker on each delivery.
+    Manually adjustable via the amerigas.set_pre_delivery_level service.
+
+    Also persists post_fill_gallons (from the level-jump trigger) as an
+    attribute so sensors can use the tank-monitor-derived post-fill baseline
+    across restarts.
+    """
+
+    _attr_has_entity_name = True  # Creates name based on device (e.g., "AmeriGas Propane Pre-Delivery Tank Level")
+    _attr_name = "Pre-Delivery Tank Level"
+    _attr_icon = "mdi:gauge-empty"
+    _attr_native_unit_of_measurement = UnitOfVolume.GALLONS
+    _attr_mode = NumberMode.BOX
+    _attr_native_step = 0.1
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(self, coordinator, entry):
+        """Initialize the number entity."""
+        self.coordinator = coordinator
+        self._entry_id = entry.entry_id
+        self._attr_unique_id = f"{entry.entry_id}_pre_delivery_level"  # Stable unique_id for entity registry lookups
+        self._attr_device_info = {
+            "identifiers": {(DOMAIN, entry.entry_id)},
+            "name": "AmeriGas Propane",
+            "manufacturer": "AmeriGas",
+            "model": "AmeriGas Account",
+        }
+
+        # Set min/max based on tank size when available
+        self._attr_native_min_value = 0.0
+        self._attr_native_max_value = 1000.0
+
+        # Start at 0 (will be auto-populated on first delivery)
+        self._attr_native_value = 0.0
+
+    async def async_added_to_hass(self) -> None:
+        """Restore last state when entity is added."""
+        await super().async_added_to_hass()
+
+        # Restore previous value
+        restored = False
+        if (last_state := await self.async_get_last_state()) is not None:
+            if last_state.state not in (None, "unknown", "unavailable"):
+                try:
+                    self._attr_native_value = float(last_state.state)
+                    restored = True
+                    _LOGGER.info(f"Restored pre-delivery level: {self._attr_native_value} gal")
+                except (ValueError, TypeError):
+                    self._attr_native_value = 0.0
+
+            # Restore post_fill_gallons from persisted attributes
+            if last_state.attributes and "post_fill_gallons" in last_state.attributes:
+                try:
+                    post_fill = float(last_state.attributes["post_fill_gallons"])
+                    if post_fill > 0:
+                        self.hass.data[DOMAIN]["post_fill_gallons"] = post_fill
+                        _LOGGER.info(f"Restored post-fill gallons: {post_fill} gal")
+                except (ValueError, TypeError):
+                    pass
+
+        self._update_tank_limits()
+
+        if restored:
+            self.async_write_ha_state()
+            _LOGGER.debug("Pre-delivery level state published after restoration")
+
+        self.async_on_remove(
+            self.coordinator.async_add_listener(self._handle_coordinator_update)
+        )
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+        self._update_tank_limits()
+        self.async_write_ha_state()
+
+    def _update_tank_limits(self) -> None:
+        """Update min/max based on current tank size."""
+        if self.coordinator.data and (tank_size := self.coordinator.data.tank_size):
+            self._attr_native_max_value = float(tank_size)
+
+    @property
+    def native_value(self) -> float:
+        """Return the current value."""
+        return self._attr_native_value
+
+    async def async_set_native_value(self, value: float) -> None:
+        """Set new value."""
+        self._attr_native_value = value
+        # Manual set clears post_fill — sensor.py will fall back to
+        # pre_delivery + last_delivery_gallons (best available without monitor)
+        self.hass.data[DOMAIN]["post_fill_gallons"] = 0.0
+        self.async_write_ha_state()
+        _LOGGER.info(f"Pre-delivery level manually set to: {value} gal")
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return extra attributes."""
+        if not self.coordinator.data:
+            return {}
+
+        tank_size = self.coordinator.data.effective_tank_size
+        last_delivery = self.coordinator.data.last_delivery_gallons
+        last_delivery_date = self.coordinator.data.last_delivery_date
+        post_fill = self.hass.data.get(DOMAIN, {}).get("post_fill_gallons", 0.0)
+
+        attrs = {
+            "tank_size": tank_size,
+            "last_delivery_date": last_delivery_date,
+            "last_delivery_gallons": last_delivery,
+            "auto_capture_enabled": True,
+            "post_fill_gallons": post_fill,  # Persisted for restore across restarts
+        }
+
+        if post_fill > 0:
+            attrs["delivered_gallons_monitor"] = round(post_fill - self._attr_native_value, 2)
+            attrs["capture_method"] = "tank_monitor"
+        elif self._attr_native_value > 0 and last_delivery > 0:
+            attrs["capture_method"] = "api_fallback"
+            # Show calculated starting level for transparency
+            attrs["calculated_starting_level"] = round(
+                min(self._attr_native_value + last_delivery, tank_size), 2
+            )
+
+        return attrs
\ No newline at end of file
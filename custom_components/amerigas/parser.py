@@ -0,0 +1,250 @@
+"""Parsing of the AmeriGas dashboard page into the coordinator snapshot."""
+from __future__ import annotations
+
+import json
+import logging
+import re
+from datetime import datetime, tzinfo
+from typing import Any, Final
+
+from homeassistant.util import dt as dt_util
+
+from .date_parser import PortalDateParser
+from .snapshot import AccountSnapshot
+
+_LOGGER = logging.getLogger(__name__)
+
+# accountSummaryViewModel JSON embedded in the dashboard's JavaScript
+ACCOUNT_MODEL_RE: Final = re.compile(r"accountSummaryViewModel\s*=\s*({.*?});", re.DOTALL)
+PAYMENT_TERMS_DAYS_RE: Final = re.compile(r"\d+")
+# "Delivery Address:" <span> — single element with the full formatted address
+_DELIVERY_SPAN = r"delivery address:</div>\s*<div[^>]*>\s*<span>([^<]+)</span>"
+# aria-label="Street/City/State/Zipcode" <label> cluster
+_ADDRESS_LABELS = tuple(
+    rf'aria-label="{label}"[^>]*>\s*([^<]+)<' for label in ("street", "city", "state", "zipcode")
+)
+
+# The address patterns are matched case-insensitively. IGNORECASE patterns
+# cannot use the regex engine's literal prefix scan and take milliseconds on
+# a padded dashboard, so they run case-sensitively against a lowercased copy
+# of the page instead; the captured text is sliced from the original page.
+# The IGNORECASE forms are the fallback when lowercasing changes the page
+# length, since match offsets would no longer line up.
+DELIVERY_SPAN_RE: Final = re.compile(_DELIVERY_SPAN)
+ADDRESS_LABEL_RES: Final = tuple(re.compile(label) for label in _ADDRESS_LABELS)
+DELIVERY_SPAN_RE_IGNORECASE: Final = re.compile(_DELIVERY_SPAN, re.IGNORECASE)
+ADDRESS_LABEL_RES_IGNORECASE: Final = tuple(
+    re.compile(label, re.IGNORECASE) for label in _ADDRESS_LABELS
+)
+
+
+class AmeriGasParser:
+    """Parser for dashboard pages.
+
+    One module-level instance (``PARSER``) is shared by every API client;
+    all patterns are built at import time instead of on each refresh. The
+    only state is the date parser's caches, which hold no account data
+    beyond date strings and are safe to share.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the shared date parser."""
+        self.dates = PortalDateParser()
+
+    @staticmethod
+    def extract_account_data(dashboard_text: str) -> dict[str, Any] | None:
+        """Return the accountSummaryViewModel JSON, or None when the page has none."""
+        if match := ACCOUNT_MODEL_RE.search(dashboard_text):
+            return json.loads(match.group(1))
+        return None
+
+    @staticmethod
+    def safe_float(value: Any, default: float = 0.0) -> float:
+        """Parse a float, tolerating ``$`` and thousands separators."""
+        if value is None or value == "":
+            return default
+        if isinstance(value, str):
+            value = value.replace("$", "").replace(",", "").strip()
+        try:
+            return float(value)
+        except (ValueError, TypeError):
+            return default
+
+    @staticmethod
+    def optional_int(value: Any) -> int | None:
+        """Parse an int, or None when the portal left the field empty or invalid."""
+        if value is None or value == "":
+            return None
+        try:
+            return int(value)
+        except (ValueError, TypeError):
+            return None
+
+    def parse_date(
+        self, date_str: Any, field: str | None = None, tz: tzinfo | None = None
+    ) -> datetime | None:
+        """Parse a portal date into a timezone-aware datetime (see PortalDateParser)."""
+        return self.dates.parse(date_str, field, tz)
+
+    @staticmethod
+    def find_delivery_address(dashboard_html: str | None) -> tuple[str | None, str]:
+        """Return (delivery address, strategy) from the dashboard HTML.
+
+        Customers may have a separate delivery address that only appears in
+        page markup, not in accountSummaryViewModel. Two locations are checked
+        in priority order; strategy is ``span``, ``labels`` or ``none``.
+        """
+        if not dashboard_html:
+            return None, "none"
+
+        lowered = dashboard_html.lower()
+        if len(lowered) == len(dashboard_html):
+            haystack, span_re, label_res = lowered, DELIVERY_SPAN_RE, ADDRESS_LABEL_RES
+        else:
+            haystack, span_re, label_res = (
+                dashboard_html, DELIVERY_SPAN_RE_IGNORECASE, ADDRESS_LABEL_RES_IGNORECASE
+            )
+
+        def captured(match: re.Match[str]) -> str:
+            return dashboard_html[match.start(1):match.end(1)].strip()
+
+        # Strategy 1: "Delivery Address:" span — most reliable for will-call accounts
+        if delivery_span := span_re.search(haystack):
+            if delivery_address := captured(delivery_span):
+                _LOGGER.debug("Delivery address sourced from Delivery Address span: %s", delivery_address)
+                return delivery_address, "span"
+
+        # Strategy 2: aria-label label cluster (Street / City / State / Zipcode)
+        matches = [pattern.search(haystack) for pattern in label_res]
+        if all(matches):
+            h_street, h_city, h_state, h_zip = (captured(match) for match in matches)
+            h_city = h_city.rstrip(",").strip()
+            if all([h_street, h_city, h_state, h_zip]):
+                delivery_address = f"{h_street}, {h_city}, {h_state} {h_zip}"
+                _LOGGER.debug("Delivery address sourced from aria-label labels: %s", delivery_address)
+                return delivery_address, "labels"
+
+        return None, "none"
+
+    def parse_account_data(
+        self, account_data: dict[str, Any], dashboard_html: str | None = None
+    ) -> tuple[AccountSnapshot, str]:
+        """Parse raw account data into clean format.
+
+        Returns the snapshot and the delivery address strategy that matched.
+        """
+        safe_float = self.safe_float
+        optional_int = self.optional_int
+        parse_date = self.dates.parse
+        tz = dt_util.get_default_time_zone()
+
+        # Extract delivery data
+        my_orders = account_data.get('myOrdersViewModel', {})
+        one_click = my_orders.get('OneClickOrderViewModel', {}) if my_orders else {}
+
+        last_delivery_date_raw = one_click.get('LastDeliveryDate', '') if one_click else ''
+        last_delivery_gallons = safe_float(one_click.get('LastDeliveredGallons'), 0.0) if one_click else 0.0
+
+        # Parse dates
+        last_tank_reading = parse_date(account_data.get('TMReadDate', ''), 'TMReadDate', tz)
+        last_delivery_date = parse_date(last_delivery_date_raw, 'LastDeliveryDate', tz)
+
+        # v3.0.12: Parse payment date as a timezone-aware datetime for correlation logic.
+        # The raw string is no longer exposed — the parsed datetime is the only form used,
+        # consistent with all other date fields. Previously returned raw string which meant
+        # AmeriGasLastPaymentDateSensor could not use SensorDeviceClass.TIMESTAMP correctly.
+        last_payment_date = parse_date(account_data.get('LastPaymentDate', ''), 'LastPaymentDate', tz)
+
+        # Next delivery date - check open orders first, then fall back
+        next_delivery_date_raw = None
+        next_delivery_field = None
+        delivery_windows = []
+        if my_orders:
+            open_orders = my_orders.get('LstOpenOrders', [])
+            if open_orders and len(open_orders) > 0:
+                # Every order with a complete, ordered estimated window
+                for order in open_orders:
+                    window_start = parse_date(order.get('estDeliveryWindowFrom'), 'estDeliveryWindowFrom', tz)
+                    window_end = parse_date(order.get('estDeliveryWindowTo'), 'estDeliveryWindowTo', tz)
+                    if window_start and window_end and window_start <= window_end:
+                        delivery_windows.append((window_start, window_end))
+
+                # 1. Primary: firm end of delivery window
+                # 2. Start of delivery window
+                # 3. General order date if window not set
+                for next_delivery_field in ('estDeliveryWindowTo', 'estDeliveryWindowFrom', 'orderDate'):
+                    if next_delivery_date_raw := open_orders[0].get(next_delivery_field):
+                        break
+
+        # 4. OneClick fallback
+        if not next_delivery_date_raw and one_click:
+            next_delivery_field = 'OneClick.NextDeliveryDate'
+            next_delivery_date_raw = one_click.get('NextDeliveryDate')
+
+        # 5. Account level final fallback
+        if not next_delivery_date_raw and account_data:
+            next_delivery_field = 'NextDeliveryDate'
+            next_delivery_date_raw = account_data.get('NextDeliveryDate', '')
+
+        next_delivery_date = parse_date(next_delivery_date_raw, next_delivery_field, tz)
+
+        # v3.0.12: Parse payment terms days from human-readable string e.g. "Due within 1 day".
+        # Used by the payment correlation window in _calculate_cost_per_gallon() to determine
+        # whether last_payment_date is plausibly for a propane delivery vs an unrelated charge
+        # such as an annual tank rental fee. Falls back to 30 days if missing or unparseable.
+        payment_terms_str = account_data.get('PaymentTermsUpDate', '')
+        terms_match = PAYMENT_TERMS_DAYS_RE.search(str(payment_terms_str))
+        payment_terms_days = int(terms_match.group()) if terms_match else 30
+
+        # Build service address from accountSummaryViewModel JSON (Street/City/State/Zip)
+        street = account_data.get('Street', '')
+        city = account_data.get('City', '')
+        state_code = account_data.get('State', '')
+        zip_code = account_data.get('Zip', '')
+        service_address = f"{street}, {city}, {state_code} {zip_code}" if all([street, city, state_code, zip_code]) else None
+
+        delivery_address, address_strategy = self.find_delivery_address(dashboard_html)
+
+        return AccountSnapshot(
+            # Tank Info (the portal reports a tank size of 0 when none is on file)
+            tank_level=optional_int(account_data.get('ForecastTankLevel')),
+            tank_size=optional_int(account_data.get('TankSize')) or None,
+            days_remaining=optional_int(account_data.get('RunOutDays')),
+
+            # Financial
+            amount_due=safe_float(account_data.get('AmounDue'), 0.0),
+            account_balance=safe_float(account_data.get('AccountBalance'), 0.0),
+            last_payment_date=last_payment_date,
+            last_payment_amount=safe_float(account_data.get('LastPaymentAmount'), 0.0),
+            payment_terms=payment_terms_str,
+            payment_terms_days=payment_terms_days,
+
+            # Tank Monitor
+            last_tank_reading=last_tank_reading,
+            tank_monitor='Yes' if account_data.get('TankMonitor') == '1' else 'No',
+
+            # Delivery
+            last_delivery_date=last_delivery_date,
+            last_delivery_gallons=last_delivery_gallons,
+            next_delivery_date=next_delivery_date,
+            delivery_windows=tuple(sorted(delivery_windows)),
+
+            # Account Settings
+            auto_pay=account_data.get('AutoPayment', 'Unknown'),
+            paperless=account_data.get('Paperless', 'Unknown'),
+            account_number=account_data.get('ShipToAccount', 'Unknown'),
+
+            # Address
+            service_address=service_address,
+            delivery_address=delivery_address,
+            street=street,
+            city=city,
+            state=state_code,
+            zip=zip_code,
+
+            # Metadata
+            delivery_type=account_data.get('ForecastLongName', 'Unknown'),
+        ), address_strategy
+
+
+PARSER: Final = AmeriGasParser()
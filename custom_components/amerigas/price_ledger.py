@@ -0,0 +1,223 @@
+"""Per-delivery price history."""
+from __future__ import annotations
+
+import logging
+from bisect import bisect_left, bisect_right
+from collections.abc import Callable
+from datetime import datetime, timedelta
+from typing import Any, Final
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+from .snapshot import AccountSnapshot
+
+_LOGGER = logging.getLogger(__name__)
+
+PRICE_STORAGE_VERSION = 1
+PRICE_SAVE_DELAY = 10  # seconds
+
+# Window of the rolling average price and delivered cost shown by sensors
+PRICE_ROLLING_WINDOW = timedelta(days=365)
+
+# Which portal amount a delivery's price was derived from
+PRICE_SOURCE_PAYMENT: Final = "last_payment"
+PRICE_SOURCE_BALANCE: Final = "account_balance"
+PRICE_SOURCE_AMOUNT_DUE: Final = "amount_due"
+
+
+def derive_delivery_price(data: AccountSnapshot) -> tuple[float, str] | None:
+    """Return (price per gallon, source) for the last delivery, if derivable.
+
+    If last_payment_date predates last_delivery_date, the payment on record
+    is for a prior delivery cycle. Use account_balance (preferred) or
+    amount_due as the numerator instead, since that reflects what is owed
+    for the current delivery.
+    """
+    delivery = data.last_delivery_gallons
+    if delivery <= 0:
+        return None
+
+    last_payment_date = data.last_payment_date
+    last_delivery_date = data.last_delivery_date
+
+    if last_payment_date and last_delivery_date and last_payment_date < last_delivery_date:
+        # Payment predates delivery — use outstanding balance for current delivery cost.
+        if data.account_balance > 0:
+            numerator, source = data.account_balance, PRICE_SOURCE_BALANCE
+        else:
+            numerator, source = data.amount_due, PRICE_SOURCE_AMOUNT_DUE
+    else:
+        # Payment is current — use last payment amount as normal.
+        numerator, source = data.last_payment_amount, PRICE_SOURCE_PAYMENT
+
+    if numerator <= 0:
+        return None
+    return round(numerator / delivery, 2), source
+
+
+def _price_store(hass: HomeAssistant, entry_id: str) -> Store[dict[str, Any]]:
+    """Return the Store holding an entry's price history."""
+    return Store(hass, PRICE_STORAGE_VERSION, f"{DOMAIN}.{entry_id}.prices")
+
+
+async def async_remove_price_ledger(hass: HomeAssistant, entry_id: str) -> None:
+    """Delete the persisted price history for an entry."""
+    await _price_store(hass, entry_id).async_remove()
+
+
+class PriceLedger:
+    """Price history of an account's deliveries, one entry per delivery date.
+
+    Kept as parallel lists sorted by date, plus prefix sums of gallons and
+    cost over them, so the price in effect at a time and the totals over
+    any period are two bisects away: no recorder queries. Recording a
+    delivery is O(n) to rebuild the prefix sums, once per delivery or price
+    correction.
+
+    The price of the last delivery is re-derived on every new snapshot and
+    replaces the stored one when it changes, e.g. once the payment for the
+    delivery replaces the balance as the source. Price listeners are called
+    with the date of every delivery recorded or corrected, so consumers that
+    priced past consumption (the cost statistic) can recompute from there.
+    """
+
+    def __init__(self, hass: HomeAssistant, coordinator, entry_id: str) -> None:
+        """Initialize an empty ledger; call async_load() before use."""
+        self.hass = hass
+        self.coordinator = coordinator
+        self.entry_id = entry_id
+
+        self.dates: list[datetime] = []
+        self.gallons: list[float] = []
+        self.prices: list[float] = []
+        self.sources: list[str] = []
+        # _cum_gallons[i] / _cum_cost[i]: totals of the first i deliveries
+        self._cum_gallons: list[float] = [0.0]
+        self._cum_cost: list[float] = [0.0]
+        self._price_listeners: list[Callable[[datetime], None]] = []
+
+        self._store = _price_store(hass, entry_id)
+        self._last_snapshot: AccountSnapshot | None = None
+        self._unsub: CALLBACK_TYPE | None = None
+
+    def __len__(self) -> int:
+        """Return the number of deliveries on record."""
+        return len(self.dates)
+
+    async def async_load(self) -> None:
+        """Restore the persisted history, then start listening."""
+        try:
+            if stored := await self._store.async_load():
+                for date, gallons, price, source in stored["deliveries"]:
+                    self.dates.append(dt_util.parse_datetime(date))
+                    self.gallons.append(gallons)
+                    self.prices.append(price)
+                    self.sources.append(source)
+                self._rebuild_sums(0)
+        except Exception as err:  # Corrupt file must never block setup
+            _LOGGER.warning("Could not load AmeriGas price history: %s", err)
+            self.dates, self.gallons, self.prices, self.sources = [], [], [], []
+            self._rebuild_sums(0)
+
+        self._unsub = self.coordinator.async_add_listener(self._handle_coordinator_update)
+
+    @callback
+    def async_add_price_listener(self, price_listener: Callable[[datetime], None]) -> CALLBACK_TYPE:
+        """Call ``price_listener(delivery_date)`` whenever a price is recorded or corrected."""
+        self._price_listeners.append(price_listener)
+
+        @callback
+        def remove_price_listener() -> None:
+            self._price_listeners.remove(price_listener)
+
+        return remove_price_listener
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Stop listening."""
+        if self._unsub:
+            self._unsub()
+            self._unsub = None
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Record the price of the last delivery from a new snapshot."""
+        data = self.coordinator.data
+        if not data or data == self._last_snapshot:
+            return
+        self._last_snapshot = data
+        if data.last_delivery_date is None or (derived := derive_delivery_price(data)) is None:
+            return
+        if self.record(data.last_delivery_date, data.last_delivery_gallons, *derived):
+            self._store.async_delay_save(self._data_to_store, PRICE_SAVE_DELAY)
+
+    def record(self, date: datetime, gallons: float, price: float, source: str) -> bool:
+        """Insert or correct a delivery; return whether anything changed."""
+        index = bisect_left(self.dates, date)
+        if index < len(self.dates) and self.dates[index] == date:
+            stored = (self.gallons[index], self.prices[index], self.sources[index])
+            if stored == (gallons, price, source):
+                return False
+            self.gallons[index] = gallons
+            self.prices[index] = price
+            self.sources[index] = source
+        else:
+            self.dates.insert(index, date)
+            self.gallons.insert(index, gallons)
+            self.prices.insert(index, price)
+            self.sources.insert(index, source)
+        self._rebuild_sums(index)
+        _LOGGER.debug(
+            "Recorded delivery price: %s, %.1f gal at %.2f/gal (%s)", date, gallons, price, source
+        )
+        for price_listener in list(self._price_listeners):
+            price_listener(date)
+        return True
+
+    def _rebuild_sums(self, start: int) -> None:
+        """Recompute the prefix sums from delivery ``start`` on."""
+        del self._cum_gallons[start + 1 :], self._cum_cost[start + 1 :]
+        total_gallons = self._cum_gallons[start]
+        total_cost = self._cum_cost[start]
+        for gallons, price in zip(self.gallons[start:], self.prices[start:]):
+            total_gallons += gallons
+            total_cost += gallons * price
+            self._cum_gallons.append(total_gallons)
+            self._cum_cost.append(total_cost)
+
+    def price_at(self, when: datetime) -> float | None:
+        """Return the price of the last delivery on or before ``when``."""
+        index = bisect_right(self.dates, when)
+        return self.prices[index - 1] if index else None
+
+    def totals_between(self, start: datetime, end: datetime) -> tuple[float, float]:
+        """Return (gallons, cost) delivered in ``[start, end)``."""
+        first = bisect_left(self.dates, start)
+        last = bisect_left(self.dates, end)
+        return (
+            self._cum_gallons[last] - self._cum_gallons[first],
+            self._cum_cost[last] - self._cum_cost[first],
+        )
+
+    def average_price_between(self, start: datetime, end: datetime) -> float | None:
+        """Return the gallon-weighted average price of deliveries in ``[start, end)``."""
+        gallons, cost = self.totals_between(start, end)
+        return round(cost / gallons, 2) if gallons > 0 else None
+
+    def _data_to_store(self) -> dict[str, Any]:
+        """Return the compact Store payload: one row per delivery."""
+        return {
+            "deliveries": [
+                [date.isoformat(), gallons, price, source]
+                for date, gallons, price, source in zip(
+                    self.dates, self.gallons, self.prices, self.sources
+                )
+            ]
+        }
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a JSON-friendly representation for diagnostics."""
+        return self._data_to_store()
@@ -0,0 +1,152 @@
+"""Opt-in sampling profiler for the refresh pipeline."""
+from __future__ import annotations
+
+import logging
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from types import FrameType
+from typing import Any
+
+_LOGGER = logging.getLogger(__name__)
+
+# Seconds between stack samples. Doubled whenever sampling costs more than
+# PROFILE_OVERHEAD_CAP of the elapsed wall time, up to PROFILE_MAX_INTERVAL;
+# past that, samples are skipped until the sampler is back under the cap.
+PROFILE_INTERVAL = 0.002
+PROFILE_MAX_INTERVAL = 0.05
+# Share of wall time the sampler may spend holding the GIL
+PROFILE_OVERHEAD_CAP = 0.02
+# A single refresh is never sampled for longer than this
+PROFILE_MAX_SECONDS = 120.0
+# Frames kept per stack, innermost last
+PROFILE_MAX_DEPTH = 48
+
+MAX_PROFILE_REFRESHES = 20
+
+
+def _collapse(frame: FrameType | None) -> str:
+    """Return a frame's stack in collapsed (flame graph) form, outermost first."""
+    names: list[str] = []
+    while frame is not None and len(names) < PROFILE_MAX_DEPTH:
+        code = frame.f_code
+        names.append(f"{Path(code.co_filename).stem}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class RefreshProfiler:
+    """Samples the event loop thread's stack while refreshes run.
+
+    A daemon thread reads the loop thread's current frame with
+    ``sys._current_frames()`` every PROFILE_INTERVAL seconds, so the
+    refresh itself runs uninstrumented. The sampler measures its own cost
+    and backs off, then skips samples, to stay under PROFILE_OVERHEAD_CAP of
+    wall time.
+
+    Samples cover everything running on the loop during the refresh,
+    including waits on the portal (shown under the event loop's selector)
+    and other integrations' work that interleaves with it.
+    """
+
+    def __init__(
+        self,
+        refreshes: int,
+        *,
+        interval: float = PROFILE_INTERVAL,
+        overhead_cap: float = PROFILE_OVERHEAD_CAP,
+    ) -> None:
+        """Arm the profiler for the next ``refreshes`` refreshes."""
+        self.remaining = refreshes
+        self.profiled = 0
+        self.interval = interval
+        self.overhead_cap = overhead_cap
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self.wall_seconds = 0.0
+        self.sampler_seconds = 0.0
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._target_thread_id = 0
+
+    @property
+    def active(self) -> bool:
+        """Return True while refreshes remain to be profiled."""
+        return self.remaining > 0
+
+    def start(self) -> None:
+        """Start sampling the calling thread (the event loop)."""
+        self._target_thread_id = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="amerigas_profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Signal the sampler to stop and count the refresh as profiled.
+
+        Does not wait for the sampler thread; call join() from an executor
+        before reading the results.
+        """
+        self._stop.set()
+        self.remaining -= 1
+        self.profiled += 1
+
+    def join(self) -> None:
+        """Wait for the sampler thread to finish (blocking)."""
+        if (thread := self._thread) is not None:
+            thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        """Sampler thread body."""
+        started = time.perf_counter()
+        interval = self.interval
+        spent = 0.0
+        while not self._stop.wait(interval):
+            sample_started = time.perf_counter()
+            elapsed = sample_started - started
+            if elapsed > PROFILE_MAX_SECONDS:
+                _LOGGER.warning("Refresh profiling stopped after %.0fs", elapsed)
+                break
+            if spent > self.overhead_cap * elapsed:
+                # Over budget: back off, and skip samples once the interval
+                # cannot grow any more, so the cap is a hard limit
+                interval = min(interval * 2, PROFILE_MAX_INTERVAL)
+                continue
+
+            frame = sys._current_frames().get(self._target_thread_id)
+            if frame is not None:
+                self.stacks[_collapse(frame)] += 1
+                self.samples += 1
+            del frame
+            spent += time.perf_counter() - sample_started
+
+        self.wall_seconds += time.perf_counter() - started
+        self.sampler_seconds += spent
+
+    def collapsed(self) -> str:
+        """Return the profile in collapsed stack format (one ``stack count`` per line).
+
+        Feed the file to flamegraph.pl, speedscope or similar to visualise it.
+        """
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def summary(self, top: int = 15) -> dict[str, Any]:
+        """Return totals and the functions with the most samples on top of the stack."""
+        leaves: Counter[str] = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        return {
+            "refreshes": self.profiled,
+            "samples": self.samples,
+            "wall_seconds": round(self.wall_seconds, 3),
+            "overhead": round(self.sampler_seconds / self.wall_seconds, 4) if self.wall_seconds else 0.0,
+            "top_functions": [
+                {"function": name, "samples": count, "share": round(count / self.samples, 3)}
+                for name, count in leaves.most_common(top)
+            ],
+        }
@@ -0,0 +1,195 @@
+"""Drift detection for the portal's accountSummaryViewModel payload."""
+from __future__ import annotations
+
+import logging
+import re
+from dataclasses import dataclass
+from typing import Any, Final
+
+_LOGGER = logging.getLogger(__name__)
+
+# Value kinds a portal field may carry. None and "" are accepted for every
+# kind: the portal blanks fields that do not apply to an account.
+KIND_NUMBER: Final = "number"  # int/float, or a numeric string (NUMBER_TEXT_RE)
+KIND_TEXT: Final = "text"
+KIND_OBJECT: Final = "object"
+
+
+@dataclass(frozen=True, slots=True)
+class PortalField:
+    """A payload key the parser reads and the snapshot fields built from it.
+
+    Fields with no ``snapshot_fields`` are reported when they drift but have
+    nothing to fall back on (e.g. a secondary source of a value). An
+    ``optional`` key is one the portal leaves out for accounts it does not
+    apply to; its absence is not drift, like a None or "" value.
+    """
+
+    key: str
+    kind: str
+    snapshot_fields: tuple[str, ...] = ()
+    optional: bool = False
+
+
+# Every top-level key parse_account_data() reads, in payload order. The
+# misspelled "AmounDue" is the portal's own key.
+PORTAL_FIELDS: Final[tuple[PortalField, ...]] = (
+    PortalField("ShipToAccount", KIND_TEXT, ("account_number",)),
+    PortalField("ForecastTankLevel", KIND_NUMBER, ("tank_level",)),
+    PortalField("TankSize", KIND_NUMBER, ("tank_size",)),
+    PortalField("RunOutDays", KIND_NUMBER, ("days_remaining",)),
+    PortalField("AmounDue", KIND_NUMBER, ("amount_due",)),
+    PortalField("AccountBalance", KIND_NUMBER, ("account_balance",)),
+    PortalField("LastPaymentDate", KIND_TEXT, ("last_payment_date",)),
+    PortalField("LastPaymentAmount", KIND_NUMBER, ("last_payment_amount",)),
+    PortalField("PaymentTermsUpDate", KIND_TEXT, ("payment_terms", "payment_terms_days")),
+    # Only sent for accounts with a tank monitor
+    PortalField("TMReadDate", KIND_TEXT, ("last_tank_reading",), optional=True),
+    PortalField("TankMonitor", KIND_TEXT, ("tank_monitor",)),
+    PortalField("AutoPayment", KIND_TEXT, ("auto_pay",)),
+    PortalField("Paperless", KIND_TEXT, ("paperless",)),
+    PortalField("Street", KIND_TEXT, ("street", "service_address")),
+    PortalField("City", KIND_TEXT, ("city", "service_address")),
+    PortalField("State", KIND_TEXT, ("state", "service_address")),
+    PortalField("Zip", KIND_TEXT, ("zip", "service_address")),
+    PortalField("ForecastLongName", KIND_TEXT, ("delivery_type",)),
+    # Last-resort source of next_delivery_date behind the open orders; only
+    # sent while a delivery is scheduled
+    PortalField("NextDeliveryDate", KIND_TEXT, optional=True),
+    PortalField(
+        "myOrdersViewModel",
+        KIND_OBJECT,
+        ("last_delivery_date", "last_delivery_gallons", "next_delivery_date", "delivery_windows"),
+    ),
+)
+
+_EXPECTED_KEYS: Final = frozenset(field.key for field in PORTAL_FIELDS)
+_REQUIRED_KEYS: Final = tuple(field.key for field in PORTAL_FIELDS if not field.optional)
+_KEYS_BY_KIND: Final = {
+    kind: tuple(field.key for field in PORTAL_FIELDS if field.kind == kind)
+    for kind in (KIND_NUMBER, KIND_TEXT, KIND_OBJECT)
+}
+_KIND_TYPES: Final = {KIND_TEXT: str, KIND_OBJECT: dict}
+# Amounts as the portal formats them: "62", "-12.5", "$1,204.50"
+NUMBER_TEXT_RE: Final = re.compile(r"\s*[-+]?\$?[-+]?(?:\d[\d,]*(?:\.\d*)?|\.\d+)\s*")
+
+
+def _retyped_keys(payload: dict[str, Any]) -> list[str]:
+    """Return expected keys holding a non-empty value of the wrong kind."""
+    get = payload.get
+    retyped = []
+    for key in _KEYS_BY_KIND[KIND_NUMBER]:
+        value = get(key)
+        if value is None or value == "" or type(value) in (int, float):
+            continue
+        if not isinstance(value, str) or NUMBER_TEXT_RE.fullmatch(value) is None:
+            retyped.append(key)
+    for kind, expected_type in _KIND_TYPES.items():
+        retyped.extend(
+            key
+            for key in _KEYS_BY_KIND[kind]
+            if (value := get(key)) is not None and value != "" and not isinstance(value, expected_type)
+        )
+    return retyped
+
+
+@dataclass(frozen=True, slots=True)
+class SchemaReport:
+    """Outcome of validating one payload.
+
+    ``renamed`` pairs a missing key with the new key it most likely became,
+    e.g. ``("AmounDue", "AmountDue")``.
+    """
+
+    missing: tuple[str, ...] = ()
+    retyped: tuple[str, ...] = ()
+    renamed: tuple[tuple[str, str], ...] = ()
+
+    @property
+    def drifted(self) -> tuple[str, ...]:
+        """Return every expected key that could not be read as before."""
+        return self.missing + self.retyped
+
+    @property
+    def stale_fields(self) -> frozenset[str]:
+        """Return the snapshot fields built from drifted keys."""
+        drifted = set(self.drifted)
+        return frozenset(
+            name
+            for field in PORTAL_FIELDS
+            if field.key in drifted
+            for name in field.snapshot_fields
+        )
+
+    def describe(self) -> str:
+        """Return a one-line summary for logs and the repair issue."""
+        renamed = dict(self.renamed)
+        parts = [
+            f"{key} (renamed to {renamed[key]}?)" if key in renamed else f"{key} (missing)"
+            for key in self.missing
+        ]
+        parts.extend(f"{key} (unexpected value type)" for key in self.retyped)
+        return ", ".join(parts)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a JSON-friendly representation."""
+        return {
+            "missing": list(self.missing),
+            "retyped": list(self.retyped),
+            "renamed": dict(self.renamed),
+        }
+
+
+CLEAN_REPORT: Final = SchemaReport()
+
+
+class PortalSchemaValidator:
+    """Checks each payload against PORTAL_FIELDS.
+
+    The key set of the last payload that had every required key is cached
+    as a frozenset fingerprint. A payload with the same keys skips the
+    missing-key scan, leaving only the per-field kind checks, about a
+    quarter of the cost of parsing the smallest dashboard. Rename candidates
+    are only searched for when a key is actually missing, among keys the
+    fingerprint has not seen.
+    """
+
+    def __init__(self) -> None:
+        """Initialize without a fingerprint."""
+        self._fingerprint: frozenset[str] | None = None
+        self.last_report: SchemaReport = CLEAN_REPORT
+
+    def validate(self, payload: dict[str, Any]) -> SchemaReport:
+        """Validate a payload and remember the report."""
+        keys = frozenset(payload)
+        missing: tuple[str, ...] = ()
+        renamed: tuple[tuple[str, str], ...] = ()
+        if keys != self._fingerprint:
+            missing = tuple(key for key in _REQUIRED_KEYS if key not in keys)
+            if missing:
+                renamed = self._rename_candidates(missing, keys)
+            else:
+                self._fingerprint = keys
+
+        retyped = tuple(_retyped_keys(payload))
+
+        report = SchemaReport(missing, retyped, renamed) if missing or retyped else CLEAN_REPORT
+        if report.drifted and report != self.last_report:
+            _LOGGER.warning("AmeriGas portal payload changed shape: %s", report.describe())
+        self.last_report = report
+        return report
+
+    def _rename_candidates(
+        self, missing: tuple[str, ...], keys: frozenset[str]
+    ) -> tuple[tuple[str, str], ...]:
+        """Pair missing keys with the closest-named key that is new."""
+        import difflib  # pylint: disable=import-outside-toplevel  # drift path only
+
+        known = self._fingerprint if self._fingerprint is not None else _EXPECTED_KEYS
+        new_keys = sorted(keys - known)
+        candidates = []
+        for key in missing:
+            if match := difflib.get_close_matches(key, new_keys, n=1, cutoff=0.6):
+                candidates.append((key, match[0]))
+                new_keys.remove(match[0])
+        return tuple(candidates)
@@ -2,25 +2,33 @@
 from __future__ import annotations
 
 import logging
+from collections import Counter
+from collections.abc import Callable
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Any
 
 from homeassistant.components.sensor import (
     SensorDeviceClass,
     SensorEntity,
+    SensorEntityDescription,
     SensorStateClass,
 )
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
     PERCENTAGE,
     UnitOfEnergy,
+    UnitOfInformation,
+    UnitOfTime,
     UnitOfVolume,
     UnitOfVolumeFlowRate,
 )
 from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.restore_state import RestoreEntity
+from homeassistant.helpers.typing import StateType
 from homeassistant.helpers.update_coordinator import (
     CoordinatorEntity,
     DataUpdateCoordinator,
@@ -31,9 +39,11 @@ from .const import (
     DOMAIN,
     GALLONS_TO_CUBIC_FEET,
     DEFAULT_FILL_PERCENTAGE,
-    DEFAULT_TANK_SIZE,
-    NOISE_THRESHOLD_GALLONS,
 )
+from .lifetime import LifetimeAccumulator
+from .metrics import RefreshMetrics, RefreshMetricsHistory
+from .price_ledger import PRICE_ROLLING_WINDOW, PriceLedger, derive_delivery_price
+from .snapshot import AccountSnapshot
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -48,24 +58,16 @@ async def async_setup_entry(
 
     # Base sensors from API
     sensors: list[SensorEntity] = [
-        AmeriGasTankLevelSensor(coordinator, entry.entry_id),
-        AmeriGasTankSizeSensor(coordinator, entry.entry_id),
-        AmeriGasDaysRemainingSensor(coordinator, entry.entry_id),
-        AmeriGasAmountDueSensor(coordinator, entry.entry_id),
-        AmeriGasAccountBalanceSensor(coordinator, entry.entry_id),
-        AmeriGasLastPaymentDateSensor(coordinator, entry.entry_id),
-        AmeriGasLastPaymentAmountSensor(coordinator, entry.entry_id),
-        AmeriGasLastTankReadingSensor(coordinator, entry.entry_id),
-        AmeriGasLastDeliveryDateSensor(coordinator, entry.entry_id),
-        AmeriGasLastDeliveryGallonsSensor(coordinator, entry.entry_id),
-        AmeriGasNextDeliveryDateSensor(coordinator, entry.entry_id),
-        AmeriGasAutoPaySensor(coordinator, entry.entry_id),
-        AmeriGasPaperlessSensor(coordinator, entry.entry_id),
-        AmeriGasAccountNumberSensor(coordinator, entry.entry_id),
-        AmeriGasServiceAddressSensor(coordinator, entry.entry_id),
-        AmeriGasDeliveryAddressSensor(coordinator, entry.entry_id),
+        AmeriGasSensor(coordinator, entry.entry_id, description)
+        for description in BASE_SENSOR_DESCRIPTIONS
     ]
 
+    # Refresh pipeline metrics
+    sensors.extend(
+        AmeriGasRefreshMetricSensor(coordinator, entry.entry_id, description)
+        for description in REFRESH_METRIC_SENSOR_DESCRIPTIONS
+    )
+
     # Calculated sensors
     sensors.extend([
         PropaneGallonsRemainingSensor(coordinator, entry.entry_id),
@@ -73,7 +75,9 @@ async def async_setup_entry(
         PropaneEnergyConsumptionSensor(coordinator, entry.entry_id),
         PropaneDailyAverageUsageSensor(coordinator, entry.entry_id),
         PropaneDaysUntilEmptySensor(coordinator, entry.entry_id),
-        PropaneCostPerGallonSensor(coordinator, entry.entry_id),
+        PropaneCostPerGallonSensor(
+            coordinator, entry.entry_id, hass.data[DOMAIN][entry.entry_id]["prices"]
+        ),
         PropaneCostPerCubicFootSensor(coordinator, entry.entry_id),
         PropaneCostSinceDeliverySensor(coordinator, entry.entry_id),
         PropaneEstimatedRefillCostSensor(coordinator, entry.entry_id),
@@ -82,7 +86,9 @@ async def async_setup_entry(
     ])
 
     # Lifetime tracking sensors (v2.0.0+ with v2.1.0 enhancements)
-    lifetime_gallons_sensor = PropaneLifetimeGallonsSensor(coordinator, hass, entry.entry_id)
+    lifetime_gallons_sensor = PropaneLifetimeGallonsSensor(
+        coordinator, hass.data[DOMAIN][entry.entry_id]["lifetime"], entry.entry_id
+    )
     lifetime_energy_sensor = PropaneLifetimeEnergySensor(coordinator, hass, lifetime_gallons_sensor, entry.entry_id)
 
     sensors.extend([
@@ -94,9 +100,15 @@ async def async_setup_entry(
 
 
 class AmeriGasSensorBase(CoordinatorEntity, SensorEntity):
-    """Base class for AmeriGas sensors."""
+    """Base class for AmeriGas sensors.
+
+    Subclasses return their own attributes from ``_sensor_attributes()``;
+    ``extra_state_attributes`` adds where the snapshot behind them came from.
+    """
 
     _attr_has_entity_name = True
+    # Change on every refresh or restart; not worth a recorder row each time
+    _unrecorded_attributes = frozenset({"stale", "snapshot_fetched_at", "stale_fields"})
 
     def __init__(self, coordinator: DataUpdateCoordinator, entry_id: str) -> None:
         """Initialize the sensor."""
@@ -110,6 +122,31 @@ class AmeriGasSensorBase(CoordinatorEntity, SensorEntity):
         }
         self._pre_delivery_entity_id: str | None = None
 
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the sensor's attributes plus the staleness of its snapshot.
+
+        ``stale`` is set while values are served from the cached snapshot
+        until the portal revalidates it; ``stale_fields`` lists snapshot
+        fields carried over because the portal payload drifted.
+        """
+        fetched_at = self.coordinator.snapshot_fetched_at
+        return {
+            **(self._sensor_attributes() or {}),
+            "stale": self.coordinator.stale,
+            "snapshot_fetched_at": fetched_at.isoformat() if fetched_at else None,
+            "stale_fields": sorted(self.coordinator.stale_fields),
+        }
+
+    def _sensor_attributes(self) -> dict[str, Any] | None:
+        """Return this sensor's own attributes."""
+        return getattr(self, "_attr_extra_state_attributes", None)
+
+    @property
+    def available(self) -> bool:
+        """Unavailable until the first snapshot arrives (deferred first refresh)."""
+        return super().available and self.coordinator.data is not None
+
     async def async_added_to_hass(self) -> None:
         """Set up listener for pre-delivery level changes.
 
@@ -121,8 +158,6 @@ class AmeriGasSensorBase(CoordinatorEntity, SensorEntity):
 
         # Find and cache the pre-delivery level entity ID
         try:
-            from homeassistant.helpers import entity_registry as er
-
             entity_reg = er.async_get(self.hass)
 
             self._pre_delivery_entity_id = entity_reg.async_get_entity_id(
@@ -171,8 +206,6 @@ class AmeriGasSensorBase(CoordinatorEntity, SensorEntity):
 
         # Fallback: search entity registry (for sensors that haven't been added to hass yet)
         try:
-            from homeassistant.helpers import entity_registry as er
-
             entity_reg = er.async_get(self.hass)
 
             target_id = entity_reg.async_get_entity_id(
@@ -180,6 +213,8 @@ class AmeriGasSensorBase(CoordinatorEntity, SensorEntity):
             )
 
             if target_id:
+                # Cache so later calls take the fast path above
+                self._pre_delivery_entity_id = target_id
                 if state := self.hass.states.get(target_id):
                     try:
                         value = float(state.state)
@@ -211,19 +246,11 @@ class AmeriGasSensorBase(CoordinatorEntity, SensorEntity):
 
     def _calculate_gallons_remaining(self) -> float | None:
         """Calculate gallons remaining from coordinator data."""
-        tank_size = self.coordinator.data.get("tank_size") or DEFAULT_TANK_SIZE
-        percent = self.coordinator.data.get("tank_level") or 0
-
-        # Bounds check
-        if percent < 0:
-            percent = 0
-        elif percent > 100:
-            percent = 100
-
-        if tank_size <= 0:
+        if not self.coordinator.data:
             return None
 
-        return round(tank_size * (percent / 100), 2)
+        # Bounds-checked and rounded once when the snapshot is built
+        return self.coordinator.data.current_gallons
 
     def _calculate_used_since_delivery(self) -> tuple[float | None, str]:
         """Calculate gallons used since delivery.
@@ -248,20 +275,11 @@ class AmeriGasSensorBase(CoordinatorEntity, SensorEntity):
         the tank monitor is a consistent instrument measuring the same vessel
         across every event.
         """
-        if not self.coordinator.data:
+        if not (data := self.coordinator.data) or (current := data.current_gallons) is None:
             return None, "unknown"
 
-        tank_size = self.coordinator.data.get("tank_size") or DEFAULT_TANK_SIZE
-        tank_level = self.coordinator.data.get("tank_level") or 0
-
-        # Bounds check
-        if tank_level < 0:
-            tank_level = 0
-        elif tank_level > 100:
-            tank_level = 100
-
-        current = tank_size * (tank_level / 100)
-        last_delivery = self.coordinator.data.get("last_delivery_gallons") or 0
+        tank_size = data.effective_tank_size
+        last_delivery = data.last_delivery_gallons
 
         # v3.1.1: Check for tank-monitor post-fill reading first (level-jump trigger)
         post_fill_gallons = self._get_post_fill_gallons()
@@ -307,7 +325,7 @@ class AmeriGasSensorBase(CoordinatorEntity, SensorEntity):
 
         v3.0.7: Now uses _calculate_used_since_delivery which includes pre-delivery level.
         """
-        last_date = self.coordinator.data.get("last_delivery_date")
+        last_date = self.coordinator.data.last_delivery_date
         if not last_date:
             return None
 
@@ -324,311 +342,385 @@ class AmeriGasSensorBase(CoordinatorEntity, SensorEntity):
         return round(used / days, 2)
 
     def _calculate_cost_per_gallon(self) -> float | None:
-        """Calculate cost per gallon from coordinator data.
-
-        If last_payment_date predates last_delivery_date, the payment on record
-        is for a prior delivery cycle. Use account_balance (preferred) or
-        amount_due as the numerator instead, since that reflects what is owed
-        for the current delivery.
-        """
-        delivery = self.coordinator.data.get("last_delivery_gallons") or 0
-        if delivery <= 0:
-            return None
-
-        last_payment_date = self.coordinator.data.get("last_payment_date")
-        last_delivery_date = self.coordinator.data.get("last_delivery_date")
-
-        if (
-            last_payment_date
-            and last_delivery_date
-            and last_payment_date < last_delivery_date
-        ):
-            # Payment predates delivery — use outstanding balance for current delivery cost.
-            account_balance = self.coordinator.data.get("account_balance") or 0
-            amount_due = self.coordinator.data.get("amount_due") or 0
-            numerator = account_balance if account_balance > 0 else amount_due
-            if numerator <= 0:
-                return None
-            return round(numerator / delivery, 2)
-
-        # Payment is current — use last payment amount as normal.
-        payment = self.coordinator.data.get("last_payment_amount") or 0
-        if payment <= 0:
-            return None
-        return round(payment / delivery, 2)
+        """Calculate cost per gallon of the last delivery (see derive_delivery_price)."""
+        derived = derive_delivery_price(self.coordinator.data)
+        return derived[0] if derived else None
 
 
 # =============================================================================
 # BASE SENSORS FROM API
 # =============================================================================
 
-class AmeriGasTankLevelSensor(AmeriGasSensorBase):
-    """Tank level percentage sensor."""
-
-    _attr_name = "Tank Level"
-    _attr_unique_id = "amerigas_tank_level"
-    _attr_native_unit_of_measurement = PERCENTAGE
-    _attr_state_class = SensorStateClass.MEASUREMENT
-    _attr_icon = "mdi:propane-tank"
-
-    @property
-    def native_value(self) -> int | None:
-        """Return tank level percentage."""
-        return self.coordinator.data.get("tank_level")
-
-    @property
-    def extra_state_attributes(self) -> dict[str, Any]:
-        """Return extra attributes."""
-        return {
-            "tank_monitor": self.coordinator.data.get("tank_monitor"),
-            "delivery_type": self.coordinator.data.get("delivery_type"),
-        }
-
-
-class AmeriGasTankSizeSensor(AmeriGasSensorBase):
-    """Tank size sensor."""
-
-    _attr_name = "Tank Size"
-    _attr_unique_id = "amerigas_tank_size"
-    _attr_native_unit_of_measurement = UnitOfVolume.GALLONS
-    _attr_device_class = SensorDeviceClass.VOLUME_STORAGE
-    _attr_state_class = SensorStateClass.MEASUREMENT
-    _attr_icon = "mdi:propane-tank-outline"
-
-    @property
-    def native_value(self) -> int | None:
-        """Return tank size."""
-        return self.coordinator.data.get("tank_size")
-
-
-class AmeriGasDaysRemainingSensor(AmeriGasSensorBase):
-    """Days remaining sensor (AmeriGas estimate)."""
-
-    _attr_name = "Days Remaining (AmeriGas)"
-    _attr_unique_id = "amerigas_days_remaining"
-    _attr_native_unit_of_measurement = "days"
-    _attr_state_class = SensorStateClass.MEASUREMENT
-    _attr_icon = "mdi:calendar-clock"
-
-    @property
-    def native_value(self) -> int | None:
-        """Return days remaining."""
-        return self.coordinator.data.get("days_remaining")
-
-
-class AmeriGasAmountDueSensor(AmeriGasSensorBase):
-    """Amount due sensor."""
-
-    _attr_name = "Amount Due"
-    _attr_unique_id = "amerigas_amount_due"
-    _attr_native_unit_of_measurement = "USD"
-    _attr_device_class = SensorDeviceClass.MONETARY
-    _attr_state_class = SensorStateClass.TOTAL
-    _attr_icon = "mdi:currency-usd"
+@dataclass(frozen=True, kw_only=True)
+class AmeriGasSensorEntityDescription(SensorEntityDescription):
+    """Describes a sensor read straight from the parsed portal snapshot.
 
-    @property
-    def native_value(self) -> float | None:
-        """Return amount due."""
-        return self.coordinator.data.get("amount_due")
+    ``key`` doubles as the legacy unique ID suffix (``amerigas_<key>``), so
+    rows must keep their key to preserve existing entity registry entries.
+    """
 
-    @property
-    def extra_state_attributes(self) -> dict[str, Any]:
-        """Return extra attributes."""
-        return {
-            "payment_terms": self.coordinator.data.get("payment_terms"),
+    value_fn: Callable[[AccountSnapshot], StateType | datetime]
+    attrs_fn: Callable[[AccountSnapshot], dict[str, Any]] | None = None
+
+
+BASE_SENSOR_DESCRIPTIONS: tuple[AmeriGasSensorEntityDescription, ...] = (
+    AmeriGasSensorEntityDescription(
+        key="tank_level",
+        name="Tank Level",
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:propane-tank",
+        value_fn=lambda data: data.tank_level,
+        attrs_fn=lambda data: {
+            "tank_monitor": data.tank_monitor,
+            "delivery_type": data.delivery_type,
+        },
+    ),
+    AmeriGasSensorEntityDescription(
+        key="tank_size",
+        name="Tank Size",
+        native_unit_of_measurement=UnitOfVolume.GALLONS,
+        device_class=SensorDeviceClass.VOLUME_STORAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:propane-tank-outline",
+        value_fn=lambda data: data.tank_size,
+    ),
+    AmeriGasSensorEntityDescription(
+        key="days_remaining",
+        name="Days Remaining (AmeriGas)",
+        native_unit_of_measurement="days",
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:calendar-clock",
+        value_fn=lambda data: data.days_remaining,
+    ),
+    AmeriGasSensorEntityDescription(
+        key="amount_due",
+        name="Amount Due",
+        native_unit_of_measurement="USD",
+        device_class=SensorDeviceClass.MONETARY,
+        state_class=SensorStateClass.TOTAL,
+        icon="mdi:currency-usd",
+        value_fn=lambda data: data.amount_due,
+        attrs_fn=lambda data: {
+            "payment_terms": data.payment_terms,
             # v3.0.12: expose parsed integer alongside the raw string
-            "payment_terms_days": self.coordinator.data.get("payment_terms_days"),
-        }
-
-
-class AmeriGasAccountBalanceSensor(AmeriGasSensorBase):
-    """Account balance sensor."""
-
-    _attr_name = "Account Balance"
-    _attr_unique_id = "amerigas_account_balance"
-    _attr_native_unit_of_measurement = "USD"
-    _attr_device_class = SensorDeviceClass.MONETARY
-    _attr_state_class = SensorStateClass.TOTAL
-    _attr_icon = "mdi:cash"
-
-    @property
-    def native_value(self) -> float | None:
-        """Return account balance."""
-        return self.coordinator.data.get("account_balance")
-
-
-class AmeriGasLastPaymentDateSensor(AmeriGasSensorBase):
-    """Last payment date sensor."""
-
-    _attr_name = "Last Payment Date"
-    _attr_unique_id = "amerigas_last_payment_date"
-    _attr_device_class = SensorDeviceClass.TIMESTAMP
-    _attr_icon = "mdi:calendar-check"
-
-    @property
-    def native_value(self) -> datetime | None:
-        """Return last payment date."""
-        return self.coordinator.data.get("last_payment_date")
-
-
-class AmeriGasLastPaymentAmountSensor(AmeriGasSensorBase):
-    """Last payment amount sensor."""
-
-    _attr_name = "Last Payment Amount"
-    _attr_unique_id = "amerigas_last_payment_amount"
-    _attr_native_unit_of_measurement = "USD"
-    _attr_state_class = SensorStateClass.MEASUREMENT
-    _attr_icon = "mdi:credit-card"
-
-    @property
-    def native_value(self) -> float | None:
-        """Return last payment amount."""
-        return self.coordinator.data.get("last_payment_amount")
-
-
-class AmeriGasLastTankReadingSensor(AmeriGasSensorBase):
-    """Last tank reading timestamp sensor."""
-
-    _attr_name = "Last Tank Reading"
-    _attr_unique_id = "amerigas_last_tank_reading"
-    _attr_device_class = SensorDeviceClass.TIMESTAMP
-    _attr_icon = "mdi:clock-outline"
+            "payment_terms_days": data.payment_terms_days,
+        },
+    ),
+    AmeriGasSensorEntityDescription(
+        key="account_balance",
+        name="Account Balance",
+        native_unit_of_measurement="USD",
+        device_class=SensorDeviceClass.MONETARY,
+        state_class=SensorStateClass.TOTAL,
+        icon="mdi:cash",
+        value_fn=lambda data: data.account_balance,
+    ),
+    AmeriGasSensorEntityDescription(
+        key="last_payment_date",
+        name="Last Payment Date",
+        device_class=SensorDeviceClass.TIMESTAMP,
+        icon="mdi:calendar-check",
+        value_fn=lambda data: data.last_payment_date,
+    ),
+    AmeriGasSensorEntityDescription(
+        key="last_payment_amount",
+        name="Last Payment Amount",
+        native_unit_of_measurement="USD",
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:credit-card",
+        value_fn=lambda data: data.last_payment_amount,
+    ),
+    AmeriGasSensorEntityDescription(
+        key="last_tank_reading",
+        name="Last Tank Reading",
+        device_class=SensorDeviceClass.TIMESTAMP,
+        icon="mdi:clock-outline",
+        value_fn=lambda data: data.last_tank_reading,
+    ),
+    AmeriGasSensorEntityDescription(
+        key="last_delivery_date",
+        name="Last Delivery Date",
+        device_class=SensorDeviceClass.TIMESTAMP,
+        icon="mdi:truck-delivery",
+        value_fn=lambda data: data.last_delivery_date,
+    ),
+    AmeriGasSensorEntityDescription(
+        key="last_delivery_gallons",
+        name="Last Delivery Gallons",
+        native_unit_of_measurement=UnitOfVolume.GALLONS,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:gas-station",
+        value_fn=lambda data: data.last_delivery_gallons,
+    ),
+    AmeriGasSensorEntityDescription(
+        key="next_delivery_date",
+        name="Next Delivery Date",
+        device_class=SensorDeviceClass.TIMESTAMP,
+        icon="mdi:truck-delivery",
+        value_fn=lambda data: data.next_delivery_date,
+        attrs_fn=lambda data: {
+            "has_scheduled_delivery": data.next_delivery_date is not None,
+            "delivery_window_start": (
+                data.delivery_windows[0][0].isoformat() if data.delivery_windows else None
+            ),
+            "delivery_window_end": (
+                data.delivery_windows[0][1].isoformat() if data.delivery_windows else None
+            ),
+            "open_delivery_windows": len(data.delivery_windows),
+        },
+    ),
+    AmeriGasSensorEntityDescription(
+        key="auto_pay",
+        name="Auto Pay",
+        icon="mdi:credit-card-check",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        value_fn=lambda data: data.auto_pay,
+    ),
+    AmeriGasSensorEntityDescription(
+        key="paperless",
+        name="Paperless Billing",
+        icon="mdi:file-document",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        value_fn=lambda data: data.paperless,
+    ),
+    AmeriGasSensorEntityDescription(
+        key="account_number",
+        name="Account Number",
+        icon="mdi:account",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        value_fn=lambda data: data.account_number,
+    ),
+    AmeriGasSensorEntityDescription(
+        key="service_address",
+        name="Service Address",
+        icon="mdi:home-map-marker",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        value_fn=lambda data: data.service_address,
+        attrs_fn=lambda data: {
+            "street": data.street,
+            "city": data.city,
+            "state": data.state,
+            "zip": data.zip,
+        },
+    ),
+    AmeriGasSensorEntityDescription(
+        key="delivery_address",
+        name="Delivery Address",
+        icon="mdi:map-marker",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        value_fn=lambda data: data.delivery_address,
+    ),
+)
 
-    @property
-    def native_value(self) -> datetime | None:
-        """Return last tank reading timestamp."""
-        return self.coordinator.data.get("last_tank_reading")
 
+class AmeriGasSensor(AmeriGasSensorBase):
+    """Sensor whose value comes from one BASE_SENSOR_DESCRIPTIONS row.
 
-class AmeriGasLastDeliveryDateSensor(AmeriGasSensorBase):
-    """Last delivery date sensor."""
+    Value and attributes are extracted once per changed snapshot and cached
+    in ``_attr_*``, instead of on every state read.
+    """
 
-    _attr_name = "Last Delivery Date"
-    _attr_unique_id = "amerigas_last_delivery_date"
-    _attr_device_class = SensorDeviceClass.TIMESTAMP
-    _attr_icon = "mdi:truck-delivery"
+    entity_description: AmeriGasSensorEntityDescription
 
-    @property
-    def native_value(self) -> datetime | None:
-        """Return last delivery date."""
-        return self.coordinator.data.get("last_delivery_date")
+    def __init__(
+        self,
+        coordinator: DataUpdateCoordinator,
+        entry_id: str,
+        description: AmeriGasSensorEntityDescription,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, entry_id)
+        self.entity_description = description
+        self._attr_unique_id = f"amerigas_{description.key}"
+        self._snapshot: AccountSnapshot | None = None
+        self._update_from_data()
 
+    def _update_from_data(self) -> None:
+        """Extract the value and attributes from the current snapshot.
 
-class AmeriGasLastDeliveryGallonsSensor(AmeriGasSensorBase):
-    """Last delivery gallons sensor."""
+        Skipped when the snapshot equals the one last extracted, which is
+        the common case between portal-side updates.
+        """
+        if not (data := self.coordinator.data) or data == self._snapshot:
+            return
+        self._snapshot = data
+        description = self.entity_description
+        self._attr_native_value = description.value_fn(data)
+        if description.attrs_fn is not None:
+            self._attr_extra_state_attributes = description.attrs_fn(data)
 
-    _attr_name = "Last Delivery Gallons"
-    _attr_unique_id = "amerigas_last_delivery_gallons"
-    _attr_native_unit_of_measurement = UnitOfVolume.GALLONS
-    _attr_state_class = SensorStateClass.MEASUREMENT
-    _attr_icon = "mdi:gas-station"
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+        self._update_from_data()
+        super()._handle_coordinator_update()
 
-    @property
-    def native_value(self) -> float | None:
-        """Return last delivery gallons."""
-        return self.coordinator.data.get("last_delivery_gallons")
 
+# =============================================================================
+# REFRESH METRIC SENSORS
+# =============================================================================
 
-class AmeriGasNextDeliveryDateSensor(AmeriGasSensorBase):
-    """Next delivery date sensor."""
+@dataclass(frozen=True, kw_only=True)
+class AmeriGasRefreshMetricSensorEntityDescription(SensorEntityDescription):
+    """Describes a diagnostic sensor read from the last refresh's metrics.
 
-    _attr_name = "Next Delivery Date"
-    _attr_unique_id = "amerigas_next_delivery_date"
-    _attr_device_class = SensorDeviceClass.TIMESTAMP
-    _attr_icon = "mdi:truck-delivery"
+    ``value_fn`` reads the latest RefreshMetrics; ``attrs_fn`` summarises the
+    coordinator's whole RefreshMetricsHistory.
+    """
 
-    @property
-    def native_value(self) -> datetime | None:
-        """Return next delivery date."""
-        return self.coordinator.data.get("next_delivery_date")
+    value_fn: Callable[[RefreshMetrics], StateType]
+    attrs_fn: Callable[[RefreshMetricsHistory], dict[str, Any]] | None = None
+
+
+def _milliseconds(seconds: float | None) -> float | None:
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+def _kilobytes(size: int | None) -> float | None:
+    return round(size / 1024, 1) if size is not None else None
+
+
+def _percentile_attrs(
+    field: str, convert: Callable[[Any], float | None]
+) -> Callable[[RefreshMetricsHistory], dict[str, Any]]:
+    """Return an attrs_fn exposing the rolling p50/p95 of a RefreshMetrics field."""
+    return lambda history: {
+        "p50": convert(history.percentile(field, 50)),
+        "p95": convert(history.percentile(field, 95)),
+    }
+
+
+REFRESH_METRIC_SENSOR_DESCRIPTIONS: tuple[AmeriGasRefreshMetricSensorEntityDescription, ...] = (
+    AmeriGasRefreshMetricSensorEntityDescription(
+        key="refresh_duration",
+        name="Last Refresh Duration",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:timer-outline",
+        value_fn=lambda metrics: _milliseconds(metrics.total_seconds),
+        attrs_fn=_percentile_attrs("total_seconds", _milliseconds),
+    ),
+    AmeriGasRefreshMetricSensorEntityDescription(
+        key="login_duration",
+        name="Portal Login Time",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:login",
+        value_fn=lambda metrics: _milliseconds(metrics.login_seconds),
+        attrs_fn=_percentile_attrs("login_seconds", _milliseconds),
+    ),
+    AmeriGasRefreshMetricSensorEntityDescription(
+        key="dashboard_duration",
+        name="Portal Dashboard Time",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:web-clock",
+        value_fn=lambda metrics: _milliseconds(metrics.dashboard_seconds),
+        attrs_fn=_percentile_attrs("dashboard_seconds", _milliseconds),
+    ),
+    AmeriGasRefreshMetricSensorEntityDescription(
+        key="parse_duration",
+        name="Parse Time",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:code-json",
+        value_fn=lambda metrics: _milliseconds(metrics.parse_seconds),
+        attrs_fn=_percentile_attrs("parse_seconds", _milliseconds),
+    ),
+    AmeriGasRefreshMetricSensorEntityDescription(
+        key="dashboard_size",
+        name="Dashboard Page Size",
+        native_unit_of_measurement=UnitOfInformation.KILOBYTES,
+        device_class=SensorDeviceClass.DATA_SIZE,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:file-code-outline",
+        value_fn=lambda metrics: _kilobytes(metrics.payload_bytes),
+        attrs_fn=_percentile_attrs("payload_bytes", _kilobytes),
+    ),
+    AmeriGasRefreshMetricSensorEntityDescription(
+        key="logins",
+        name="Portal Logins",
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:account-key",
+        value_fn=lambda metrics: metrics.logins,
+        attrs_fn=lambda history: {"total": sum(item.logins for item in history)},
+    ),
+    AmeriGasRefreshMetricSensorEntityDescription(
+        key="address_strategy",
+        name="Delivery Address Source",
+        icon="mdi:map-search",
+        value_fn=lambda metrics: metrics.address_strategy,
+        attrs_fn=lambda history: {
+            "counts": dict(Counter(item.address_strategy for item in history if item.address_strategy)),
+        },
+    ),
+)
 
-    @property
-    def extra_state_attributes(self) -> dict[str, Any]:
-        """Return extra attributes."""
-        next_date = self.coordinator.data.get("next_delivery_date")
-        return {
-            "has_scheduled_delivery": next_date is not None,
-        }
 
+class AmeriGasRefreshMetricSensor(AmeriGasSensorBase):
+    """Diagnostic sensor reporting how the last portal refresh went.
 
-class AmeriGasAutoPaySensor(AmeriGasSensorBase):
-    """Auto pay status sensor."""
+    Stays available when the refresh failed, so slow or failing portal
+    requests remain visible. Timing values are in milliseconds; the
+    ``p50``/``p95`` attributes cover the coordinator's metrics history.
+    """
 
-    _attr_name = "Auto Pay"
-    _attr_unique_id = "amerigas_auto_pay"
-    _attr_icon = "mdi:credit-card-check"
+    entity_description: AmeriGasRefreshMetricSensorEntityDescription
     _attr_entity_category = EntityCategory.DIAGNOSTIC
 
-    @property
-    def native_value(self) -> str | None:
-        """Return auto pay status."""
-        return self.coordinator.data.get("auto_pay")
-
-
-class AmeriGasPaperlessSensor(AmeriGasSensorBase):
-    """Paperless billing status sensor."""
-
-    _attr_name = "Paperless Billing"
-    _attr_unique_id = "amerigas_paperless"
-    _attr_icon = "mdi:file-document"
-    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    def __init__(
+        self,
+        coordinator: DataUpdateCoordinator,
+        entry_id: str,
+        description: AmeriGasRefreshMetricSensorEntityDescription,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, entry_id)
+        self.entity_description = description
+        self._attr_unique_id = f"{entry_id}_{description.key}"
+        self._update_from_metrics()
 
     @property
-    def native_value(self) -> str | None:
-        """Return paperless billing status."""
-        return self.coordinator.data.get("paperless")
-
-
-class AmeriGasAccountNumberSensor(AmeriGasSensorBase):
-    """Account number sensor."""
-
-    _attr_name = "Account Number"
-    _attr_unique_id = "amerigas_account_number"
-    _attr_icon = "mdi:account"
-    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Metrics are always measured, never restored: no staleness attributes."""
+        return self._sensor_attributes()
 
     @property
-    def native_value(self) -> str | None:
-        """Return account number."""
-        return self.coordinator.data.get("account_number")
-
-
-class AmeriGasServiceAddressSensor(AmeriGasSensorBase):
-    """Service address sensor."""
+    def available(self) -> bool:
+        """Available once any refresh has been attempted."""
+        return self.coordinator.metrics.last is not None
 
-    _attr_name = "Service Address"
-    _attr_unique_id = "amerigas_service_address"
-    _attr_icon = "mdi:home-map-marker"
-    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    async def async_added_to_hass(self) -> None:
+        """Skip the pre-delivery listener; metrics do not depend on it."""
+        await CoordinatorEntity.async_added_to_hass(self)
 
-    @property
-    def native_value(self) -> str | None:
-        """Return service address."""
-        return self.coordinator.data.get("service_address")
+    def _update_from_metrics(self) -> None:
+        """Extract the value and attributes from the metrics history."""
+        history = self.coordinator.metrics
+        if (metrics := history.last) is None:
+            return
+        description = self.entity_description
+        self._attr_native_value = description.value_fn(metrics)
 
-    @property
-    def extra_state_attributes(self) -> dict[str, Any]:
-        """Return extra attributes."""
-        return {
-            "street": self.coordinator.data.get("street"),
-            "city": self.coordinator.data.get("city"),
-            "state": self.coordinator.data.get("state"),
-            "zip": self.coordinator.data.get("zip"),
+        attributes: dict[str, Any] = {
+            "success": metrics.success,
+            "error": metrics.error,
+            "refreshes": len(history),
         }
+        if description.attrs_fn is not None:
+            attributes |= description.attrs_fn(history)
+        self._attr_extra_state_attributes = attributes
 
-
-class AmeriGasDeliveryAddressSensor(AmeriGasSensorBase):
-    """Delivery address sensor."""
-
-    _attr_name = "Delivery Address"
-    _attr_unique_id = "amerigas_delivery_address"
-    _attr_icon = "mdi:map-marker"
-    _attr_entity_category = EntityCategory.DIAGNOSTIC
-
-    @property
-    def native_value(self) -> str | None:
-        """Return delivery address."""
-        return self.coordinator.data.get("delivery_address")
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle a finished refresh, successful or not."""
+        self._update_from_metrics()
+        super()._handle_coordinator_update()
 
 
 # =============================================================================
@@ -652,8 +744,9 @@ class PropaneGallonsRemainingSensor(AmeriGasSensorBase):
     @property
     def available(self) -> bool:
         """Return if sensor is available."""
-        tank_size = self.coordinator.data.get("tank_size")
-        return tank_size is not None and tank_size > 0
+        if not self.coordinator.data:
+            return False
+        return self.coordinator.data.current_gallons is not None
 
 
 class PropaneUsedSinceDeliverySensor(AmeriGasSensorBase):
@@ -689,8 +782,8 @@ class PropaneUsedSinceDeliverySensor(AmeriGasSensorBase):
         # Calculate starting level for attributes
         post_fill = self._get_post_fill_gallons()
         pre_delivery = self._get_pre_delivery_level()
-        last_delivery = self.coordinator.data.get("last_delivery_gallons") or 0
-        tank_size = self.coordinator.data.get("tank_size") or DEFAULT_TANK_SIZE
+        last_delivery = self.coordinator.data.last_delivery_gallons
+        tank_size = self.coordinator.data.effective_tank_size
 
         if post_fill:
             self._starting_level = post_fill
@@ -706,10 +799,9 @@ class PropaneUsedSinceDeliverySensor(AmeriGasSensorBase):
 
         return used
 
-    @property
-    def extra_state_attributes(self) -> dict[str, Any]:
+    def _sensor_attributes(self) -> dict[str, Any]:
         """Return extra attributes."""
-        last_delivery = self.coordinator.data.get("last_delivery_gallons") or 0
+        last_delivery = self.coordinator.data.last_delivery_gallons
         pre_delivery = self._get_pre_delivery_level()
         post_fill = self._get_post_fill_gallons()
 
@@ -764,8 +856,9 @@ class PropaneEnergyConsumptionSensor(AmeriGasSensorBase):
     @property
     def available(self) -> bool:
         """Return availability."""
-        tank_size = self.coordinator.data.get("tank_size")
-        return tank_size is not None and tank_size > 0
+        if not self.coordinator.data:
+            return False
+        return self.coordinator.data.current_gallons is not None
 
 
 class PropaneDailyAverageUsageSensor(AmeriGasSensorBase):
@@ -798,19 +891,19 @@ class PropaneDailyAverageUsageSensor(AmeriGasSensorBase):
     @property
     def available(self) -> bool:
         """Return availability."""
-        last_date = self.coordinator.data.get("last_delivery_date")
+        if not self.coordinator.data:
+            return False
+        last_date = self.coordinator.data.last_delivery_date
         if not last_date:
             return False
 
         now = dt_util.now()
         days = (now - last_date).days
-        tank_size = self.coordinator.data.get("tank_size")
-        return days > 0 and tank_size and tank_size > 0
+        return days > 0 and self.coordinator.data.current_gallons is not None
 
-    @property
-    def extra_state_attributes(self) -> dict[str, Any]:
+    def _sensor_attributes(self) -> dict[str, Any]:
         """Return extra attributes."""
-        last_date = self.coordinator.data.get("last_delivery_date")
+        last_date = self.coordinator.data.last_delivery_date
         used, method = self._calculate_used_since_delivery()
 
         attrs = {
@@ -865,12 +958,13 @@ class PropaneDaysUntilEmptySensor(AmeriGasSensorBase):
     @property
     def available(self) -> bool:
         """Sensor is available if we have the data needed to calculate."""
+        if not self.coordinator.data:
+            return False
         remaining = self._calculate_gallons_remaining()
         avg_usage = self._calculate_daily_average()
         return remaining is not None and avg_usage is not None
 
-    @property
-    def extra_state_attributes(self) -> dict[str, Any]:
+    def _sensor_attributes(self) -> dict[str, Any]:
         """Return extra attributes."""
         remaining = self._calculate_gallons_remaining()
         avg_usage = self._calculate_daily_average()
@@ -898,7 +992,11 @@ class PropaneDaysUntilEmptySensor(AmeriGasSensorBase):
 
 
 class PropaneCostPerGallonSensor(AmeriGasSensorBase):
-    """Cost per gallon sensor with v2.1.0 improvements."""
+    """Cost per gallon sensor with v2.1.0 improvements.
+
+    The state is the price of the last delivery. Attributes summarise the
+    account's PriceLedger over the last PRICE_ROLLING_WINDOW.
+    """
 
     _attr_name = "Cost Per Gallon"
     _attr_unique_id = "propane_cost_per_gallon"
@@ -906,6 +1004,11 @@ class PropaneCostPerGallonSensor(AmeriGasSensorBase):
     _attr_state_class = SensorStateClass.MEASUREMENT
     _attr_icon = "mdi:currency-usd"
 
+    def __init__(self, coordinator: DataUpdateCoordinator, entry_id: str, ledger: PriceLedger) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, entry_id)
+        self._ledger = ledger
+
     @property
     def native_value(self) -> float | None:
         """Return cost per gallon."""
@@ -914,8 +1017,23 @@ class PropaneCostPerGallonSensor(AmeriGasSensorBase):
     @property
     def available(self) -> bool:
         """Return availability."""
-        delivery = self.coordinator.data.get("last_delivery_gallons") or 0
-        return delivery > 0
+        if not self.coordinator.data:
+            return False
+        return self.coordinator.data.last_delivery_gallons > 0
+
+    def _sensor_attributes(self) -> dict[str, Any]:
+        """Return the price source and the rolling price history summary."""
+        derived = derive_delivery_price(self.coordinator.data)
+        now = dt_util.now()
+        gallons, cost = self._ledger.totals_between(now - PRICE_ROLLING_WINDOW, now)
+
+        return {
+            "price_source": derived[1] if derived else None,
+            "average_price_12_months": round(cost / gallons, 2) if gallons > 0 else None,
+            "delivered_gallons_12_months": round(gallons, 1),
+            "delivered_cost_12_months": round(cost, 2),
+            "deliveries_on_record": len(self._ledger),
+        }
 
 
 class PropaneCostPerCubicFootSensor(AmeriGasSensorBase):
@@ -940,8 +1058,9 @@ class PropaneCostPerCubicFootSensor(AmeriGasSensorBase):
     @property
     def available(self) -> bool:
         """Return availability."""
-        delivery = self.coordinator.data.get("last_delivery_gallons") or 0
-        return delivery > 0
+        if not self.coordinator.data:
+            return False
+        return self.coordinator.data.last_delivery_gallons > 0
 
 
 class PropaneCostSinceDeliverySensor(AmeriGasSensorBase):
@@ -971,12 +1090,13 @@ class PropaneCostSinceDeliverySensor(AmeriGasSensorBase):
     @property
     def available(self) -> bool:
         """Return availability."""
+        if not self.coordinator.data:
+            return False
         used, _ = self._calculate_used_since_delivery()
         cost = self._calculate_cost_per_gallon()
         return used is not None and cost is not None and cost > 0
 
-    @property
-    def extra_state_attributes(self) -> dict[str, Any]:
+    def _sensor_attributes(self) -> dict[str, Any]:
         """Return extra attributes."""
         used, method = self._calculate_used_since_delivery()
         cost = self._calculate_cost_per_gallon()
@@ -1008,7 +1128,7 @@ class PropaneEstimatedRefillCostSensor(AmeriGasSensorBase):
     @property
     def native_value(self) -> float | None:
         """Return estimated refill cost."""
-        tank_size = self.coordinator.data.get("tank_size") or DEFAULT_TANK_SIZE
+        tank_size = self.coordinator.data.effective_tank_size
         remaining = self._calculate_gallons_remaining()
         cost = self._calculate_cost_per_gallon()
 
@@ -1025,10 +1145,9 @@ class PropaneEstimatedRefillCostSensor(AmeriGasSensorBase):
 
         return round(needed * cost, 2)
 
-    @property
-    def extra_state_attributes(self) -> dict[str, Any]:
+    def _sensor_attributes(self) -> dict[str, Any]:
         """Return extra attributes."""
-        tank_size = self.coordinator.data.get("tank_size") or DEFAULT_TANK_SIZE
+        tank_size = self.coordinator.data.effective_tank_size
         remaining = self._calculate_gallons_remaining()
 
         max_fill_level = tank_size * 0.80
@@ -1055,7 +1174,7 @@ class PropaneDaysSinceDeliverySensor(AmeriGasSensorBase):
     @property
     def native_value(self) -> int | None:
         """Return days since delivery."""
-        last_date = self.coordinator.data.get("last_delivery_date")
+        last_date = self.coordinator.data.last_delivery_date
 
         if not last_date:
             return None
@@ -1066,7 +1185,9 @@ class PropaneDaysSinceDeliverySensor(AmeriGasSensorBase):
     @property
     def available(self) -> bool:
         """Return availability."""
-        return self.coordinator.data.get("last_delivery_date") is not None
+        if not self.coordinator.data:
+            return False
+        return self.coordinator.data.last_delivery_date is not None
 
 
 class PropaneDaysRemainingDifferenceSensor(AmeriGasSensorBase):
@@ -1083,12 +1204,12 @@ class PropaneDaysRemainingDifferenceSensor(AmeriGasSensorBase):
     @property
     def native_value(self) -> int | None:
         """Return difference in estimates."""
-        amerigas = self.coordinator.data.get("days_remaining") or 0
+        amerigas = self.coordinator.data.days_remaining
 
         remaining = self._calculate_gallons_remaining()
         avg_usage = self._calculate_daily_average()
 
-        if remaining is None or avg_usage is None:
+        if amerigas is None or remaining is None or avg_usage is None:
             return None
 
         if remaining <= 0:
@@ -1104,13 +1225,14 @@ class PropaneDaysRemainingDifferenceSensor(AmeriGasSensorBase):
     @property
     def available(self) -> bool:
         """Available if we have data to calculate."""
-        amerigas = self.coordinator.data.get("days_remaining")
+        if not self.coordinator.data:
+            return False
+        amerigas = self.coordinator.data.days_remaining
         remaining = self._calculate_gallons_remaining()
         avg_usage = self._calculate_daily_average()
         return amerigas is not None and remaining is not None and avg_usage is not None
 
-    @property
-    def extra_state_attributes(self) -> dict[str, Any]:
+    def _sensor_attributes(self) -> dict[str, Any]:
         """Return extra attributes."""
         remaining = self._calculate_gallons_remaining()
         avg_usage = self._calculate_daily_average()
@@ -1127,7 +1249,7 @@ class PropaneDaysRemainingDifferenceSensor(AmeriGasSensorBase):
                 mine = min(round(days), 9999)
 
         attrs = {
-            "amerigas_estimate": self.coordinator.data.get("days_remaining"),
+            "amerigas_estimate": self.coordinator.data.days_remaining,
             "your_estimate": mine,
             "gallons_remaining": remaining,
             "daily_average_usage": avg_usage,
@@ -1151,11 +1273,16 @@ class PropaneDaysRemainingDifferenceSensor(AmeriGasSensorBase):
 # =============================================================================
 
 class PropaneLifetimeGallonsSensor(AmeriGasSensorBase, RestoreEntity):
-    """Lifetime gallons sensor with robust state restoration.
+    """Lifetime gallons sensor.
 
-    v3.0.8 FIX: Added _restoration_complete flag to prevent race condition
-    where coordinator updates could happen before state restoration finishes,
-    causing the sensor to reset to 0 and corrupt Energy Dashboard data.
+    The total is kept by the entry's LifetimeAccumulator (lifetime.py), which
+    is restored from its own checkpoint and journal before the first refresh
+    and registered on the coordinator ahead of this entity. The sensor only
+    reads it, so a late entity restore can no longer write 0 to the Energy
+    Dashboard (the v3.0.8 race).
+
+    The restored entity state is used once, to import the total kept by
+    versions before the accumulator existed.
     """
 
     _attr_name = "Lifetime Gallons"
@@ -1164,140 +1291,58 @@ class PropaneLifetimeGallonsSensor(AmeriGasSensorBase, RestoreEntity):
     _attr_state_class = SensorStateClass.TOTAL_INCREASING
     _attr_icon = "mdi:gas-station"
 
-    def __init__(self, coordinator: DataUpdateCoordinator, hass: HomeAssistant, entry_id: str) -> None:
+    def __init__(
+        self,
+        coordinator: DataUpdateCoordinator,
+        accumulator: LifetimeAccumulator,
+        entry_id: str,
+    ) -> None:
         """Initialize the sensor."""
         super().__init__(coordinator, entry_id)
-        self._previous_gallons: float | None = None
-        self._lifetime_total: float = 0.0
-        self._last_consumption_event: datetime | None = None
-        self._total_triggers: int = 0
-        self._ignored_triggers: int = 0
-        self._largest_consumption: float = 0.0
-        self._restoration_complete: bool = False  # v3.0.8: Prevent updates before restoration
+        self._accumulator = accumulator
 
     async def async_added_to_hass(self) -> None:
-        """Restore state when added to hass.
-
-        v3.0.8: State restoration MUST complete before any coordinator updates
-        are processed, otherwise we risk overwriting the database with 0.0 and
-        corrupting Energy Dashboard historical data permanently.
-        """
+        """Import the total from the last state on the first start after upgrading."""
         await super().async_added_to_hass()
 
-        if (last_state := await self.async_get_last_state()) is not None:
-            if last_state.state not in (None, "", "unknown", "unavailable"):
-                try:
-                    restored_value = float(last_state.state)
-                    if restored_value >= 0:
-                        self._lifetime_total = restored_value
-                        _LOGGER.info(f"Restored lifetime gallons: {self._lifetime_total}")
-                except (ValueError, TypeError) as e:
-                    _LOGGER.warning(f"Could not restore lifetime gallons: {e}")
-
-            if last_state.attributes:
-                try:
-                    if "previous_gallons" in last_state.attributes:
-                        self._previous_gallons = float(last_state.attributes["previous_gallons"])
-
-                    last_event = last_state.attributes.get("last_consumption_event")
-                    if last_event and last_event != "never":
-                        try:
-                            self._last_consumption_event = datetime.fromisoformat(last_event)
-                        except (ValueError, TypeError):
-                            self._last_consumption_event = None
-
-                    self._total_triggers = last_state.attributes.get("total_triggers", 0)
-                    self._ignored_triggers = last_state.attributes.get("ignored_triggers", 0)
-                    self._largest_consumption = last_state.attributes.get("largest_consumption", 0.0)
-
-                    if self._lifetime_total == 0.0 and "last_valid_state" in last_state.attributes:
-                        backup = last_state.attributes.get("last_valid_state")
-                        if backup and backup > 0:
-                            self._lifetime_total = float(backup)
-                            _LOGGER.warning(f"Main state was 0, restored from backup: {self._lifetime_total}")
-
-                except Exception as e:
-                    _LOGGER.error(f"Error restoring lifetime sensor attributes: {e}")
-
-        # v3.0.8 FIX: Mark restoration complete BEFORE adding listener
-        self._restoration_complete = True
-        _LOGGER.debug(f"State restoration complete. Lifetime total: {self._lifetime_total} gal")
-
-        self.async_on_remove(
-            self.coordinator.async_add_listener(self._handle_coordinator_update)
-        )
-
-        if self.coordinator.last_update_success and self.coordinator.data:
-            self._handle_coordinator_update()
-
-    @callback
-    def _handle_coordinator_update(self) -> None:
-        """Handle updated data from the coordinator.
-
-        v3.0.8 FIX: Block all updates until restoration completes.
-        This prevents writing 0.0 to database during startup which would
-        corrupt Energy Dashboard historical data permanently.
-        """
-        # v3.0.8 FIX: Block updates until restoration completes
-        if not self._restoration_complete:
-            _LOGGER.debug("Skipping update - state restoration not complete")
+        if self._accumulator.restored:
             return
-
-        current_gallons = self._calculate_gallons_remaining()
-        if current_gallons is None:
-            # v3.0.8: Preserve existing value when API unreachable
-            _LOGGER.debug("API unreachable - preserving existing lifetime total")
-            self.async_write_ha_state()
+        if (last_state := await self.async_get_last_state()) is None:
             return
 
-        if self._previous_gallons is None:
-            self._previous_gallons = current_gallons
-            self.async_write_ha_state()
-            return
-
-        diff = self._previous_gallons - current_gallons
-        self._total_triggers += 1
-
-        if diff > NOISE_THRESHOLD_GALLONS:
-            self._lifetime_total += diff
-            self._previous_gallons = current_gallons
-            self._last_consumption_event = dt_util.now()
-            if diff > self._largest_consumption:
-                self._largest_consumption = diff
-            _LOGGER.info(f"Lifetime consumption: +{diff:.2f} gal, total now {self._lifetime_total:.2f} gal")
-        elif diff > 0:
-            self._ignored_triggers += 1
-        else:
-            if diff < -1.0:
-                _LOGGER.info(f"Delivery detected: +{abs(diff):.2f} gal")
-            self._previous_gallons = current_gallons
-
+        total = 0.0
+        if last_state.state not in (None, "", "unknown", "unavailable"):
+            try:
+                total = max(0.0, float(last_state.state))
+            except (ValueError, TypeError) as e:
+                _LOGGER.warning(f"Could not restore lifetime gallons: {e}")
+        attributes = last_state.attributes
+        if total == 0.0 and (backup := attributes.get("last_valid_state")):
+            # v3.0.8 backup of a total lost to the startup race
+            total = max(0.0, float(backup))
+        previous = attributes.get("previous_gallons")
+
+        await self._accumulator.async_import(total, float(previous) if previous else None)
         self.async_write_ha_state()
 
     @property
     def native_value(self) -> float:
         """Return lifetime gallons."""
-        return round(self._lifetime_total, 2)
+        return round(self._accumulator.total_gallons, 2)
 
-    @property
-    def extra_state_attributes(self) -> dict[str, Any]:
+    def _sensor_attributes(self) -> dict[str, Any]:
         """Return extra attributes."""
-        if self._last_consumption_event is None:
-            last_event = "never"
-        elif isinstance(self._last_consumption_event, str):
-            last_event = self._last_consumption_event
-        else:
-            last_event = self._last_consumption_event.isoformat()
+        accumulator = self._accumulator
+        last_event = accumulator.last_consumption_event
 
         return {
-            "last_valid_state": self._lifetime_total,
-            "previous_gallons": self._previous_gallons if self._previous_gallons is not None else 0.0,
-            "last_consumption_event": last_event,
-            "total_triggers": self._total_triggers,
-            "ignored_triggers": self._ignored_triggers,
-            "largest_consumption": round(self._largest_consumption, 2),
-            "threshold_gallons": NOISE_THRESHOLD_GALLONS,
-            "restoration_complete": self._restoration_complete,  # v3.0.8: Debug aid
+            "previous_gallons": accumulator.previous_gallons or 0.0,
+            "last_consumption_event": last_event.isoformat() if last_event else "never",
+            "total_triggers": accumulator.total_triggers,
+            "ignored_triggers": accumulator.ignored_triggers,
+            "largest_consumption": round(accumulator.largest_consumption, 2),
+            "threshold_gallons": round(accumulator.filter.band, 2),
+            "noise_gallons": round(accumulator.filter.noise, 2),
             "version": "3.1.1",
         }
 
@@ -1333,8 +1378,7 @@ class PropaneLifetimeEnergySensor(AmeriGasSensorBase):
         """Always available, even if value is 0."""
         return True
 
-    @property
-    def extra_state_attributes(self) -> dict[str, Any]:
+    def _sensor_attributes(self) -> dict[str, Any]:
         """Return extra attributes."""
         gallons = self._lifetime_gallons_sensor.native_value
 
@@ -0,0 +1,128 @@
+"""Typed model of the parsed portal account snapshot."""
+from __future__ import annotations
+
+from dataclasses import dataclass, field, fields
+from datetime import datetime
+from typing import Any
+
+from homeassistant.util import dt as dt_util
+
+from .const import DEFAULT_TANK_SIZE
+
+# Snapshot fields holding timezone-aware datetimes. Store serialises them as
+# ISO strings, so they are converted back when a snapshot is loaded.
+SNAPSHOT_DATETIME_FIELDS: tuple[str, ...] = (
+    "last_payment_date",
+    "last_tank_reading",
+    "last_delivery_date",
+    "next_delivery_date",
+)
+
+
+@dataclass(frozen=True, slots=True)
+class AccountSnapshot:
+    """One parse of the dashboard's accountSummaryViewModel.
+
+    Values the portal did not report are None rather than a placeholder
+    number: ``tank_level`` and ``days_remaining`` when the forecast is
+    missing, ``tank_size`` when no size is on file (the portal reports 0).
+    ``current_gallons`` is None unless both the level and a positive tank
+    size are known, so nothing downstream runs on a made-up tank. Only the
+    fill estimates use ``effective_tank_size``, which falls back to
+    DEFAULT_TANK_SIZE.
+
+    ``effective_tank_size``, ``tank_level_clamped`` and ``current_gallons``
+    are derived once at construction and excluded from equality, so two
+    snapshots compare equal exactly when the portal reported the same values.
+    """
+
+    # Tank
+    tank_level: int | None = None
+    tank_size: int | None = None
+    days_remaining: int | None = None
+
+    # Financial
+    amount_due: float = 0.0
+    account_balance: float = 0.0
+    last_payment_date: datetime | None = None
+    last_payment_amount: float = 0.0
+    payment_terms: str = ""
+    payment_terms_days: int = 30
+
+    # Tank monitor
+    last_tank_reading: datetime | None = None
+    tank_monitor: str = "No"
+
+    # Delivery
+    last_delivery_date: datetime | None = None
+    last_delivery_gallons: float = 0.0
+    next_delivery_date: datetime | None = None
+    # (start, end) of each open order's estimated delivery window, by start
+    delivery_windows: tuple[tuple[datetime, datetime], ...] = ()
+
+    # Account settings
+    auto_pay: str = "Unknown"
+    paperless: str = "Unknown"
+    account_number: str = "Unknown"
+
+    # Address
+    service_address: str | None = None
+    delivery_address: str | None = None
+    street: str = ""
+    city: str = ""
+    state: str = ""
+    zip: str = ""
+
+    # Metadata
+    delivery_type: str = "Unknown"
+
+    # Derived in __post_init__
+    effective_tank_size: int = field(init=False, compare=False, repr=False)
+    tank_level_clamped: int | None = field(init=False, compare=False, repr=False)
+    current_gallons: float | None = field(init=False, compare=False, repr=False)
+
+    def __post_init__(self) -> None:
+        """Compute the derived fields."""
+        tank_size = DEFAULT_TANK_SIZE if self.tank_size is None else self.tank_size
+        level = None if self.tank_level is None else min(max(self.tank_level, 0), 100)
+        if level is None or self.tank_size is None or self.tank_size <= 0:
+            gallons = None
+        else:
+            gallons = round(self.tank_size * (level / 100), 2)
+        object.__setattr__(self, "effective_tank_size", tank_size)
+        object.__setattr__(self, "tank_level_clamped", level)
+        object.__setattr__(self, "current_gallons", gallons)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the reported fields, with datetimes as ISO strings."""
+        result: dict[str, Any] = {}
+        for snapshot_field in fields(self):
+            if not snapshot_field.init:
+                continue
+            value = getattr(self, snapshot_field.name)
+            result[snapshot_field.name] = value.isoformat() if isinstance(value, datetime) else value
+        result["delivery_windows"] = [
+            [start.isoformat(), end.isoformat()] for start, end in self.delivery_windows
+        ]
+        return result
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> AccountSnapshot:
+        """Build a snapshot from ``as_dict()`` output (e.g. a stored snapshot).
+
+        Unknown keys are ignored and missing ones take their defaults, so
+        snapshots written by older versions still load. Older versions stored
+        a missing tank size as 0.
+        """
+        known = {snapshot_field.name for snapshot_field in fields(cls) if snapshot_field.init}
+        values = {key: value for key, value in data.items() if key in known}
+        for key in SNAPSHOT_DATETIME_FIELDS:
+            if isinstance(value := values.get(key), str):
+                values[key] = dt_util.parse_datetime(value)
+        values["delivery_windows"] = tuple(
+            (dt_util.parse_datetime(start), dt_util.parse_datetime(end))
+            for start, end in values.get("delivery_windows", ())
+        )
+        if not values.get("tank_size"):
+            values["tank_size"] = None
+        return cls(**values)
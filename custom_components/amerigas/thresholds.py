@@ -0,0 +1,195 @@
+"""Low-tank threshold checks evaluated once per refresh."""
+from __future__ import annotations
+
+import logging
+from collections.abc import Callable, Mapping
+from typing import Any, Final, NamedTuple
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+
+from .const import (
+    CONF_LOW_DAYS,
+    CONF_LOW_GALLONS,
+    CONF_LOW_LEVEL_PERCENT,
+    DEFAULT_LOW_DAYS,
+    DEFAULT_LOW_GALLONS,
+    DEFAULT_LOW_LEVEL_PERCENT,
+    EVENT_THRESHOLD,
+)
+from .snapshot import AccountSnapshot
+
+_LOGGER = logging.getLogger(__name__)
+
+THRESHOLD_LOW_LEVEL: Final = "low_level"
+THRESHOLD_LOW_GALLONS: Final = "low_gallons"
+THRESHOLD_LOW_DAYS: Final = "low_days"
+
+
+class ThresholdSpec(NamedTuple):
+    """One threshold: the option holding its limit and the value it checks.
+
+    A check turns on at or below the limit and only turns off again above
+    ``limit + hysteresis``, so a level hovering at the limit (the portal
+    rounds to whole percents, forecasts move by a day) does not flap.
+    """
+
+    key: str
+    option: str
+    default: float
+    hysteresis: float
+    value_fn: Callable[[AccountSnapshot], float | None]
+
+
+THRESHOLDS: Final[tuple[ThresholdSpec, ...]] = (
+    ThresholdSpec(
+        THRESHOLD_LOW_LEVEL,
+        CONF_LOW_LEVEL_PERCENT,
+        DEFAULT_LOW_LEVEL_PERCENT,
+        3,
+        lambda data: data.tank_level_clamped,
+    ),
+    ThresholdSpec(
+        THRESHOLD_LOW_GALLONS,
+        CONF_LOW_GALLONS,
+        DEFAULT_LOW_GALLONS,
+        15,
+        lambda data: data.current_gallons,
+    ),
+    # The portal's run-out forecast (RunOutDays)
+    ThresholdSpec(
+        THRESHOLD_LOW_DAYS,
+        CONF_LOW_DAYS,
+        DEFAULT_LOW_DAYS,
+        3,
+        lambda data: data.days_remaining,
+    ),
+)
+
+
+class ThresholdMonitor:
+    """Evaluates an account's threshold checks once per new snapshot.
+
+    Replaces template binary sensors and numeric-state triggers that re-render
+    on every state change: the checks run in one pass inside the coordinator
+    listener, ahead of the entities, and the binary sensors only read
+    ``states``. EVENT_THRESHOLD fires when a check turns on or off. The first
+    evaluation (usually the cached snapshot at startup) only sets the
+    baseline, so a restart does not repeat events.
+
+    Limits come from the entry options and can be changed live with
+    async_set_options(). A limit of 0 turns a check off; its state is None.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, coordinator, entry_id: str, options: Mapping[str, Any]
+    ) -> None:
+        """Initialize; call async_start() to follow the coordinator."""
+        self.hass = hass
+        self.coordinator = coordinator
+        self.entry_id = entry_id
+
+        self.limits: dict[str, float] = {}
+        self.values: dict[str, float | None] = {spec.key: None for spec in THRESHOLDS}
+        self.states: dict[str, bool | None] = {spec.key: None for spec in THRESHOLDS}
+        self._listeners: list[CALLBACK_TYPE] = []
+        self._last_snapshot: AccountSnapshot | None = None
+        self._unsub: CALLBACK_TYPE | None = None
+        self._set_limits(options)
+
+    @callback
+    def async_start(self) -> None:
+        """Evaluate the current snapshot, then follow new ones."""
+        self._unsub = self.coordinator.async_add_listener(self._handle_coordinator_update)
+        self._handle_coordinator_update()
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Stop listening."""
+        if self._unsub:
+            self._unsub()
+            self._unsub = None
+
+    @callback
+    def async_add_listener(self, update_callback: CALLBACK_TYPE) -> CALLBACK_TYPE:
+        """Call ``update_callback`` when the limits change."""
+        self._listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            self._listeners.remove(update_callback)
+
+        return remove_listener
+
+    @callback
+    def async_set_options(self, options: Mapping[str, Any]) -> None:
+        """Apply new limits and re-evaluate the current snapshot."""
+        if not self._set_limits(options):
+            return
+        if self._last_snapshot is not None:
+            self._evaluate(self._last_snapshot)
+        for update_callback in list(self._listeners):
+            update_callback()
+
+    def _set_limits(self, options: Mapping[str, Any]) -> bool:
+        """Read the limits from the options; return whether any changed."""
+        limits = {spec.key: float(options.get(spec.option, spec.default)) for spec in THRESHOLDS}
+        if limits == self.limits:
+            return False
+        self.limits = limits
+        return True
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Evaluate a new snapshot; an unchanged one cannot change any check."""
+        data = self.coordinator.data
+        if not data or data == self._last_snapshot:
+            return
+        self._evaluate(data)
+
+    def _evaluate(self, data: AccountSnapshot) -> None:
+        """Run every check against a snapshot and fire events for changes."""
+        self._last_snapshot = data
+        for spec in THRESHOLDS:
+            limit = self.limits[spec.key]
+            value = self.values[spec.key] = spec.value_fn(data)
+            previous = self.states[spec.key]
+            if not limit:
+                self.states[spec.key] = None
+                continue
+            # Keep the state while the portal reports no value
+            if value is None:
+                continue
+            if value <= limit:
+                state = True
+            elif value > limit + spec.hysteresis:
+                state = False
+            else:
+                state = bool(previous)
+            self.states[spec.key] = state
+            # A check's first state is its baseline
+            if previous is None or state == previous:
+                continue
+            _LOGGER.info(
+                "Threshold %s turned %s: %s (limit %s)", spec.key, "on" if state else "off", value, limit
+            )
+            self.hass.bus.async_fire(
+                EVENT_THRESHOLD,
+                {
+                    "entry_id": self.entry_id,
+                    "threshold": spec.key,
+                    "state": "on" if state else "off",
+                    "value": value,
+                    "limit": limit,
+                },
+            )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the limits, values and states for diagnostics."""
+        return {
+            spec.key: {
+                "limit": self.limits[spec.key],
+                "value": self.values[spec.key],
+                "state": self.states[spec.key],
+            }
+            for spec in THRESHOLDS
+        }
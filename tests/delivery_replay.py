@@ -0,0 +1,189 @@
+"""Replay harness for the delivery detection state machine.
+
+Feeds snapshot sequences through DeliveryStateMachine without Home
+Assistant. A sequence can mark polls where the portal was unreachable (no
+snapshot) and polls before which Home Assistant restarted; a restart
+round-trips the machine's state through JSON exactly as the Store does.
+
+``generate_scenario`` scripts a tank over a few weeks of 6-hourly polls with
+deliveries, portal lag on the delivery date and gallons, outages and
+restarts, and records which poll should detect each delivery and with what
+fill levels.
+"""
+from __future__ import annotations
+
+import json
+import random
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from custom_components.amerigas.delivery_state import (
+    TRIGGER_DATE_CHANGE,
+    TRIGGER_DEFERRED_API,
+    TRIGGER_LEVEL_JUMP,
+    DeliveryDetection,
+    DeliveryState,
+    DeliveryStateMachine,
+)
+from custom_components.amerigas.snapshot import AccountSnapshot
+
+TANK_SIZES = (120, 250, 500, 1000)
+POLL_INTERVAL = timedelta(hours=6)
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+# Scripting limits. A delivery raises the level by at least MIN_FILL percent;
+# usage over the longest outage plus the portal's whole-percent rounding stays
+# well below that, so every delivery clears the jump threshold on a 120 gal tank.
+MIN_FILL = 20.0  # percent
+MAX_OUTAGE = 6  # polls
+MAX_LAG = 4  # polls, for each of the delivery date and gallons
+# Polls between deliveries: enough for the portal lag and an outage to resolve
+MIN_SPACING = 2 * MAX_LAG + MAX_OUTAGE + 1
+
+
+@dataclass(frozen=True)
+class ExpectedDelivery:
+    """What detection should report for one scripted delivery.
+
+    ``pre_fill`` and ``post_fill`` are the true gallons at the last observed
+    poll before the fill and the first one after; None for accounts whose
+    portal reports no tank level.
+    """
+
+    poll: int
+    trigger: str
+    pre_fill: float | None
+    post_fill: float | None
+
+
+@dataclass
+class Scenario:
+    """A snapshot sequence and the deliveries scripted into it.
+
+    snapshots: one entry per poll; None where the portal was unreachable
+    restarts: polls before which the machine restarts from its stored state
+    """
+
+    seed: int
+    tank_size: int
+    snapshots: list[AccountSnapshot | None]
+    restarts: frozenset[int] = frozenset()
+    deliveries: list[ExpectedDelivery] = field(default_factory=list)
+
+
+@dataclass
+class _Pending:
+    """A scripted delivery not yet seen by any poll that would detect it."""
+
+    date_poll: int
+    gallons_poll: int
+    pre_fill: float | None
+    date_seen: bool = False
+
+
+def replay(scenario: Scenario) -> list[tuple[int, DeliveryDetection]]:
+    """Run a scenario through a fresh machine; return (poll, detection) pairs."""
+    machine = DeliveryStateMachine()
+    detections = []
+    for poll, snapshot in enumerate(scenario.snapshots):
+        if poll in scenario.restarts:
+            stored = json.loads(json.dumps(machine.state.as_dict()))
+            machine = DeliveryStateMachine(DeliveryState.from_dict(stored))
+        if snapshot is None:
+            continue
+        if (detection := machine.observe(snapshot)) is not None:
+            detections.append((poll, detection))
+    return detections
+
+
+def generate_scenario(seed: int, polls: int = 100) -> Scenario:
+    """Script a random tank history; the same seed gives the same scenario."""
+    rng = random.Random(seed)
+    tank_size = rng.choice(TANK_SIZES)
+    # One account in five has no level on the portal: API triggers only
+    reports_level = rng.random() < 0.8
+    usage = rng.uniform(0.2, 1.0)  # percent per poll
+    level = rng.uniform(20.0, 75.0)
+
+    # The portal's last delivery before the run, if the account has one yet
+    delivery_date: datetime | None = START - timedelta(days=rng.randint(20, 90))
+    if reports_level and rng.random() < 0.1:
+        delivery_date = None
+    delivery_gallons = round(rng.uniform(20.0, tank_size * 0.8), 1)
+
+    next_delivery = rng.randint(3, MIN_SPACING)
+    # poll -> portal fields that change from that poll on
+    portal_updates: dict[int, list[tuple[str, Any]]] = {}
+    # Scripted deliveries still waiting for the poll that detects them
+    pending: list[_Pending] = []
+    scenario = Scenario(seed, tank_size, [])
+    restarts = set()
+    outage_until = -1
+    last_observed: float | None = None
+
+    for poll in range(polls):
+        if poll == next_delivery:
+            next_delivery += rng.randint(MIN_SPACING, 3 * MIN_SPACING)
+            if level <= 100.0 - MIN_FILL and poll < polls - MIN_SPACING:
+                fill_to = min(95.0, level + rng.uniform(MIN_FILL, 60.0))
+                gallons = round((fill_to - level) * tank_size / 100, 1)
+                if gallons == delivery_gallons:
+                    gallons += 0.1
+                date_poll = poll + rng.randint(0, MAX_LAG)
+                gallons_poll = date_poll + rng.randint(0, MAX_LAG)
+                filled_at = START + POLL_INTERVAL * poll - timedelta(hours=rng.uniform(0.5, 5.5))
+                portal_updates.setdefault(date_poll, []).append(("date", filled_at))
+                portal_updates.setdefault(gallons_poll, []).append(("gallons", gallons))
+                pending.append(_Pending(date_poll, gallons_poll, last_observed))
+                level = fill_to
+
+        for kind, value in portal_updates.pop(poll, ()):
+            if kind == "date":
+                delivery_date = value
+            else:
+                delivery_gallons = value
+
+        # Outages never cover the first poll and leave a poll between them
+        if poll > outage_until + 1 and poll > 0 and rng.random() < 0.04:
+            outage_until = poll + rng.randint(1, MAX_OUTAGE) - 1
+        if rng.random() < 0.03:
+            restarts.add(poll)
+
+        if poll <= outage_until:
+            scenario.snapshots.append(None)
+        else:
+            scenario.snapshots.append(
+                AccountSnapshot(
+                    tank_level=round(level) if reports_level else None,
+                    tank_size=tank_size,
+                    last_delivery_date=delivery_date,
+                    last_delivery_gallons=delivery_gallons,
+                )
+            )
+            gallons_now = level * tank_size / 100
+            for delivery in list(pending):
+                if reports_level:
+                    trigger = TRIGGER_LEVEL_JUMP
+                elif poll < delivery.date_poll:
+                    continue
+                elif poll >= delivery.gallons_poll:
+                    trigger = TRIGGER_DEFERRED_API if delivery.date_seen else TRIGGER_DATE_CHANGE
+                else:
+                    delivery.date_seen = True
+                    continue
+                pending.remove(delivery)
+                scenario.deliveries.append(
+                    ExpectedDelivery(
+                        poll,
+                        trigger,
+                        delivery.pre_fill if reports_level else None,
+                        gallons_now if reports_level else None,
+                    )
+                )
+            last_observed = gallons_now
+
+        level = max(0.0, level - usage)
+
+    scenario.restarts = frozenset(restarts)
+    return scenario
@@ -0,0 +1,192 @@
+"""Local myamerigas.com emulator for load and soak testing.
+
+Unlike the static stand-in in ``portal.py``, the emulator keeps per-account
+state on a virtual clock: tank levels follow scripted consumption curves with
+deliveries, logins are checked against each account's credentials, sessions
+expire, and requests can be slowed down or failed at a configurable rate.
+"""
+from __future__ import annotations
+
+import asyncio
+import base64
+import copy
+import random
+import secrets
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from custom_components.amerigas.const import API_DASHBOARD_PATH, API_LOGIN_PATH
+
+from .portal import load_account, render_dashboard
+
+SESSION_COOKIE = "ASP.NET_SessionId"
+
+LOGIN_PAGE = """<!DOCTYPE html>
+<html><head><title>Login - MyAmeriGas</title></head>
+<body><form action="/Login/Login" method="post"></form></body></html>"""
+
+
+@dataclass
+class TankCurve:
+    """Scripted tank level over virtual time.
+
+    deliveries: (day offset from the emulator start, fill-to percent)
+    """
+
+    tank_size: int = 500
+    start_level: float = 80.0
+    daily_usage: float = 1.5  # percent per day
+    deliveries: list[tuple[float, float]] = field(default_factory=list)
+
+    def level_at(self, day: float) -> tuple[float, tuple[float, float] | None]:
+        """Return (level percent, last delivery as (day, gallons) or None)."""
+        level = self.start_level
+        last_day = 0.0
+        last_delivery: tuple[float, float] | None = None
+        for delivery_day, fill_to in sorted(self.deliveries):
+            if delivery_day > day:
+                break
+            level = max(0.0, level - (delivery_day - last_day) * self.daily_usage)
+            gallons = max(0.0, fill_to - level) * self.tank_size / 100
+            level = fill_to
+            last_day = delivery_day
+            last_delivery = (delivery_day, round(gallons, 1))
+        level = max(0.0, level - (day - last_day) * self.daily_usage)
+        return level, last_delivery
+
+
+@dataclass
+class EmulatedAccount:
+    """One portal account."""
+
+    email: str
+    password: str
+    curve: TankCurve
+    payload: dict[str, Any] = field(default_factory=lambda: load_account("auto_delivery"))
+
+
+class PortalEmulator:
+    """aiohttp emulator of the AmeriGas portal.
+
+    latency: seconds added to every request
+    error_rate: probability of answering any request with HTTP 503
+    session_ttl: real seconds a login session stays valid; an expired
+        session gets the login page instead of the dashboard, as the portal does
+    """
+
+    def __init__(
+        self,
+        *,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        session_ttl: float | None = None,
+        seed: int = 0,
+        start: datetime = datetime(2026, 1, 1, tzinfo=timezone.utc),
+    ) -> None:
+        """Initialize the emulator."""
+        self.latency = latency
+        self.error_rate = error_rate
+        self.session_ttl = session_ttl
+        self.start = start
+        self.now = start
+        self.stats: Counter[str] = Counter()
+        self._random = random.Random(seed)
+        self._accounts: dict[str, EmulatedAccount] = {}
+        self._sessions: dict[str, tuple[str, float]] = {}
+        self._server: TestServer | None = None
+
+    def add_account(self, account: EmulatedAccount) -> EmulatedAccount:
+        """Register an account."""
+        self._accounts[account.email] = account
+        return account
+
+    def advance(self, delta: timedelta) -> None:
+        """Move the virtual clock forward."""
+        self.now += delta
+
+    @property
+    def base_url(self) -> str:
+        """Return the URL to pass to AmeriGasAPI(base_url=...)."""
+        assert self._server is not None
+        # By name: aiohttp's default cookie jar ignores cookies from IP hosts
+        return f"http://localhost:{self._server.port}"
+
+    async def start_server(self) -> None:
+        """Start serving on a free local port."""
+        app = web.Application()
+        app.router.add_post(API_LOGIN_PATH, self._login)
+        app.router.add_get(API_DASHBOARD_PATH, self._dashboard)
+        self._server = TestServer(app)
+        await self._server.start_server()
+
+    async def close(self) -> None:
+        """Stop the server."""
+        if self._server:
+            await self._server.close()
+
+    def payload_for(self, account: EmulatedAccount) -> dict[str, Any]:
+        """Return the accountSummaryViewModel for an account at the virtual time."""
+        day = (self.now - self.start).total_seconds() / 86400
+        level, last_delivery = account.curve.level_at(day)
+
+        payload = copy.deepcopy(account.payload)
+        payload["ForecastTankLevel"] = str(round(level))
+        payload["TankSize"] = str(account.curve.tank_size)
+        payload["RunOutDays"] = str(round(level / account.curve.daily_usage)) if account.curve.daily_usage else "999"
+        payload["TMReadDate"] = self.now.replace(minute=0, second=0, microsecond=0).strftime("%Y-%m-%dT%H:%M:%S")
+        if last_delivery:
+            delivery_day, gallons = last_delivery
+            one_click = payload.setdefault("myOrdersViewModel", {}).setdefault("OneClickOrderViewModel", {})
+            one_click["LastDeliveryDate"] = (self.start + timedelta(days=delivery_day)).strftime("%m/%d/%Y")
+            one_click["LastDeliveredGallons"] = str(gallons)
+        return payload
+
+    async def _delay_or_fail(self) -> web.Response | None:
+        """Apply latency and error injection to a request."""
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.error_rate and self._random.random() < self.error_rate:
+            self.stats["injected_errors"] += 1
+            return web.Response(status=503, text="Service Unavailable")
+        return None
+
+    async def _login(self, request: web.Request) -> web.Response:
+        self.stats["login_requests"] += 1
+        form = await request.post()
+        if (failure := await self._delay_or_fail()) is not None:
+            return failure
+
+        email = base64.b64decode(str(form.get("loginViewModel[EmailAddress]", ""))).decode()
+        password = base64.b64decode(str(form.get("loginViewModel[Password]", ""))).decode()
+        account = self._accounts.get(email)
+        if account is None or account.password != password:
+            self.stats["login_rejected"] += 1
+            return web.json_response({"success": False, "message": "Invalid email or password"})
+
+        session_id = secrets.token_hex(12)
+        self._sessions[session_id] = (email, time.monotonic())
+        response = web.json_response({"success": True})
+        response.set_cookie(SESSION_COOKIE, session_id)
+        return response
+
+    async def _dashboard(self, request: web.Request) -> web.Response:
+        self.stats["dashboard_requests"] += 1
+        if (failure := await self._delay_or_fail()) is not None:
+            return failure
+
+        session = self._sessions.get(request.cookies.get(SESSION_COOKIE, ""))
+        if session is None or (
+            self.session_ttl is not None and time.monotonic() - session[1] > self.session_ttl
+        ):
+            self.stats["session_expired"] += 1
+            return web.Response(text=LOGIN_PAGE, content_type="text/html")
+
+        page = render_dashboard(self.payload_for(self._accounts[session[0]]))
+        self.stats["dashboard_bytes"] += len(page)
+        return web.Response(text=page, content_type="text/html")
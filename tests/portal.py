@@ -0,0 +1,96 @@
+"""Local stand-in for myamerigas.com used by tests and benchmarks.
+
+Dashboard pages are rendered from the anonymized accountSummaryViewModel
+payloads in ``fixtures/`` so the real AmeriGasAPI code path (login, fetch,
+regex extraction, parsing) can run without touching the network.
+"""
+from __future__ import annotations
+
+import json
+from collections.abc import Callable
+from pathlib import Path
+from string import Template
+from typing import Any
+
+from aiohttp import web
+
+from custom_components.amerigas.const import API_DASHBOARD_PATH, API_LOGIN_PATH
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+# Repeated page chrome used to grow dashboards to realistic sizes. It must
+# not contain anything the parser looks for (model, delivery span, labels).
+_PADDING_BLOCK = """
+  <div class="card promo-card" data-track="promo">
+    <div class="card-body">
+      <h3 class="card-title">Save with Budget Billing</h3>
+      <p class="card-text">Spread your propane costs evenly across the year.</p>
+      <a class="btn btn-secondary" href="/Payments/BudgetBilling">Learn more</a>
+    </div>
+    <script type="text/javascript">
+      window.dataLayer = window.dataLayer || [];
+      window.dataLayer.push({"event": "promoView", "promoId": "budget-billing"});
+    </script>
+  </div>"""
+
+_DELIVERY_MODAL = """
+  <div class="modal" id="confirmDeliveryModal" role="dialog">
+    <div class="row"><div class="col-5 label">Delivery Address:</div>
+    <div class="col-7"><span>$address</span></div></div>
+  </div>"""
+
+_ADDRESS_LABELS = """
+    <label aria-label="Street">$street</label>
+    <label aria-label="City">$city,</label>
+    <label aria-label="State">$state</label>
+    <label aria-label="Zipcode">$zip</label>"""
+
+
+def load_account(name: str) -> dict[str, Any]:
+    """Load an anonymized accountSummaryViewModel fixture by short name."""
+    return json.loads((FIXTURES / f"account_{name}.json").read_text())
+
+
+def render_dashboard(
+    account: dict[str, Any],
+    *,
+    delivery_address: str | None = None,
+    address_labels: dict[str, str] | None = None,
+    padding_kb: int = 0,
+) -> str:
+    """Render a dashboard page embedding ``account`` as accountSummaryViewModel."""
+    padding = ""
+    if padding_kb:
+        # Half before and half after the model script
+        repeats = max(1, padding_kb * 1024 // (2 * len(_PADDING_BLOCK)))
+        padding = _PADDING_BLOCK * repeats
+
+    return Template((FIXTURES / "dashboard.html").read_text()).substitute(
+        account_json=json.dumps(account, separators=(",", ":")),
+        padding=padding,
+        delivery_modal=(
+            Template(_DELIVERY_MODAL).substitute(address=delivery_address)
+            if delivery_address
+            else ""
+        ),
+        address_labels=(
+            Template(_ADDRESS_LABELS).substitute(address_labels) if address_labels else ""
+        ),
+    )
+
+
+def build_portal_app(dashboard: str | Callable[[], str]) -> web.Application:
+    """Return an aiohttp app serving the login and dashboard endpoints."""
+
+    async def login(request: web.Request) -> web.Response:
+        await request.post()
+        return web.json_response({"success": True})
+
+    async def dashboard_page(request: web.Request) -> web.Response:
+        page = dashboard() if callable(dashboard) else dashboard
+        return web.Response(text=page, content_type="text/html")
+
+    app = web.Application()
+    app.router.add_post(API_LOGIN_PATH, login)
+    app.router.add_get(API_DASHBOARD_PATH, dashboard_page)
+    return app
@@ -1,5 +1,14 @@
 """Tests for AmeriGas API client."""
-from custom_components.amerigas.api import AmeriGasAPI
+import asyncio
+
+import pytest
+from aiohttp.test_utils import TestServer
+
+from custom_components.amerigas.api import AmeriGasAPI, AmeriGasAPIError
+from custom_components.amerigas.metrics import RefreshMetrics, RefreshMetricsHistory
+
+from .emulator import LOGIN_PAGE
+from .portal import build_portal_app, load_account, render_dashboard
 
 def test_amerigas_api_init():
     """Test initialization of AmeriGasAPI."""
@@ -11,3 +20,45 @@ def test_amerigas_api_init():
     assert api.username == username
     assert api.password == password
     assert api._session is None
+
+
+def test_async_get_data_records_metrics():
+    """Every stage of a fetch is timed; a dropped session fails after one login."""
+    page = render_dashboard(
+        load_account("will_call"), delivery_address="12 TANK HILL RD, ANYTOWN NY 12000"
+    )
+    pages = iter([page, LOGIN_PAGE])
+
+    async def run() -> RefreshMetrics:
+        server = TestServer(build_portal_app(lambda: next(pages)))
+        await server.start_server()
+        try:
+            api = AmeriGasAPI("user@example.com", "pw", base_url=f"http://{server.host}:{server.port}")
+            data = await api.async_get_data()
+            assert data.delivery_address == "12 TANK HILL RD, ANYTOWN NY 12000"
+            metrics = api.last_metrics
+
+            # The login page instead of the dashboard is not retried
+            with pytest.raises(AmeriGasAPIError):
+                await api.async_get_data()
+            assert api.last_metrics.success is False
+            assert api.last_metrics.payload_bytes == len(LOGIN_PAGE)
+            return metrics
+        finally:
+            await server.close()
+
+    metrics = asyncio.run(run())
+    assert metrics.success is True
+    assert metrics.logins == 1
+    assert metrics.address_strategy == "span"
+    assert metrics.payload_bytes == len(page)
+    assert metrics.login_seconds > 0 and metrics.dashboard_seconds > 0
+    assert metrics.total_seconds >= metrics.login_seconds + metrics.dashboard_seconds + metrics.parse_seconds
+
+    history = RefreshMetricsHistory(maxlen=3)
+    for total in (0.4, 0.1, 0.3, 0.2):
+        history.append(RefreshMetrics(started_at=metrics.started_at, total_seconds=total, success=True))
+    assert len(history) == 3
+    assert history.percentile("total_seconds", 50) == 0.2
+    assert history.percentile("total_seconds", 95) == 0.3
+    assert history.percentile("parse_seconds", 50) is None
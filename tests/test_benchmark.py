@@ -0,0 +1,263 @@
+"""Benchmarks for the parse and derive pipeline.
+
+Each benchmark times one hot path against the anonymized dashboard fixtures
+and compares it with ``fixtures/benchmark_baseline.json``. Timings are
+normalised by a fixed pure-Python calibration workload so the baseline holds
+across machines. With AMERIGAS_BENCH_ENFORCE=1, as in the Benchmark workflow,
+a case fails when it is more than BENCH_TOLERANCE times slower than its
+baseline; a plain test run only checks that the benchmarks run, so a loaded
+machine cannot fail it.
+
+Set AMERIGAS_BENCH_OUTPUT=<path> to write the measured results as JSON, and
+AMERIGAS_BENCH_UPDATE_BASELINE=1 to rewrite the baseline after an intended
+change.
+"""
+# Mock out homeassistant const before importing from custom_components
+import homeassistant.const
+if not hasattr(homeassistant.const.UnitOfVolumeFlowRate, 'GALLONS_PER_DAY'):
+    homeassistant.const.UnitOfVolumeFlowRate.GALLONS_PER_DAY = "gal/d"
+
+import asyncio
+import json
+import os
+import time
+import timeit
+import tracemalloc
+from dataclasses import replace
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from aiohttp.test_utils import TestServer
+
+from custom_components.amerigas import sensor as sensor_platform
+from custom_components.amerigas.api import AmeriGasAPI
+from custom_components.amerigas.const import DOMAIN
+from custom_components.amerigas.delivery_tracker import DeliveryTracker
+from custom_components.amerigas.lifetime import LifetimeAccumulator
+from custom_components.amerigas.metrics import RefreshMetricsHistory
+from custom_components.amerigas.parser import PARSER
+from custom_components.amerigas.price_ledger import PriceLedger
+from custom_components.amerigas.schema import PortalSchemaValidator
+from custom_components.amerigas.snapshot import AccountSnapshot
+
+from .portal import FIXTURES, build_portal_app, load_account, render_dashboard
+
+BASELINE_FILE = FIXTURES / "benchmark_baseline.json"
+BENCH_TOLERANCE = 3.0
+# Dashboards parsed per run of the fleet benchmark (all page sizes, round robin)
+FLEET_ACCOUNTS = 300
+
+# (fixture account, padding KB, HTML delivery address source)
+PAGES = {
+    "small": ("auto_delivery", 0, None),
+    "medium": ("will_call", 64, "span"),
+    "large": ("multi_order", 256, "labels"),
+}
+
+_RESULTS: dict[str, dict[str, float]] = {}
+
+
+def _render(size: str) -> tuple[dict, str]:
+    """Return (account payload, dashboard HTML) for a page size."""
+    name, padding_kb, address_source = PAGES[size]
+    account = load_account(name)
+    page = render_dashboard(
+        account,
+        padding_kb=padding_kb,
+        delivery_address="12 TANK HILL RD, ANYTOWN NY 12000" if address_source == "span" else None,
+        address_labels=(
+            {"street": "1 FARM LN", "city": "RURALVILLE", "state": "OH", "zip": "43000"}
+            if address_source == "labels"
+            else None
+        ),
+    )
+    return account, page
+
+
+def _calibration_workload() -> int:
+    total = 0
+    for i in range(20_000):
+        total += i * i % 7
+    return total
+
+
+def _best_of(func, number: int) -> float:
+    """Return the best per-call time in seconds over several repeats."""
+    return min(timeit.repeat(func, number=number, repeat=5)) / number
+
+
+@pytest.fixture(scope="module")
+def calibration() -> float:
+    """Per-run time of the calibration workload on this machine."""
+    return _best_of(_calibration_workload, 20)
+
+
+@pytest.fixture(scope="module", autouse=True)
+def _report():
+    """Write results (and optionally the baseline) once the module has run."""
+    yield
+    if output := os.environ.get("AMERIGAS_BENCH_OUTPUT"):
+        Path(output).write_text(json.dumps(_RESULTS, indent=2, sort_keys=True) + "\n")
+    if os.environ.get("AMERIGAS_BENCH_UPDATE_BASELINE") and _RESULTS:
+        baseline = {name: round(result["relative"], 4) for name, result in _RESULTS.items()}
+        BASELINE_FILE.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+
+
+def _check(name: str, seconds: float, calibration: float) -> None:
+    """Record a result and, when enforced, compare it with the stored baseline."""
+    relative = seconds / calibration
+    _RESULTS[name] = {"seconds": seconds, "relative": relative}
+
+    baseline = json.loads(BASELINE_FILE.read_text()) if BASELINE_FILE.exists() else {}
+    enforce = os.environ.get("AMERIGAS_BENCH_ENFORCE")
+    if not enforce or os.environ.get("AMERIGAS_BENCH_UPDATE_BASELINE") or name not in baseline:
+        return
+    assert relative <= baseline[name] * BENCH_TOLERANCE, (
+        f"{name}: {relative:.4f}x calibration vs baseline {baseline[name]:.4f}x"
+    )
+
+
+def _snapshot_series(data: AccountSnapshot, polls: int) -> list[AccountSnapshot]:
+    """Return consecutive parsed snapshots with a slowly falling tank."""
+    return [
+        replace(data, tank_level=max(0, data.tank_level - poll // 4)) for poll in range(polls)
+    ]
+
+
+@pytest.mark.parametrize("size", PAGES)
+def test_benchmark_extract(size, calibration):
+    """Regex + json.loads extraction of accountSummaryViewModel."""
+    account, page = _render(size)
+    assert AmeriGasAPI._extract_account_data(page) == account
+
+    seconds = _best_of(lambda: AmeriGasAPI._extract_account_data(page), 50)
+    _check(f"extract_{size}", seconds, calibration)
+
+
+@pytest.mark.parametrize("size", PAGES)
+def test_benchmark_parse(size, calibration):
+    """_parse_account_data including the HTML delivery address strategies."""
+    account, page = _render(size)
+    api = AmeriGasAPI("bench@example.com", "pw")
+    data = api._parse_account_data(account, page)
+    assert data.tank_size > 0
+    if PAGES[size][2]:
+        assert data.delivery_address
+
+    seconds = _best_of(lambda: api._parse_account_data(account, page), 50)
+    _check(f"parse_{size}", seconds, calibration)
+
+
+def test_benchmark_schema_validate(calibration):
+    """Per-refresh payload shape check once the key fingerprint is cached."""
+    account = load_account("multi_order")
+    validator = PortalSchemaValidator()
+    assert not validator.validate(account).drifted
+
+    seconds = _best_of(lambda: validator.validate(account), 200)
+    _check("schema_validate", seconds, calibration)
+
+
+def test_benchmark_parse_fleet(calibration):
+    """Per-parse CPU and transient allocation when one parser serves a fleet."""
+    pages = [_render(size) for size in PAGES]
+    fleet = [pages[index % len(pages)] for index in range(FLEET_ACCOUNTS)]
+
+    def run():
+        for account, page in fleet:
+            PARSER.parse_account_data(account, page)
+
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    # Nothing is retained between parses: the peak is one parse's working set,
+    # bounded by a lowercased copy of the largest page plus the snapshot.
+    largest = max(len(page) for _, page in pages)
+    assert peak < 2 * largest * 4
+
+    seconds = _best_of(run, 3) / len(fleet)
+    _check("parse_fleet", seconds, calibration)
+    _RESULTS["parse_fleet"]["peak_alloc_kb"] = round(peak / 1024, 1)
+
+
+def test_benchmark_tracker_update(calibration):
+    """DeliveryTracker update over a run of polls without a delivery."""
+    account, page = _render("medium")
+    series = _snapshot_series(AmeriGasAPI("bench@example.com", "pw")._parse_account_data(account, page), 100)
+
+    hass, coordinator = MagicMock(), MagicMock()
+    # State saves are delayed Store writes; only detection is timed here
+    store = SimpleNamespace(async_delay_save=lambda data_func, delay: None)
+
+    def run():
+        tracker = DeliveryTracker(hass, coordinator, "bench")
+        tracker._store = store
+        for snapshot in series:
+            coordinator.data = snapshot
+            tracker._handle_coordinator_update()
+
+    seconds = _best_of(run, 20) / len(series)
+    _check("tracker_update", seconds, calibration)
+
+
+def test_benchmark_sensor_states(calibration):
+    """State, availability and attributes of every sensor for one refresh."""
+    account, page = _render("large")
+    coordinator = MagicMock()
+    coordinator.stale = False
+    coordinator.metrics = RefreshMetricsHistory()
+    coordinator.data = AmeriGasAPI("bench@example.com", "pw")._parse_account_data(account, page)
+
+    hass = MagicMock()
+    hass.data = {
+        DOMAIN: {
+            "bench": {
+                "coordinator": coordinator,
+                "lifetime": LifetimeAccumulator(hass, coordinator, "bench"),
+                "prices": PriceLedger(hass, coordinator, "bench"),
+            }
+        }
+    }
+    entry = MagicMock(entry_id="bench")
+    sensors = []
+    asyncio.run(sensor_platform.async_setup_entry(hass, entry, sensors.extend))
+    assert len(sensors) == 36
+
+    def run():
+        for entity in sensors:
+            if hasattr(entity, "_update_from_data"):
+                entity._update_from_data()
+            if entity.available:
+                entity.native_value
+                entity.extra_state_attributes
+
+    seconds = _best_of(run, 50)
+    _check("sensor_states", seconds, calibration)
+
+
+def test_benchmark_fetch_local_portal(calibration):
+    """Full async_get_data (login, dashboard, extract, parse) against a local portal."""
+    _, page = _render("large")
+    fetches = 20
+
+    async def run() -> float:
+        server = TestServer(build_portal_app(page))
+        await server.start_server()
+        try:
+            api = AmeriGasAPI("bench@example.com", "pw", base_url=f"http://{server.host}:{server.port}")
+            data = await api.async_get_data()
+            assert data.account_number == "0000777888"
+
+            start = time.perf_counter()
+            for _ in range(fetches):
+                await api.async_get_data()
+            return (time.perf_counter() - start) / fetches
+        finally:
+            await server.close()
+
+    _check("fetch_local_portal", asyncio.run(run()), calibration)
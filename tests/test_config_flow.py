@@ -0,0 +1,119 @@
+"""Tests for the re-auth flow resuming a coordinator paused by a rejected login."""
+import asyncio
+import functools
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+
+import pytest
+from homeassistant import config_entries
+from homeassistant.config_entries import SOURCE_REAUTH, ConfigEntry
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+
+from custom_components.amerigas import _async_update_listener
+from custom_components.amerigas.api import AmeriGasAPI
+from custom_components.amerigas.config_flow import ConfigFlow
+from custom_components.amerigas.const import DATA_VALIDATED, DOMAIN
+from custom_components.amerigas.coordinator import AmeriGasDataUpdateCoordinator
+
+from .emulator import EmulatedAccount, PortalEmulator, TankCurve
+
+
+@pytest.mark.parametrize(
+    ("stored", "confirmed"),
+    [("old-pw", "new-pw"), ("new-pw", "new-pw")],
+    ids=["changed-password", "same-password"],
+)
+def test_reauth_resumes_polling_with_one_fetch(tmp_path, stored, confirmed):
+    """Confirming re-auth adopts the validated fetch and un-pauses polling.
+
+    With the same password (the portal had refused it for another reason,
+    e.g. a lockout) the entry does not change and no update listener runs;
+    polling must resume all the same.
+    """
+
+    async def run():
+        hass = HomeAssistant(str(tmp_path))
+        hass.config_entries = config_entries.ConfigEntries(hass, {})
+        await hass.config_entries.async_initialize()
+        emulator = PortalEmulator()
+        await emulator.start_server()
+        account = emulator.add_account(
+            EmulatedAccount("user@example.com", "new-pw", curve=TankCurve(start_level=40.0))
+        )
+        entry = ConfigEntry(
+            domain=DOMAIN,
+            title=account.email,
+            data={CONF_USERNAME: account.email, CONF_PASSWORD: stored},
+            source=config_entries.SOURCE_USER,
+            version=1,
+            minor_version=1,
+            options={},
+            unique_id=account.email,
+            discovery_keys={},
+            subentries_data=None,
+        )
+        hass.config_entries._entries[entry.entry_id] = entry
+        entry.add_update_listener(_async_update_listener)
+
+        api = AmeriGasAPI(account.email, stored, base_url=emulator.base_url)
+        coordinator = AmeriGasDataUpdateCoordinator(
+            hass, api, entry.entry_id, config_entry=entry
+        )
+        hass.data[DOMAIN] = {
+            entry.entry_id: {
+                "api": api,
+                "coordinator": coordinator,
+                "tracker": MagicMock(),
+                "lifetime": MagicMock(),
+                "thresholds": MagicMock(),
+            }
+        }
+
+        # The portal refuses the stored password (a lockout when it is right)
+        account.password = "locked" if stored == confirmed else "new-pw"
+        with patch.object(ConfigEntry, "async_start_reauth") as start_reauth:
+            await coordinator.async_refresh()
+        start_reauth.assert_called_once()
+        assert coordinator.auth_failed is True
+        account.password = "new-pw"
+
+        flow = ConfigFlow()
+        flow.hass = hass
+        flow.handler = DOMAIN
+        flow.flow_id = "reauth"
+        flow.context = {"source": SOURCE_REAUTH, "entry_id": entry.entry_id}
+        result = await flow.async_step_reauth(entry.data)
+        assert result["step_id"] == "reauth_confirm"
+
+        with patch(
+            "custom_components.amerigas.config_flow.AmeriGasAPI",
+            functools.partial(AmeriGasAPI, base_url=emulator.base_url),
+        ):
+            result = await flow.async_step_reauth_confirm({CONF_PASSWORD: confirmed})
+        await hass.async_block_till_done()
+        flow.async_remove()
+
+        assert result["reason"] == "reauth_successful"
+        assert entry.data[CONF_PASSWORD] == confirmed
+        assert api.password == confirmed
+        # The flow's validating fetch is adopted; nothing is fetched again
+        assert emulator.stats["login_requests"] == 2
+        assert emulator.stats["dashboard_requests"] == 1
+        assert coordinator.auth_failed is False
+        assert coordinator.last_update_success is True
+        assert coordinator.data.tank_level == 40
+        assert DATA_VALIDATED not in hass.data
+
+        # The next cron tick polls the portal again
+        coordinator._async_scheduled_refresh(datetime(2026, 1, 1, 6, tzinfo=timezone.utc))
+        await hass.async_block_till_done()
+        assert emulator.stats["login_requests"] == 3
+        assert emulator.stats["dashboard_requests"] == 2
+
+        await coordinator.async_shutdown()
+        await api.close()
+        await emulator.close()
+        await hass.async_stop(force=True)
+
+    asyncio.run(run())
@@ -0,0 +1,340 @@
+"""Tests for the AmeriGas data update coordinator."""
+import asyncio
+import functools
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from homeassistant import config_entries
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EVENT_HOMEASSISTANT_STARTED
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import issue_registry as ir
+
+from custom_components.amerigas import async_setup_entry, async_unload_entry
+from custom_components.amerigas.api import AmeriGasAPI, AmeriGasAPIError
+from custom_components.amerigas.config_flow import ConfigFlow
+from custom_components.amerigas.const import DATA_VALIDATED, DOMAIN, EVENT_REFRESH
+from custom_components.amerigas.coordinator import AmeriGasDataUpdateCoordinator
+from custom_components.amerigas.profiler import RefreshProfiler
+from custom_components.amerigas.snapshot import AccountSnapshot
+
+from .emulator import EmulatedAccount, PortalEmulator, TankCurve
+from .portal import load_account
+
+
+def test_snapshot_round_trip_serves_stale_data(tmp_path):
+    """A persisted snapshot is restored as stale and kept when revalidation fails."""
+
+    async def run():
+        hass = HomeAssistant(str(tmp_path))
+        delivered = datetime(2026, 1, 15, tzinfo=timezone.utc)
+
+        api = AmeriGasAPI("user@example.com", "pw")
+        api.async_get_data = AsyncMock(
+            return_value=AccountSnapshot(tank_level=55, last_delivery_date=delivered)
+        )
+        coordinator = AmeriGasDataUpdateCoordinator(hass, api, "entry")
+        assert await coordinator.async_restore_snapshot() is False
+
+        await coordinator.async_refresh()
+        assert coordinator.stale is False
+        await coordinator._store.async_save(coordinator._snapshot_to_store())
+
+        # Simulated restart with the portal down
+        api.async_get_data = AsyncMock(side_effect=AmeriGasAPIError("portal down"))
+        restarted = AmeriGasDataUpdateCoordinator(hass, api, "entry")
+        assert await restarted.async_restore_snapshot() is True
+        assert restarted.stale is True
+        assert restarted.data.last_delivery_date == delivered
+
+        await restarted.async_refresh()
+        assert restarted.last_update_success is True
+        assert restarted.stale is True
+        assert restarted.data.tank_level == 55
+
+        await hass.async_stop(force=True)
+
+    asyncio.run(run())
+
+
+def test_config_flow_fetch_seeds_coordinator(tmp_path):
+    """The validation fetch becomes the first refresh: one login, one dashboard request."""
+
+    async def run():
+        hass = HomeAssistant(str(tmp_path))
+        hass.config_entries = config_entries.ConfigEntries(hass, {})
+        await hass.config_entries.async_initialize()
+        emulator = PortalEmulator()
+        await emulator.start_server()
+        account = emulator.add_account(
+            EmulatedAccount("user@example.com", "pw", curve=TankCurve(start_level=62.0))
+        )
+        events = []
+        hass.bus.async_listen(EVENT_REFRESH, lambda event: events.append(event.data))
+
+        flow = ConfigFlow()
+        flow.hass = hass
+        flow.context = {"source": "user"}
+        with patch(
+            "custom_components.amerigas.config_flow.AmeriGasAPI",
+            functools.partial(AmeriGasAPI, base_url=emulator.base_url),
+        ):
+            result = await flow.async_step_user(
+                {"username": account.email, "password": account.password}
+            )
+        assert result["type"] == "create_entry"
+        snapshot = hass.data[DATA_VALIDATED][account.email]
+
+        # The entry is set up before the flow is removed; platforms are not
+        # under test, so nothing is forwarded to them
+        entry = ConfigEntry(
+            domain=DOMAIN,
+            title=result["title"],
+            data=result["data"],
+            source=config_entries.SOURCE_USER,
+            version=1,
+            minor_version=1,
+            options={},
+            unique_id=account.email,
+            discovery_keys={},
+            subentries_data=None,
+        )
+        hass.config_entries._entries[entry.entry_id] = entry
+        with patch.object(hass.config_entries, "async_forward_entry_setups", AsyncMock()):
+            assert await async_setup_entry(hass, entry) is True
+        assert hass.data[DATA_VALIDATED] == {}
+        flow.async_remove()
+        await hass.async_block_till_done()
+
+        coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+        assert coordinator.data is snapshot
+        assert coordinator.data.tank_level == 62
+        assert coordinator.stale is False
+        assert coordinator.snapshot_fetched_at is not None
+        assert [event["status"] for event in events] == ["success"]
+        assert (emulator.stats["login_requests"], emulator.stats["dashboard_requests"]) == (1, 1)
+        assert DATA_VALIDATED not in hass.data
+
+        # The seeded snapshot is what a restart restores
+        await coordinator._store.async_save(coordinator._snapshot_to_store())
+        restarted = AmeriGasDataUpdateCoordinator(hass, coordinator.api, entry.entry_id)
+        assert await restarted.async_restore_snapshot() is True
+        assert restarted.data.tank_level == 62
+        with patch.object(hass.config_entries, "async_unload_platforms", AsyncMock(return_value=True)):
+            assert await async_unload_entry(hass, entry) is True
+
+        # A snapshot no setup took is dropped when its flow finishes
+        with patch(
+            "custom_components.amerigas.config_flow.AmeriGasAPI",
+            functools.partial(AmeriGasAPI, base_url=emulator.base_url),
+        ):
+            await flow.async_step_user({"username": account.email, "password": account.password})
+        assert account.email in hass.data[DATA_VALIDATED]
+        flow.async_remove()
+        assert DATA_VALIDATED not in hass.data
+
+        await emulator.close()
+        await hass.async_stop(force=True)
+
+    asyncio.run(run())
+
+
+def test_rejected_login_pauses_polling_until_new_credentials(tmp_path):
+    """One rejected login starts re-auth; no poll reaches the portal until the password changes."""
+
+    async def run():
+        hass = HomeAssistant(str(tmp_path))
+        emulator = PortalEmulator()
+        await emulator.start_server()
+        account = emulator.add_account(
+            EmulatedAccount("user@example.com", "new-pw", curve=TankCurve(start_level=40.0))
+        )
+        events = []
+        hass.bus.async_listen(EVENT_REFRESH, lambda event: events.append(event.data))
+
+        api = AmeriGasAPI(account.email, "old-pw", base_url=emulator.base_url)
+        coordinator = AmeriGasDataUpdateCoordinator(
+            hass, api, "entry", config_entry=MagicMock()
+        )
+        await coordinator._async_background_first_refresh()
+
+        assert coordinator.auth_failed is True
+        assert coordinator.last_update_success is False
+        coordinator.config_entry.async_start_reauth.assert_called_once_with(hass)
+        # No backoff retry is armed: re-auth takes over
+        assert coordinator._unsub_retry is None
+
+        # Cron ticks and refresh_data are skipped while re-auth is pending
+        coordinator._async_scheduled_refresh(datetime(2026, 1, 1, 6, tzinfo=timezone.utc))
+        await coordinator.async_request_refresh()
+        await hass.async_block_till_done()
+        assert emulator.stats["login_requests"] == 1
+        assert emulator.stats["dashboard_requests"] == 0
+        assert [event["status"] for event in events] == ["auth_failed"]
+
+        # New credentials resume polling
+        assert api.set_credentials(account.email, account.password) is True
+        coordinator.auth_failed = False
+        await coordinator.async_refresh()
+        assert coordinator.last_update_success is True
+        assert coordinator.data.tank_level == 40
+        assert emulator.stats["login_requests"] == 2
+
+        await coordinator.async_shutdown()
+        await emulator.close()
+        await hass.async_stop(force=True)
+
+    asyncio.run(run())
+
+
+def test_first_refresh_deferred_until_started(tmp_path):
+    """No portal request is made before HA has started; failures re-arm a retry."""
+
+    async def run():
+        hass = HomeAssistant(str(tmp_path))
+        api = AmeriGasAPI("user@example.com", "pw")
+        api.async_get_data = AsyncMock(side_effect=AmeriGasAPIError("portal down"))
+        coordinator = AmeriGasDataUpdateCoordinator(hass, api, "entry")
+
+        coordinator.async_schedule_first_refresh()
+        await hass.async_block_till_done()
+        assert api.async_get_data.await_count == 0
+
+        hass.bus.async_fire(EVENT_HOMEASSISTANT_STARTED)
+        await hass.async_block_till_done()
+        assert api.async_get_data.await_count == 1
+        assert coordinator.last_update_success is False
+        assert coordinator._unsub_retry is not None
+
+        await coordinator.async_shutdown()
+        assert coordinator._unsub_retry is None
+        await hass.async_stop(force=True)
+
+    asyncio.run(run())
+
+
+def test_profiling_samples_armed_refreshes(tmp_path):
+    """An armed profile covers exactly N refreshes and is written to the config dir."""
+
+    def busy_parse() -> AccountSnapshot:
+        deadline = time.perf_counter() + 0.05
+        while time.perf_counter() < deadline:
+            pass
+        return AccountSnapshot(tank_level=55)
+
+    async def run():
+        hass = HomeAssistant(str(tmp_path))
+        api = AmeriGasAPI("user@example.com", "pw")
+        api.async_get_data = AsyncMock(side_effect=lambda: busy_parse())
+        coordinator = AmeriGasDataUpdateCoordinator(hass, api, "entry")
+
+        coordinator.async_start_profiling(2)
+        await coordinator.async_refresh()
+        assert coordinator.last_profile is None
+        await coordinator.async_refresh()
+        assert coordinator.profiler is None
+
+        profile = coordinator.last_profile
+        assert profile["refreshes"] == 2
+        assert profile["samples"] > 0
+        assert profile["overhead"] < 0.1
+        assert any(item["function"].endswith(":busy_parse") for item in profile["top_functions"])
+        collapsed = Path(profile["path"]).read_text()
+        assert Path(profile["path"]).parent == tmp_path
+        assert "test_coordinator:busy_parse" in collapsed
+
+        # Not armed any more: no further samples
+        await coordinator.async_refresh()
+        assert coordinator.last_profile is profile
+        await hass.async_stop(force=True)
+
+    asyncio.run(run())
+
+
+def test_profiler_overhead_cap_is_a_hard_limit():
+    """Past the longest interval, samples are skipped rather than exceeding the cap."""
+    profiler = RefreshProfiler(1, interval=0.001, overhead_cap=0.0)
+    profiler.start()
+    time.sleep(0.2)
+    profiler.stop()
+    profiler.join()
+
+    # Only the first sample fits a zero budget
+    assert profiler.samples == 1
+    assert profiler.profiled == 1 and not profiler.active
+
+
+def test_refresh_events_carry_trigger_and_are_rate_limited(tmp_path):
+    """EVENT_REFRESH reports trigger and status; repeats inside the window are dropped."""
+
+    async def run():
+        hass = HomeAssistant(str(tmp_path))
+        events = []
+        hass.bus.async_listen(EVENT_REFRESH, lambda event: events.append(event.data))
+
+        api = AmeriGasAPI("user@example.com", "pw")
+        api.async_get_data = AsyncMock(return_value=AccountSnapshot(tank_level=55))
+        coordinator = AmeriGasDataUpdateCoordinator(hass, api, "entry")
+        coordinator._debounced_refresh.cooldown = 0
+
+        coordinator._async_scheduled_refresh(datetime(2026, 1, 1, 6, tzinfo=timezone.utc))
+        await hass.async_block_till_done()
+        await coordinator.async_refresh()  # suppressed: same status inside the window
+        api.async_get_data.side_effect = AmeriGasAPIError("portal down")
+        await coordinator.async_refresh()  # status changed: fired
+        await hass.async_block_till_done()
+
+        assert [(event["trigger"], event["status"]) for event in events] == [
+            ("scheduled", "success"),
+            ("manual", "failed"),
+        ]
+        assert events[0]["entry_id"] == "entry"
+        assert events[1]["suppressed"] == 1
+        await hass.async_stop(force=True)
+
+    asyncio.run(run())
+
+
+def test_schema_drift_keeps_last_good_values_and_raises_one_issue(tmp_path):
+    """Drifted fields keep their last good value and are flagged until the payload recovers."""
+
+    async def run():
+        hass = HomeAssistant(str(tmp_path))
+        await ir.async_load(hass)
+        account = load_account("multi_order")
+        drifted = dict(account, LastPaymentAmount="see statement")
+        drifted["AmountDue"] = drifted.pop("AmounDue")
+        payloads = iter([account, drifted, drifted, account])
+
+        api = AmeriGasAPI("user@example.com", "pw")
+
+        async def fetch() -> AccountSnapshot:
+            payload = next(payloads)
+            api.schema.validate(payload)
+            return api._parse_account_data(payload)
+
+        api.async_get_data = fetch
+        coordinator = AmeriGasDataUpdateCoordinator(hass, api, "entry")
+
+        def domain_issues() -> list[str]:
+            return [issue_id for domain, issue_id in ir.async_get(hass).issues if domain == DOMAIN]
+
+        await coordinator.async_refresh()
+        good = coordinator.data
+        assert coordinator.stale_fields == frozenset()
+
+        for _ in range(2):
+            await coordinator.async_refresh()
+            assert coordinator.stale_fields == {"amount_due", "last_payment_amount"}
+            assert coordinator.data.amount_due == good.amount_due == 1204.5
+            assert coordinator.data.last_payment_amount == good.last_payment_amount
+            assert domain_issues() == ["schema_drift_entry"]
+
+        await coordinator.async_refresh()
+        assert coordinator.stale_fields == frozenset()
+        assert domain_issues() == []
+        await hass.async_stop(force=True)
+
+    asyncio.run(run())
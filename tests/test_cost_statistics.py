@@ -0,0 +1,65 @@
+"""Tests for the hourly propane cost statistic."""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.amerigas.cost_statistics import COST_BACKFILL_BATCH, CostStatistics
+from custom_components.amerigas.price_ledger import PRICE_SOURCE_PAYMENT, PriceLedger
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+HOURS = 1200
+
+
+def test_hours_priced_from_ledger_and_backfilled_in_batches(tmp_path):
+    """Each hour takes the price in effect; a correction rewrites the later hours in batches."""
+
+    async def run():
+        hass = HomeAssistant(str(tmp_path))
+        ledger = PriceLedger(hass, MagicMock(), "entry")
+        ledger.record(START, 200.0, 3.00, PRICE_SOURCE_PAYMENT)
+        ledger.record(START + timedelta(days=10), 300.0, 2.50, PRICE_SOURCE_PAYMENT)
+        cost = CostStatistics(hass, MagicMock(), ledger, "ENTRY")
+        await cost.async_load()
+
+        with patch(
+            "homeassistant.components.recorder.statistics.async_add_external_statistics"
+        ) as add_statistics:
+            # Two half-gallon deltas an hour, before the recorder is loaded
+            for hour in range(HOURS):
+                for minute in (10, 40):
+                    cost._handle_consumption(START + timedelta(hours=hour, minutes=minute), 0.5)
+            assert not add_statistics.called
+            assert cost.as_dict()["pending_hours"] == HOURS
+
+            hass.config.components.add("recorder")
+            cost._async_write()
+            batches = [call.args[2] for call in add_statistics.call_args_list]
+            assert [len(rows) for rows in batches] == [500, 500, 200]
+            metadata = add_statistics.call_args.args[1]
+            assert metadata["statistic_id"] == "amerigas:propane_cost_entry"
+            assert metadata["has_sum"] and metadata["unit_of_measurement"] == hass.config.currency
+            # 240 hours at 3.00, then 960 at 2.50
+            assert batches[0][0]["start"] == START and batches[0][0]["state"] == 3.0
+            assert batches[-1][-1]["sum"] == 720.0 + 2400.0
+
+            # The second delivery's price is corrected: only hours from it on
+            add_statistics.reset_mock()
+            ledger.record(START + timedelta(days=10), 300.0, 2.00, PRICE_SOURCE_PAYMENT)
+            batches = [call.args[2] for call in add_statistics.call_args_list]
+            assert [len(rows) for rows in batches] == [COST_BACKFILL_BATCH, 460]
+            assert batches[0][0]["start"] == START + timedelta(days=10)
+            assert batches[0][0]["sum"] == 722.0
+            assert cost.total_cost == 720.0 + 1920.0
+
+        await cost._store.async_save(cost._data_to_store())
+        restarted = CostStatistics(hass, MagicMock(), ledger, "ENTRY")
+        await restarted.async_load()
+        assert restarted.as_dict() == cost.as_dict()
+        assert restarted.as_dict()["pending_hours"] == 0
+
+        cost.async_shutdown()
+        await hass.async_stop(force=True)
+
+    asyncio.run(run())
@@ -0,0 +1,42 @@
+"""Tests for portal date parsing."""
+from datetime import datetime, timedelta, timezone
+
+from custom_components.amerigas.date_parser import PortalDateParser
+
+LOCAL = timezone(timedelta(hours=-5))
+
+
+def test_portal_date_formats_match_strptime():
+    """Fast paths agree with strptime/fromisoformat for every portal format."""
+    dates = PortalDateParser()
+
+    assert dates.parse("2026-10-18T11:45:00Z", "TMReadDate", LOCAL) == datetime(
+        2026, 10, 18, 11, 45, tzinfo=timezone.utc
+    )
+    assert dates.parse("2026-10-22T18:00:00", "estDeliveryWindowTo", LOCAL) == datetime(
+        2026, 10, 22, 18, tzinfo=LOCAL
+    )
+    for value, fmt in (("08/30/2026", "%m/%d/%Y"), ("1/5/2026", "%m/%d/%Y"), ("10/29/26", "%m/%d/%y"), ("01/02/70", "%m/%d/%y")):
+        assert dates.parse(value, "LastDeliveryDate", LOCAL) == datetime.strptime(value, fmt).replace(tzinfo=LOCAL)
+
+    for empty in (None, "", "N/A", "Unknown", "None"):
+        assert dates.parse(empty, "LastDeliveryDate", LOCAL) is None
+    assert dates.parse("13/45/2026", "LastDeliveryDate", LOCAL) is None
+    assert dates.parse("10/2026", "LastDeliveryDate", LOCAL) is None
+
+
+def test_field_format_hint_and_memo():
+    """A field remembers its format, recovers when it changes, and results are memoized."""
+    dates = PortalDateParser(cache_size=2)
+
+    first = dates.parse("08/14/2026", "LastDeliveryDate", LOCAL)
+    assert dates._field_formats["LastDeliveryDate"] == "us_long"
+    assert dates.parse("08/14/2026", "LastDeliveryDate", LOCAL) is first
+
+    # The portal switches the field to ISO: the stale hint fails over
+    assert dates.parse("2026-08-14T00:00:00", "LastDeliveryDate", LOCAL) == first
+    assert dates._field_formats["LastDeliveryDate"] == "iso"
+
+    # Another timezone is a different key; the LRU stays bounded
+    assert dates.parse("08/14/2026", "LastDeliveryDate", timezone.utc).tzinfo is timezone.utc
+    assert len(dates._memo) == 2
@@ -0,0 +1,84 @@
+"""Tests for the delivery detection state machine."""
+import json
+from collections import Counter
+from datetime import datetime, timezone
+
+from custom_components.amerigas.delivery_state import (
+    PHASE_AWAITING_DATE,
+    PHASE_IDLE,
+    TRIGGER_DATE_CHANGE,
+    TRIGGER_DEFERRED_API,
+    TRIGGER_LEVEL_JUMP,
+    DeliveryState,
+)
+from custom_components.amerigas.snapshot import AccountSnapshot
+
+from .delivery_replay import Scenario, generate_scenario, replay
+
+SCENARIOS = 2000
+
+
+def test_synthetic_scenarios_detect_every_delivery_once():
+    """Thousands of scripted histories replay with exactly the expected detections."""
+    triggers: Counter[str] = Counter()
+    restarts = outages = 0
+
+    for seed in range(SCENARIOS):
+        scenario = generate_scenario(seed)
+        detections = replay(scenario)
+
+        assert [(poll, detection.trigger) for poll, detection in detections] == [
+            (expected.poll, expected.trigger) for expected in scenario.deliveries
+        ], f"seed {seed}"
+        # The portal reports whole percents, so a reading is within half a percent
+        tolerance = scenario.tank_size * 0.005 + 0.01
+        for (_, detection), expected in zip(detections, scenario.deliveries):
+            if expected.pre_fill is not None:
+                assert abs(detection.pre_fill - expected.pre_fill) <= tolerance, f"seed {seed}"
+                assert abs(detection.post_fill - expected.post_fill) <= tolerance, f"seed {seed}"
+
+        triggers.update(expected.trigger for expected in scenario.deliveries)
+        restarts += len(scenario.restarts)
+        outages += scenario.snapshots.count(None)
+
+    # Every path was exercised, across restarts and outages
+    for trigger in (TRIGGER_LEVEL_JUMP, TRIGGER_DATE_CHANGE, TRIGGER_DEFERRED_API):
+        assert triggers[trigger] > 50, f"{SCENARIOS} scenarios: {dict(triggers)}"
+    assert restarts > SCENARIOS and outages > SCENARIOS, (
+        f"{SCENARIOS} scenarios: {restarts} restarts, {outages} outages"
+    )
+
+
+def test_delivery_during_outage_detected_after_restart():
+    """State stored before a restart catches a fill that happened while the portal was down."""
+    previous = datetime(2026, 1, 2, tzinfo=timezone.utc)
+    delivered = datetime(2026, 1, 20, tzinfo=timezone.utc)
+
+    def snapshot(level: int, date: datetime, gallons: float) -> AccountSnapshot:
+        return AccountSnapshot(
+            tank_level=level, tank_size=500, last_delivery_date=date, last_delivery_gallons=gallons
+        )
+
+    scenario = Scenario(
+        seed=0,
+        tank_size=500,
+        snapshots=[
+            snapshot(30, previous, 300.0),
+            snapshot(29, previous, 300.0),
+            None,
+            None,
+            snapshot(80, previous, 300.0),
+            snapshot(80, delivered, 300.0),
+            snapshot(79, delivered, 255.9),
+        ],
+        restarts=frozenset({3}),
+    )
+
+    [(poll, detection)] = replay(scenario)
+    assert poll == 4
+    assert detection.trigger == TRIGGER_LEVEL_JUMP
+    assert (detection.pre_fill, detection.post_fill) == (145.0, 400.0)
+
+    state = DeliveryState(PHASE_AWAITING_DATE, 400.0, previous, 300.0)
+    assert DeliveryState.from_dict(json.loads(json.dumps(state.as_dict()))) == state
+    assert DeliveryState.from_dict({}).phase != PHASE_IDLE
@@ -0,0 +1,74 @@
+"""Tests for the delivery window scheduler."""
+import asyncio
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from custom_components.amerigas.const import EVENT_DELIVERY_WINDOW, WINDOW_START
+from custom_components.amerigas.delivery_windows import DeliveryWindowScheduler
+from custom_components.amerigas.snapshot import AccountSnapshot
+
+
+def test_timers_armed_per_window_and_rearmed_only_on_change(tmp_path):
+    """Unchanged windows keep their timers; moved ones are replaced; past boundaries are skipped."""
+
+    async def run():
+        hass = HomeAssistant(str(tmp_path))
+        events = []
+        hass.bus.async_listen(EVENT_DELIVERY_WINDOW, events.append)
+        now = dt_util.utcnow()
+        first = (now + timedelta(days=1), now + timedelta(days=3))
+        second = (now + timedelta(days=10), now + timedelta(days=12))
+        moved = (now + timedelta(days=11), now + timedelta(days=13))
+        open_now = (now - timedelta(hours=2), now + timedelta(hours=6))
+
+        coordinator = MagicMock()
+        coordinator.data = AccountSnapshot(delivery_windows=(first, second))
+        scheduled = []
+
+        def track(hass, action, when):
+            cancel = MagicMock()
+            scheduled.append((when, action, cancel))
+            return cancel
+
+        with patch(
+            "custom_components.amerigas.delivery_windows.async_track_point_in_time", track
+        ):
+            scheduler = DeliveryWindowScheduler(hass, coordinator, "entry")
+            scheduler.async_start()
+            assert [when for when, _, _ in scheduled] == [*first, *second]
+
+            # A refresh with the same windows arms nothing
+            coordinator.data = AccountSnapshot(tank_level=40, delivery_windows=(first, second))
+            scheduler._handle_coordinator_update()
+            assert len(scheduled) == 4
+
+            # The second order moved and a window already open appeared
+            coordinator.data = AccountSnapshot(delivery_windows=(open_now, first, moved))
+            scheduler._handle_coordinator_update()
+            assert scheduled[2][2].called and scheduled[3][2].called
+            assert not scheduled[0][2].called
+            assert sorted(when for when, _, _ in scheduled[4:]) == [open_now[1], *moved]
+            assert scheduler.windows == [open_now, first, moved]
+
+            # The first window opens
+            scheduled[0][1](first[0])
+            await hass.async_block_till_done()
+            assert events[0].data == {
+                "entry_id": "entry",
+                "boundary": WINDOW_START,
+                "window_start": first[0].isoformat(),
+                "window_end": first[1].isoformat(),
+            }
+            assert scheduler.as_dict()["windows"][1]["pending_timers"] == 1
+
+            scheduler.async_shutdown()
+            assert scheduled[1][2].called
+            assert all(cancel.called for _, _, cancel in scheduled[4:])
+            assert len(events) == 1
+
+        await hass.async_stop(force=True)
+
+    asyncio.run(run())
@@ -0,0 +1,82 @@
+"""Tests for AmeriGas config entry diagnostics."""
+import asyncio
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+
+from custom_components.amerigas.api import RAW_PAYLOAD_HISTORY, AmeriGasAPI
+from custom_components.amerigas.const import DOMAIN
+from custom_components.amerigas.diagnostics import async_get_config_entry_diagnostics
+from custom_components.amerigas.metrics import RefreshMetrics, RefreshMetricsHistory
+
+from .portal import load_account, render_dashboard
+
+
+def test_diagnostics_redacts_payloads_and_keeps_bounded_history():
+    """Raw payloads come from the bounded buffer with credentials and addresses redacted."""
+    account = load_account("multi_order")
+    page = render_dashboard(account)
+    api = AmeriGasAPI("user@example.com", "secret")
+    fetched_at = datetime(2026, 10, 18, tzinfo=timezone.utc)
+    for _ in range(RAW_PAYLOAD_HISTORY + 2):
+        api.recent_payloads.append((fetched_at, api._extract_account_data(page)))
+
+    coordinator = MagicMock(last_update_success=True, last_exception=None, stale=False)
+    coordinator.data = api._parse_account_data(account, page)
+    coordinator.metrics = RefreshMetricsHistory()
+    coordinator.metrics.append(RefreshMetrics(started_at=fetched_at, total_seconds=1.5, success=True))
+    tracker = MagicMock()
+    tracker.as_dict.return_value = {"post_fill_gallons": 0.0}
+    lifetime = MagicMock()
+    lifetime.as_dict.return_value = {"seq": 3, "total_gallons": 12.5}
+
+    prices = MagicMock()
+    prices.as_dict.return_value = {
+        "deliveries": [["2026-10-01T00:00:00+00:00", 150.0, 2.89, "last_payment"]]
+    }
+
+    cost = MagicMock()
+    cost.as_dict.return_value = {"statistic_id": "amerigas:propane_cost_entry", "hours": 2}
+
+    windows = MagicMock()
+    windows.as_dict.return_value = {"windows": []}
+
+    thresholds = MagicMock()
+    thresholds.as_dict.return_value = {"low_level": {"limit": 20.0, "value": 62, "state": False}}
+
+    hass = MagicMock()
+    hass.data = {
+        DOMAIN: {
+            "entry": {
+                "coordinator": coordinator,
+                "api": api,
+                "tracker": tracker,
+                "lifetime": lifetime,
+                "prices": prices,
+                "cost": cost,
+                "windows": windows,
+                "thresholds": thresholds,
+            }
+        }
+    }
+    entry = MagicMock(entry_id="entry")
+    entry.as_dict.return_value = {"data": {"username": "user@example.com", "password": "secret"}}
+
+    result = asyncio.run(async_get_config_entry_diagnostics(hass, entry))
+
+    assert result["entry"]["data"] == {"username": "**REDACTED**", "password": "**REDACTED**"}
+    assert len(result["raw_payloads"]) == RAW_PAYLOAD_HISTORY
+    payload = result["raw_payloads"][-1]["payload"]
+    assert payload["Street"] == payload["ShipToAccount"] == "**REDACTED**"
+    assert payload["myOrdersViewModel"]["LstOpenOrders"][0]["orderNumber"] == "**REDACTED**"
+    assert payload["TankSize"] == "1000"
+    assert result["parsed"]["service_address"] == "**REDACTED**"
+    assert result["parsed"]["tank_size"] == 1000
+    assert result["schema"] == {"missing": [], "retyped": [], "renamed": {}}
+    assert result["delivery_tracker"] == {"post_fill_gallons": 0.0}
+    assert result["lifetime"]["total_gallons"] == 12.5
+    assert len(result["price_ledger"]["deliveries"]) == 1
+    assert result["cost_statistics"]["hours"] == 2
+    assert result["delivery_windows"] == {"windows": []}
+    assert result["thresholds"]["low_level"]["state"] is False
+    assert result["refresh_metrics"]["summary"]["total_seconds_p50"] == 1.5
+    assert "secret" not in repr(result) and "1 FARM LN" not in repr(result)
@@ -0,0 +1,84 @@
+"""Import-time budget and footprint of the AmeriGas integration."""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+# Modules Home Assistant core has already imported before it loads an
+# integration's __init__.py. Preloading them keeps the measurement to the
+# integration's own cost rather than HA's.
+HA_PRELOADED = (
+    "aiohttp",
+    "homeassistant.config_entries",
+    "homeassistant.helpers.config_validation",
+    "homeassistant.helpers.entity_registry",
+    "homeassistant.helpers.event",
+    "homeassistant.helpers.restore_state",
+    "homeassistant.helpers.start",
+    "homeassistant.helpers.storage",
+    "homeassistant.helpers.update_coordinator",
+)
+
+# Cumulative import time allowed for custom_components.amerigas (µs), with
+# bytecode cached. Currently ~15 ms; generous headroom for slow CI runners.
+IMPORT_BUDGET_US = 60_000
+
+# Platform modules HA imports on its own when forwarding entry setups.
+# Pulling them in from __init__.py puts their cost on the setup path.
+PLATFORM_MODULES = (
+    "homeassistant.components.binary_sensor",
+    "homeassistant.components.number",
+    "homeassistant.components.sensor",
+    "custom_components.amerigas.binary_sensor",
+    "custom_components.amerigas.number",
+    "custom_components.amerigas.sensor",
+)
+
+# Modules only needed off the common path, imported where they are used:
+# the recorder when writing cost statistics, difflib when a schema drifts.
+DEFERRED_MODULES = (
+    "difflib",
+    "homeassistant.components.recorder",
+)
+
+
+def _import_profile() -> dict[str, int]:
+    """Return {module: cumulative µs} for modules imported by the integration."""
+    code = "; ".join(f"import {module}" for module in HA_PRELOADED)
+    code += "; import custom_components.amerigas"
+    cwd = Path(__file__).resolve().parent.parent
+    # A cold import compiles every module first (30-50 ms); a throwaway run
+    # writes the bytecode so the measured one times the import alone.
+    env = {key: value for key, value in os.environ.items() if key != "PYTHONDONTWRITEBYTECODE"}
+    subprocess.run([sys.executable, "-c", code], cwd=cwd, env=env, check=True)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=cwd,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    profile: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = (part.strip() for part in line[len("import time:"):].split("|"))
+        profile[module] = int(cumulative)
+
+    # Keep only what was imported after the HA preloads
+    modules = list(profile)
+    start = max(modules.index(module) for module in HA_PRELOADED) + 1
+    return {module: profile[module] for module in modules[start:]}
+
+
+def test_integration_import_footprint():
+    """Importing the integration stays cheap and pulls in no platforms, components or deferred modules."""
+    profile = _import_profile()
+
+    assert profile["custom_components.amerigas"] < IMPORT_BUDGET_US, profile
+    assert not [module for module in PLATFORM_MODULES if module in profile], profile
+    assert not [module for module in DEFERRED_MODULES if module in profile], profile
+    # No Home Assistant component at all is loaded on the integration's behalf
+    assert not [module for module in profile if module.startswith("homeassistant.components.")], profile
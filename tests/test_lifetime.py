@@ -0,0 +1,130 @@
+"""Tests for the durable lifetime consumption accumulator."""
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.amerigas.lifetime import (
+    LIFETIME_COMPACT_EVERY,
+    ConsumptionFilter,
+    LifetimeAccumulator,
+)
+from custom_components.amerigas.snapshot import AccountSnapshot
+
+JOURNAL = Path(".storage/amerigas.entry.lifetime.journal")
+
+
+def test_deltas_survive_restart_from_checkpoint_and_journal_tail(tmp_path):
+    """Each delta is journaled; a restart restores the checkpoint plus the tail, once."""
+
+    async def run():
+        hass = HomeAssistant(str(tmp_path))
+        coordinator = MagicMock()
+        accumulator = LifetimeAccumulator(hass, coordinator, "entry")
+        await accumulator.async_load()
+        assert accumulator.restored is False
+
+        # Baseline, then 1% (10 gal) a poll
+        polls = LIFETIME_COMPACT_EVERY + 5
+        for level in range(90, 90 - polls, -1):
+            coordinator.data = AccountSnapshot(tank_level=level, tank_size=1000)
+            accumulator._handle_coordinator_update()
+            await hass.async_block_till_done()
+        assert accumulator.total_gallons == 10.0 * (polls - 1)
+
+        journal = tmp_path / JOURNAL
+        tail = journal.read_text().splitlines()
+        assert len(tail) == polls - LIFETIME_COMPACT_EVERY
+        # A line already in the checkpoint (crash before the journal was
+        # emptied) and a torn write are both skipped on replay
+        stale = {"seq": 2, "gallons": 890.0, "delta": 10.0, "at": None}
+        journal.write_text(json.dumps(stale) + "\n" + "\n".join(tail) + '\n{"seq": 99, "gal')
+
+        restarted = LifetimeAccumulator(hass, coordinator, "entry")
+        await restarted.async_load()
+        assert restarted.restored is True
+        assert restarted.total_gallons == accumulator.total_gallons
+        assert restarted.previous_gallons == accumulator.previous_gallons
+        assert restarted.largest_consumption == 10.0
+
+        await accumulator.async_shutdown()
+        await restarted.async_shutdown()
+        await hass.async_stop(force=True)
+
+    asyncio.run(run())
+
+
+def test_sensor_total_imported_once(tmp_path):
+    """The total kept by the sensor is adopted on the first start only."""
+
+    async def run():
+        hass = HomeAssistant(str(tmp_path))
+        coordinator = MagicMock()
+        accumulator = LifetimeAccumulator(hass, coordinator, "entry")
+        await accumulator.async_load()
+
+        await accumulator.async_import(250.5, 400.0)
+        await accumulator.async_import(999.0, None)
+        assert (accumulator.total_gallons, accumulator.previous_gallons) == (250.5, 400.0)
+
+        restarted = LifetimeAccumulator(hass, coordinator, "entry")
+        await restarted.async_load()
+        assert restarted.restored is True
+        assert restarted.total_gallons == 250.5
+
+        await hass.async_stop(force=True)
+
+    asyncio.run(run())
+
+
+def test_flickering_and_repeated_readings_add_no_ghost_consumption(tmp_path):
+    """Only new monitor readings are ingested; a level flickering by a step is counted once."""
+
+    async def run():
+        hass = HomeAssistant(str(tmp_path))
+        coordinator = MagicMock()
+        accumulator = LifetimeAccumulator(hass, coordinator, "entry")
+        await accumulator.async_load()
+        deltas = []
+        accumulator.async_add_consumption_listener(lambda at, gallons: deltas.append(gallons))
+
+        # (hours since the first reading, level %) on a 1000 gal tank
+        readings = [
+            (0, 55), (6, 54), (12, 55), (18, 54), (24, 55), (30, 53), (30, 53), (30, 53), (36, 80)
+        ]
+        for hours, level in readings:
+            coordinator.data = AccountSnapshot(
+                tank_level=level,
+                tank_size=1000,
+                last_tank_reading=datetime(2026, 1, 1, tzinfo=timezone.utc) + timedelta(hours=hours),
+            )
+            accumulator._handle_coordinator_update()
+        await hass.async_block_till_done()
+
+        # 550 -> 530 is 20 gal; the dip to 540 after the rise back is not counted again
+        assert accumulator.total_gallons == 20.0
+        assert deltas == [10.0, 10.0]
+        assert accumulator.previous_gallons == 800.0
+        # Repeated polls of the 30 h reading did nothing
+        assert accumulator.total_triggers == 6
+        assert accumulator.ignored_triggers == 3
+        assert accumulator.filter.resolution == 10.0
+        assert 0 < accumulator.filter.noise < 10.0
+
+        await hass.async_stop(force=True)
+
+    asyncio.run(run())
+
+
+def test_refill_threshold_does_not_grow_with_noise():
+    """A rise the DeliveryTracker reports as a delivery rebases a noisy tank too."""
+    # A noisy 1000 gal tank: whole-percent steps and ~20 gal of flicker
+    consumption_filter = ConsumptionFilter(resolution=10.0, noise=20.0, jump_threshold=10.0)
+    assert consumption_filter.band == 40.0
+
+    assert consumption_filter.update(500.0, 505.0) is None
+    assert consumption_filter.update(500.0, 515.0) == 0.0
+    assert consumption_filter.update(515.0, 470.0) == 45.0
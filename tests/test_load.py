@@ -0,0 +1,132 @@
+"""Load and soak tests driving simulated accounts through the real coordinator.
+
+Sizes default to something that runs in a few seconds. Override them for an
+actual load run, e.g.::
+
+    AMERIGAS_LOAD_ACCOUNTS=500 AMERIGAS_LOAD_DAYS=90 python -m pytest -s tests/test_load.py
+
+Set AMERIGAS_LOAD_OUTPUT=<path> to write the fleet report as JSON.
+"""
+import asyncio
+import json
+import os
+import time
+import tracemalloc
+from collections import Counter
+from datetime import timedelta
+from pathlib import Path
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+
+from custom_components.amerigas.api import AmeriGasAPI
+from custom_components.amerigas.const import EVENT_DELIVERY_DETECTED, EVENT_REFRESH
+from custom_components.amerigas.coordinator import AmeriGasDataUpdateCoordinator
+from custom_components.amerigas.delivery_tracker import DeliveryTracker
+
+from .emulator import EmulatedAccount, PortalEmulator, TankCurve
+
+LOAD_ACCOUNTS = int(os.environ.get("AMERIGAS_LOAD_ACCOUNTS", "12"))
+LOAD_DAYS = int(os.environ.get("AMERIGAS_LOAD_DAYS", "10"))
+CRON_STEP = timedelta(hours=6)
+
+
+async def _run_fleet(tmp_path, emulator: PortalEmulator, accounts: int, days: int) -> dict:
+    """Drive ``accounts`` entries through ``days`` of cron ticks; return a report."""
+    hass = HomeAssistant(str(tmp_path))
+    await er.async_load(hass)
+    events: Counter[str] = Counter()
+    for event_type in (EVENT_REFRESH, EVENT_DELIVERY_DETECTED):
+        hass.bus.async_listen(event_type, lambda event: events.update([event.event_type]))
+    await emulator.start_server()
+
+    fleet = []
+    for index in range(accounts):
+        account = emulator.add_account(
+            EmulatedAccount(
+                email=f"load{index}@example.com",
+                password=f"pw{index}",
+                curve=TankCurve(
+                    tank_size=(250, 500, 1000)[index % 3],
+                    start_level=70 + index % 10,
+                    daily_usage=1.0 + (index % 5) * 0.5,
+                    # Every other account gets a delivery mid-run
+                    deliveries=[(days / 2 + 0.1, 80.0)] if index % 2 else [],
+                ),
+            )
+        )
+        api = AmeriGasAPI(account.email, account.password, base_url=emulator.base_url)
+        coordinator = AmeriGasDataUpdateCoordinator(hass, api, f"load_{index}")
+        # Cron ticks arrive back to back on the virtual clock; disable the
+        # request_refresh cooldown that would otherwise defer them.
+        coordinator._debounced_refresh.cooldown = 0
+        fleet.append((account, coordinator, DeliveryTracker(hass, coordinator, f"load_{index}")))
+
+    tracemalloc.start()
+    refreshes = failures = 0
+    started = time.perf_counter()
+    try:
+        for _ in range(days * 4):
+            emulator.advance(CRON_STEP)
+            for _, coordinator, _ in fleet:
+                coordinator._async_scheduled_refresh(emulator.now)
+            await hass.async_block_till_done()
+            refreshes += len(fleet)
+            failures += sum(not coordinator.last_update_success for _, coordinator, _ in fleet)
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        for _, coordinator, _ in fleet:
+            await coordinator.async_shutdown()
+        await emulator.close()
+        await hass.async_stop(force=True)
+
+    return {
+        "accounts": accounts,
+        "days": days,
+        "refreshes": refreshes,
+        "failures": failures,
+        "refreshes_per_second": round(refreshes / elapsed, 1),
+        "peak_memory_kb_per_account": round(peak / 1024 / accounts, 1),
+        "portal": dict(emulator.stats),
+        "deliveries_scripted": sum(bool(account.curve.deliveries) for account, _, _ in fleet),
+        "deliveries_detected": sum(tracker.post_fill_gallons > 0 for _, _, tracker in fleet),
+        "events": dict(events),
+        "with_data": sum(coordinator.data is not None for _, coordinator, _ in fleet),
+        "logins": sum(
+            metrics.logins for _, coordinator, _ in fleet for metrics in coordinator.metrics
+        ),
+        "refresh_seconds_p95": max(
+            coordinator.metrics.percentile("total_seconds", 95) or 0 for _, coordinator, _ in fleet
+        ),
+    }
+
+
+def test_fleet_soak(tmp_path):
+    """A fleet survives injected portal errors and detects every scripted delivery."""
+    emulator = PortalEmulator(error_rate=0.05, seed=1)
+    report = asyncio.run(_run_fleet(tmp_path, emulator, LOAD_ACCOUNTS, LOAD_DAYS))
+    if output := os.environ.get("AMERIGAS_LOAD_OUTPUT"):
+        Path(output).write_text(json.dumps(report, indent=2) + "\n")
+
+    assert report["with_data"] == LOAD_ACCOUNTS
+    assert report["deliveries_detected"] == report["deliveries_scripted"]
+    assert report["events"][EVENT_DELIVERY_DETECTED] >= report["deliveries_scripted"]
+    assert 0 < report["events"][EVENT_REFRESH] <= report["refreshes"]
+    # Every failed refresh maps to an injected portal error
+    assert 0 < report["failures"] <= report["portal"]["injected_errors"]
+    assert report["portal"].get("login_rejected", 0) == 0
+
+
+def test_fleet_session_expiry(tmp_path):
+    """Sessions expiring between login and dashboard fail cleanly, without data."""
+    emulator = PortalEmulator(latency=0.02, session_ttl=0.01)
+    report = asyncio.run(_run_fleet(tmp_path, emulator, accounts=3, days=1))
+
+    assert report["failures"] == report["refreshes"]
+    # One login per refresh: a dropped session is not retried
+    assert report["portal"]["session_expired"] == report["refreshes"]
+    assert report["portal"]["login_requests"] == report["refreshes"]
+    assert report["logins"] == report["refreshes"]
+    assert report["with_data"] == 0
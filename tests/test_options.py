@@ -0,0 +1,162 @@
+"""Tests for applying entry options and credentials to the running services."""
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+
+from custom_components.amerigas import _async_update_listener
+from custom_components.amerigas.api import AmeriGasAPI
+from custom_components.amerigas.const import (
+    CONF_API_TIMEOUT,
+    CONF_JUMP_THRESHOLD,
+    CONF_LOW_LEVEL_PERCENT,
+    CONF_NOISE_THRESHOLD,
+    CONF_REFRESH_HOURS,
+    CONF_SCAN_INTERVAL,
+    DATA_VALIDATED,
+    DOMAIN,
+    TRIGGER_MANUAL,
+)
+from custom_components.amerigas.coordinator import AmeriGasDataUpdateCoordinator
+from custom_components.amerigas.delivery_tracker import DeliveryTracker
+from custom_components.amerigas.lifetime import LifetimeAccumulator
+from custom_components.amerigas.snapshot import AccountSnapshot
+from custom_components.amerigas.thresholds import THRESHOLD_LOW_LEVEL, ThresholdMonitor
+
+
+def test_options_apply_live_and_reschedule_only_on_change(tmp_path):
+    """New options reach the client, schedule, tracker and filters without a reload."""
+
+    async def run():
+        hass = HomeAssistant(str(tmp_path))
+        api = AmeriGasAPI("user@example.com", "pw")
+        coordinator = AmeriGasDataUpdateCoordinator(hass, api, "entry")
+        entry = SimpleNamespace(
+            entry_id="entry",
+            data={CONF_USERNAME: "user@example.com", CONF_PASSWORD: "pw"},
+            options={},
+        )
+        hass.data[DOMAIN] = {
+            "entry": {
+                "api": api,
+                "coordinator": coordinator,
+                "tracker": DeliveryTracker(hass, coordinator, "entry"),
+                "lifetime": LifetimeAccumulator(hass, coordinator, "entry"),
+                "thresholds": ThresholdMonitor(hass, coordinator, "entry", {}),
+            }
+        }
+        data = hass.data[DOMAIN]["entry"]
+
+        with patch(
+            "custom_components.amerigas.coordinator.async_track_time_change",
+            side_effect=lambda *args, **kwargs: MagicMock(),
+        ) as track:
+            # Defaults: every 6 hours from midnight
+            await _async_update_listener(hass, entry)
+            assert coordinator.refresh_hours == [0, 6, 12, 18]
+
+            entry.options = {
+                CONF_SCAN_INTERVAL: 6,
+                CONF_API_TIMEOUT: 90,
+                CONF_JUMP_THRESHOLD: 25.0,
+                CONF_NOISE_THRESHOLD: 2.0,
+                CONF_LOW_LEVEL_PERCENT: 30,
+            }
+            await _async_update_listener(hass, entry)
+            # Same hours: the cron subscription is kept
+            assert track.call_count == 1
+            assert api.timeout == 90.0
+            assert data["tracker"].machine.jump_threshold == 25.0
+            lifetime_filter = data["lifetime"].filter
+            assert (lifetime_filter.min_band, lifetime_filter.jump_threshold) == (2.0, 25.0)
+            assert data["thresholds"].limits[THRESHOLD_LOW_LEVEL] == 30.0
+
+            # Explicit hours win over the scan interval
+            entry.options = {**entry.options, CONF_REFRESH_HOURS: ["18", "5"]}
+            await _async_update_listener(hass, entry)
+            assert track.call_count == 2
+            assert coordinator.refresh_hours == [5, 18]
+            assert track.call_args.kwargs["hour"] == [5, 18]
+
+        await coordinator.async_shutdown()
+        await hass.async_stop(force=True)
+
+    asyncio.run(run())
+
+
+def test_credentials_hot_swapped_with_one_refresh(tmp_path):
+    """New credentials reach the live client; its cookies are dropped and one refresh runs."""
+
+    async def run():
+        hass = HomeAssistant(str(tmp_path))
+        api = AmeriGasAPI("old@example.com", "old")
+        session = await api._get_session()
+        session.cookie_jar.update_cookies({"ASP.NET_SessionId": "old-login"})
+        coordinator = MagicMock(async_request_refresh=AsyncMock())
+        entry = SimpleNamespace(
+            entry_id="entry",
+            data={CONF_USERNAME: "new@example.com", CONF_PASSWORD: "new"},
+            options={},
+        )
+        hass.data[DOMAIN] = {
+            "entry": {
+                "api": api,
+                "coordinator": coordinator,
+                "tracker": MagicMock(),
+                "lifetime": MagicMock(),
+                "thresholds": MagicMock(),
+            }
+        }
+
+        await _async_update_listener(hass, entry)
+        assert (api.username, api.password) == ("new@example.com", "new")
+        assert len(session.cookie_jar) == 0
+        assert coordinator.async_request_refresh.await_count == 1
+
+        # The options step saving afterwards does not log in again
+        await _async_update_listener(hass, entry)
+        assert coordinator.async_request_refresh.await_count == 1
+
+        await api.close()
+        await hass.async_stop(force=True)
+
+    asyncio.run(run())
+
+
+def test_credentials_seeded_from_the_validated_fetch(tmp_path):
+    """The snapshot the options flow validated with replaces the second fetch."""
+
+    async def run():
+        hass = HomeAssistant(str(tmp_path))
+        api = AmeriGasAPI("user@example.com", "old")
+        coordinator = MagicMock(async_request_refresh=AsyncMock(), auth_failed=True)
+        entry = SimpleNamespace(
+            entry_id="entry",
+            data={CONF_USERNAME: "user@example.com", CONF_PASSWORD: "new"},
+            options={},
+        )
+        hass.data[DOMAIN] = {
+            "entry": {
+                "api": api,
+                "coordinator": coordinator,
+                "tracker": MagicMock(),
+                "lifetime": MagicMock(),
+                "thresholds": MagicMock(),
+            }
+        }
+        snapshot = AccountSnapshot(tank_level=55, tank_size=500)
+        hass.data[DATA_VALIDATED] = {"user@example.com": snapshot}
+
+        await _async_update_listener(hass, entry)
+        assert api.password == "new"
+        assert coordinator.auth_failed is False
+        coordinator.async_seed.assert_called_once_with(snapshot, TRIGGER_MANUAL)
+        coordinator.async_update_listeners.assert_called_once_with()
+        coordinator.async_request_refresh.assert_not_awaited()
+        assert hass.data[DATA_VALIDATED] == {}
+
+        await hass.async_stop(force=True)
+
+    asyncio.run(run())
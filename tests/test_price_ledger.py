@@ -0,0 +1,80 @@
+"""Tests for the per-delivery price history."""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.amerigas.price_ledger import (
+    PRICE_SOURCE_BALANCE,
+    PRICE_SOURCE_PAYMENT,
+    PriceLedger,
+)
+from custom_components.amerigas.snapshot import AccountSnapshot
+
+
+def _day(day: int) -> datetime:
+    return datetime(2026, 1, 1, tzinfo=timezone.utc) + timedelta(days=day)
+
+
+def test_price_at_and_period_totals_from_prefix_sums():
+    """Deliveries recorded out of order are indexed by date; corrections rebuild the sums."""
+    ledger = PriceLedger(MagicMock(), MagicMock(), "entry")
+    assert ledger.record(_day(100), 200.0, 3.00, PRICE_SOURCE_PAYMENT)
+    assert ledger.record(_day(10), 100.0, 2.50, PRICE_SOURCE_PAYMENT)
+    assert ledger.record(_day(200), 300.0, 2.00, PRICE_SOURCE_BALANCE)
+    changed = []
+    ledger.async_add_price_listener(changed.append)
+
+    assert ledger.price_at(_day(5)) is None
+    assert ledger.price_at(_day(10)) == 2.50
+    assert ledger.price_at(_day(150)) == 3.00
+    assert ledger.totals_between(_day(0), _day(200)) == (300.0, 850.0)
+    assert ledger.average_price_between(_day(50), _day(365)) == 2.40
+    assert ledger.average_price_between(_day(300), _day(365)) is None
+
+    # Same values: nothing to do; a corrected price replaces the entry in place
+    assert not ledger.record(_day(100), 200.0, 3.00, PRICE_SOURCE_PAYMENT)
+    assert ledger.record(_day(100), 200.0, 3.10, PRICE_SOURCE_PAYMENT)
+    assert len(ledger) == 3
+    assert changed == [_day(100)]
+    assert ledger.totals_between(_day(0), _day(365)) == (600.0, 250.0 + 620.0 + 600.0)
+
+
+def test_ledger_follows_snapshots_and_persists(tmp_path):
+    """The balance-based price is replaced once the payment arrives, and survives a restart."""
+
+    async def run():
+        hass = HomeAssistant(str(tmp_path))
+        coordinator = MagicMock()
+        ledger = PriceLedger(hass, coordinator, "entry")
+        await ledger.async_load()
+
+        delivered = _day(30)
+        coordinator.data = AccountSnapshot(
+            last_delivery_date=delivered,
+            last_delivery_gallons=150.0,
+            last_payment_date=_day(2),
+            account_balance=450.0,
+        )
+        ledger._handle_coordinator_update()
+        assert (ledger.prices, ledger.sources) == ([3.0], [PRICE_SOURCE_BALANCE])
+
+        coordinator.data = AccountSnapshot(
+            last_delivery_date=delivered,
+            last_delivery_gallons=150.0,
+            last_payment_date=_day(40),
+            last_payment_amount=435.0,
+        )
+        ledger._handle_coordinator_update()
+        assert (ledger.prices, ledger.sources) == ([2.9], [PRICE_SOURCE_PAYMENT])
+
+        await ledger._store.async_save(ledger._data_to_store())
+        restarted = PriceLedger(hass, coordinator, "entry")
+        await restarted.async_load()
+        assert restarted.dates == [delivered]
+        assert restarted.price_at(_day(60)) == 2.9
+
+        await hass.async_stop(force=True)
+
+    asyncio.run(run())
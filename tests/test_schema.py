@@ -0,0 +1,44 @@
+"""Tests for portal payload schema drift detection."""
+from custom_components.amerigas.schema import CLEAN_REPORT, PortalSchemaValidator
+
+from .portal import load_account
+
+
+def test_validator_detects_renamed_and_retyped_fields():
+    """Renames are paired with the new key; retyped values are flagged; clean payloads reset."""
+    account = load_account("multi_order")
+    validator = PortalSchemaValidator()
+    assert validator.validate(account) is CLEAN_REPORT
+
+    drifted = dict(account)
+    drifted["AmountDue"] = drifted.pop("AmounDue")
+    drifted["ForecastTankLevel"] = "N/A"
+    drifted["myOrdersViewModel"] = []
+    report = validator.validate(drifted)
+
+    assert report.missing == ("AmounDue",)
+    assert report.renamed == (("AmounDue", "AmountDue"),)
+    assert report.retyped == ("ForecastTankLevel", "myOrdersViewModel")
+    assert report.stale_fields == {
+        "amount_due",
+        "tank_level",
+        "last_delivery_date",
+        "last_delivery_gallons",
+        "next_delivery_date",
+        "delivery_windows",
+    }
+    assert "AmounDue (renamed to AmountDue?)" in report.describe()
+
+    # Blank values are not drift, and a clean payload clears the report
+    blanked = dict(account, RunOutDays="", TMReadDate=None)
+    assert validator.validate(blanked) is CLEAN_REPORT
+    assert validator.last_report is CLEAN_REPORT
+
+    # Keys the portal omits for some accounts are not drift either, on any refresh
+    no_monitor = {
+        key: value for key, value in account.items() if key not in ("TMReadDate", "NextDeliveryDate")
+    }
+    fresh = PortalSchemaValidator()
+    for _ in range(2):
+        assert fresh.validate(no_monitor) is CLEAN_REPORT
+    assert fresh._fingerprint == frozenset(no_monitor)
@@ -3,8 +3,16 @@ import homeassistant.const
 if not hasattr(homeassistant.const.UnitOfVolumeFlowRate, 'GALLONS_PER_DAY'):
     homeassistant.const.UnitOfVolumeFlowRate.GALLONS_PER_DAY = "gal/d"
 
+from datetime import datetime, timezone
 from unittest.mock import MagicMock
-from custom_components.amerigas.sensor import AmeriGasSensorBase
+from custom_components.amerigas.sensor import (
+    REFRESH_METRIC_SENSOR_DESCRIPTIONS,
+    AmeriGasRefreshMetricSensor,
+    BASE_SENSOR_DESCRIPTIONS,
+    AmeriGasSensor,
+    AmeriGasSensorBase,
+)
+from custom_components.amerigas.snapshot import AccountSnapshot
 
 def test_calculate_gallons_remaining_bounds():
     """Test boundary conditions for _calculate_gallons_remaining."""
@@ -12,46 +20,38 @@ def test_calculate_gallons_remaining_bounds():
     sensor = AmeriGasSensorBase(coordinator, "test_entry")
 
     # 1. Test percent exactly 0 (boundary)
-    coordinator.data = {"tank_size": 100, "tank_level": 0}
+    coordinator.data = AccountSnapshot(tank_size=100, tank_level=0)
     assert sensor._calculate_gallons_remaining() == 0.0
 
     # 2. Test percent < 0 (should treat as 0)
-    coordinator.data = {"tank_size": 100, "tank_level": -5}
+    coordinator.data = AccountSnapshot(tank_size=100, tank_level=-5)
     assert sensor._calculate_gallons_remaining() == 0.0
 
     # 3. Test percent exactly 100 (boundary)
-    coordinator.data = {"tank_size": 100, "tank_level": 100}
+    coordinator.data = AccountSnapshot(tank_size=100, tank_level=100)
     assert sensor._calculate_gallons_remaining() == 100.0
 
     # 4. Test percent > 100 (should treat as 100)
-    coordinator.data = {"tank_size": 100, "tank_level": 105}
+    coordinator.data = AccountSnapshot(tank_size=100, tank_level=105)
     assert sensor._calculate_gallons_remaining() == 100.0
 
-    # 5. Test normal bounds check for missing percent defaults to 0
-    coordinator.data = {"tank_size": 100, "tank_level": None}
-    assert sensor._calculate_gallons_remaining() == 0.0
+    # 5. A level the portal did not report is unknown, not 0%
+    coordinator.data = AccountSnapshot(tank_size=100, tank_level=None)
+    assert sensor._calculate_gallons_remaining() is None
 
-    # 6. Test normal bounds check for missing tank_size defaults to 500 (from const DEFAULT_TANK_SIZE)
-    # The default is 500, but we test the general logic that it falls back to something valid
-    coordinator.data = {"tank_size": None, "tank_level": 50}
-    result = sensor._calculate_gallons_remaining()
-    assert result == 250.0  # 50% of 500 (DEFAULT_TANK_SIZE)
+    # 6. A missing tank_size is unknown: no gallons from the 500 gal default
+    coordinator.data = AccountSnapshot(tank_size=None, tank_level=50)
+    assert sensor._calculate_gallons_remaining() is None
 
     # 7. Test normal operation
-    coordinator.data = {"tank_size": 120, "tank_level": 50}
+    coordinator.data = AccountSnapshot(tank_size=120, tank_level=50)
     assert sensor._calculate_gallons_remaining() == 60.0
 
-    # 8. Test tank_size <= 0
-    # Because of `tank_size = self.coordinator.data.get("tank_size") or DEFAULT_TANK_SIZE`
-    # if tank_size is explicitly 0, `0 or 500` evaluates to 500!
-    # Let's verify what actually happens in the code.
-    coordinator.data = {"tank_size": 0, "tank_level": 50}
-    # When tank_size=0, `0 or 500` = 500. So it uses DEFAULT_TANK_SIZE!
-    assert sensor._calculate_gallons_remaining() == 250.0
-
-    # If tank_size is negative, it won't evaluate to false in `or DEFAULT_TANK_SIZE`
-    coordinator.data = {"tank_size": -10, "tank_level": 50}
-    # It will use -10, but the code checks `if tank_size <= 0: return None`
+    # 8. A non-positive tank_size is invalid rather than replaced by the default
+    coordinator.data = AccountSnapshot(tank_size=0, tank_level=50)
+    assert sensor._calculate_gallons_remaining() is None
+
+    coordinator.data = AccountSnapshot(tank_size=-10, tank_level=50)
     assert sensor._calculate_gallons_remaining() is None
 
 def test_calculate_used_since_delivery():
@@ -60,7 +60,7 @@ def test_calculate_used_since_delivery():
     sensor = AmeriGasSensorBase(coordinator, "test_entry")
 
     # 1. No data
-    coordinator.data = {}
+    coordinator.data = None
     assert sensor._calculate_used_since_delivery() == (None, "unknown")
 
     # Mock the priority getters for the rest of the tests
@@ -68,14 +68,14 @@ def test_calculate_used_since_delivery():
     sensor._get_pre_delivery_level = MagicMock(return_value=None)
 
     # 2. Priority 1: post_fill_gallons (tank monitor)
-    coordinator.data = {"tank_size": 100, "tank_level": 40}  # current = 40
+    coordinator.data = AccountSnapshot(tank_size=100, tank_level=40)  # current = 40
     sensor._get_post_fill_gallons.return_value = 85.0
     # used = 85.0 - 40.0 = 45.0
     assert sensor._calculate_used_since_delivery() == (45.0, "tank_monitor")
     sensor._get_post_fill_gallons.return_value = None  # Reset for next tests
 
     # 3. Priority 2: pre_delivery_level + last_delivery
-    coordinator.data = {"tank_size": 100, "tank_level": 40, "last_delivery_gallons": 50}
+    coordinator.data = AccountSnapshot(tank_size=100, tank_level=40, last_delivery_gallons=50)
     sensor._get_pre_delivery_level.return_value = 30.0
     # starting_level = 30 + 50 = 80. used = 80 - 40 = 40.0
     assert sensor._calculate_used_since_delivery() == (40.0, "auto_captured")
@@ -87,28 +87,93 @@ def test_calculate_used_since_delivery():
     sensor._get_pre_delivery_level.return_value = None  # Reset
 
     # 4. Priority 3: Heuristic based on small delivery (< 50)
-    coordinator.data = {"tank_size": 100, "tank_level": 40, "last_delivery_gallons": 30}
+    coordinator.data = AccountSnapshot(tank_size=100, tank_level=40, last_delivery_gallons=30)
     # last_delivery < 50 => estimated_before = 100 * 0.65 = 65
     # starting_level = min(65 + 30, 100) = 95. used = 95 - 40 = 55.0
     assert sensor._calculate_used_since_delivery() == (55.0, "small_delivery_estimate")
 
     # 5. Priority 3: Heuristic based on large delivery (>= 50)
-    coordinator.data = {"tank_size": 100, "tank_level": 40, "last_delivery_gallons": 60}
+    coordinator.data = AccountSnapshot(tank_size=100, tank_level=40, last_delivery_gallons=60)
     # last_delivery >= 50 => estimated_before = 100 * 0.20 = 20
     # starting_level = min(20 + 60, 100) = 80. used = 80 - 40 = 40.0
     assert sensor._calculate_used_since_delivery() == (40.0, "large_delivery_estimate")
 
     # 5b. Priority 3 with cap
-    coordinator.data = {"tank_size": 100, "tank_level": 40, "last_delivery_gallons": 90}
+    coordinator.data = AccountSnapshot(tank_size=100, tank_level=40, last_delivery_gallons=90)
     # starting_level = min(20 + 90, 100) = 100. used = 100 - 40 = 60.0
     assert sensor._calculate_used_since_delivery() == (60.0, "large_delivery_estimate")
 
     # 6. Fallback: Assumed 80% fill
-    coordinator.data = {"tank_size": 100, "tank_level": 40}  # No last_delivery_gallons
+    coordinator.data = AccountSnapshot(tank_size=100, tank_level=40)  # No last_delivery_gallons
     # starting_level = 100 * 0.8 = 80. used = 80 - 40 = 40.0
     assert sensor._calculate_used_since_delivery() == (40.0, "assumed_80_percent")
 
     # 7. Max 0 bound check
-    coordinator.data = {"tank_size": 100, "tank_level": 90}
+    coordinator.data = AccountSnapshot(tank_size=100, tank_level=90)
     # starting_level = 80. used = 80 - 90 = -10 => Max(0, -10) = 0.0
     assert sensor._calculate_used_since_delivery() == (0.0, "assumed_80_percent")
+
+def test_base_sensor_descriptions():
+    """Each table row yields a sensor with its legacy unique_id and value."""
+    coordinator = MagicMock(stale=False, snapshot_fetched_at=None, stale_fields=frozenset())
+    coordinator.data = AccountSnapshot(
+        tank_level=62,
+        tank_monitor="Yes",
+        delivery_type="Auto Delivery",
+        amount_due=12.5,
+        payment_terms="Due within 10 days",
+        payment_terms_days=10,
+        next_delivery_date=None,
+    )
+
+    sensors = {
+        description.key: AmeriGasSensor(coordinator, "test_entry", description)
+        for description in BASE_SENSOR_DESCRIPTIONS
+    }
+
+    # Unique IDs predate the description table and must not change
+    assert len(sensors) == 16
+    assert all(s.unique_id == f"amerigas_{key}" for key, s in sensors.items())
+
+    assert sensors["tank_level"].native_value == 62
+    assert sensors["tank_level"].extra_state_attributes == {
+        "tank_monitor": "Yes",
+        "delivery_type": "Auto Delivery",
+        "stale": False,
+        "snapshot_fetched_at": None,
+        "stale_fields": [],
+    }
+    assert sensors["amount_due"].extra_state_attributes["payment_terms_days"] == 10
+    assert sensors["next_delivery_date"].extra_state_attributes == {
+        "has_scheduled_delivery": False,
+        "delivery_window_start": None,
+        "delivery_window_end": None,
+        "open_delivery_windows": 0,
+        "stale": False,
+        "snapshot_fetched_at": None,
+        "stale_fields": [],
+    }
+    assert sensors["tank_size"].native_value is None
+
+
+def test_staleness_exposed_as_attributes():
+    """A cached or drifted snapshot shows in attributes, not in assumed_state."""
+    fetched_at = datetime(2026, 1, 1, 6, tzinfo=timezone.utc)
+    coordinator = MagicMock(
+        stale=True, snapshot_fetched_at=fetched_at, stale_fields=frozenset({"amount_due"})
+    )
+    coordinator.data = AccountSnapshot(tank_level=62, tank_size=500)
+    sensor = AmeriGasSensor(coordinator, "test_entry", BASE_SENSOR_DESCRIPTIONS[0])
+
+    attributes = sensor.extra_state_attributes
+    assert sensor.assumed_state is False
+    assert attributes["stale"] is True
+    assert attributes["snapshot_fetched_at"] == "2026-01-01T06:00:00+00:00"
+    assert attributes["stale_fields"] == ["amount_due"]
+    # Kept out of the recorder: they change on every refresh
+    assert {"stale", "snapshot_fetched_at", "stale_fields"} <= AmeriGasSensorBase._unrecorded_attributes
+
+    # Refresh metrics are measured, never restored
+    coordinator.metrics.last = MagicMock(success=True, error=None)
+    metric = AmeriGasRefreshMetricSensor(coordinator, "test_entry", REFRESH_METRIC_SENSOR_DESCRIPTIONS[0])
+    assert "stale" not in metric.extra_state_attributes
@@ -0,0 +1,48 @@
+"""Tests for the typed account snapshot."""
+from dataclasses import FrozenInstanceError, replace
+from datetime import datetime, timezone
+
+import pytest
+
+from custom_components.amerigas.api import AmeriGasAPI
+from custom_components.amerigas.snapshot import AccountSnapshot
+
+from .portal import load_account, render_dashboard
+
+
+def test_parsed_snapshot_round_trips_and_compares_by_reported_values():
+    """Store round trip is lossless; equality ignores the derived fields."""
+    account = load_account("multi_order")
+    snapshot = AmeriGasAPI("user@example.com", "pw")._parse_account_data(
+        account, render_dashboard(account)
+    )
+
+    assert snapshot.current_gallons == round(snapshot.tank_size * snapshot.tank_level / 100, 2)
+    # The third open order has no window yet
+    assert [start.day for start, _ in snapshot.delivery_windows] == [20, 3]
+    assert all(start < end for start, end in snapshot.delivery_windows)
+    assert AccountSnapshot.from_dict(snapshot.as_dict()) == snapshot
+    assert replace(snapshot) == snapshot
+    assert replace(snapshot, tank_level=snapshot.tank_level - 1) != snapshot
+    assert not hasattr(snapshot, "__dict__")
+    with pytest.raises(FrozenInstanceError):
+        snapshot.tank_level = 0
+
+
+def test_snapshot_from_older_store_format():
+    """Older stores held a missing tank size as 0 and may carry unknown keys."""
+    snapshot = AccountSnapshot.from_dict(
+        {
+            "tank_size": 0,
+            "tank_level": 40,
+            "last_delivery_date": "2026-01-15T00:00:00+00:00",
+            "retired_key": "ignored",
+        }
+    )
+
+    assert snapshot.tank_size is None
+    # The default only feeds fill estimates; gallons stay unknown
+    assert snapshot.effective_tank_size == 500
+    assert snapshot.current_gallons is None
+    assert snapshot.last_delivery_date == datetime(2026, 1, 15, tzinfo=timezone.utc)
+    assert snapshot.days_remaining is None
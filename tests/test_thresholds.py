@@ -0,0 +1,83 @@
+"""Tests for the low-tank threshold checks."""
+import asyncio
+from unittest.mock import MagicMock
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.amerigas.binary_sensor import AmeriGasThresholdBinarySensor
+from custom_components.amerigas.const import (
+    CONF_LOW_DAYS,
+    CONF_LOW_GALLONS,
+    CONF_LOW_LEVEL_PERCENT,
+    EVENT_THRESHOLD,
+)
+from custom_components.amerigas.snapshot import AccountSnapshot
+from custom_components.amerigas.thresholds import (
+    THRESHOLD_LOW_DAYS,
+    THRESHOLD_LOW_GALLONS,
+    THRESHOLD_LOW_LEVEL,
+    THRESHOLDS,
+    ThresholdMonitor,
+)
+
+
+def test_checks_use_hysteresis_and_fire_on_changes_only(tmp_path):
+    """A level hovering at the limit does not flap; the startup baseline fires nothing."""
+
+    async def run():
+        hass = HomeAssistant(str(tmp_path))
+        events = []
+        hass.bus.async_listen(EVENT_THRESHOLD, events.append)
+        coordinator = MagicMock()
+        monitor = ThresholdMonitor(hass, coordinator, "entry", {CONF_LOW_GALLONS: 100})
+
+        def poll(level: int, days: int | None = 30) -> None:
+            coordinator.data = AccountSnapshot(tank_level=level, tank_size=500, days_remaining=days)
+            monitor._handle_coordinator_update()
+
+        coordinator.data = AccountSnapshot(tank_level=19, tank_size=500, days_remaining=30)
+        monitor.async_start()
+        assert monitor.states == {
+            THRESHOLD_LOW_LEVEL: True,
+            THRESHOLD_LOW_GALLONS: True,
+            THRESHOLD_LOW_DAYS: False,
+        }
+
+        # 23% (115 gal) is inside both bands, still low; 24% (120 gal) clears both
+        poll(23)
+        assert monitor.states[THRESHOLD_LOW_LEVEL] is monitor.states[THRESHOLD_LOW_GALLONS] is True
+        poll(24)
+        assert monitor.states[THRESHOLD_LOW_LEVEL] is monitor.states[THRESHOLD_LOW_GALLONS] is False
+        # Dipping back into the band does not trip them; the forecast dropping trips days left
+        poll(21, days=14)
+        poll(21, days=None)
+        assert monitor.states == {
+            THRESHOLD_LOW_LEVEL: False,
+            THRESHOLD_LOW_GALLONS: False,
+            THRESHOLD_LOW_DAYS: True,
+        }
+        await hass.async_block_till_done()
+
+        assert [(event.data["threshold"], event.data["state"]) for event in events] == [
+            (THRESHOLD_LOW_LEVEL, "off"),
+            (THRESHOLD_LOW_GALLONS, "off"),
+            (THRESHOLD_LOW_DAYS, "on"),
+        ]
+        assert events[2].data["value"] == 14 and events[2].data["limit"] == 14.0
+
+        # Options apply live: turning the level check off, raising the days limit
+        listener = MagicMock()
+        monitor.async_add_listener(listener)
+        monitor.async_set_options({CONF_LOW_LEVEL_PERCENT: 0, CONF_LOW_DAYS: 20, CONF_LOW_GALLONS: 100})
+        assert listener.called
+        assert monitor.states[THRESHOLD_LOW_LEVEL] is None
+
+        sensor = AmeriGasThresholdBinarySensor(coordinator, "entry", monitor, THRESHOLDS[2])
+        assert sensor.unique_id == "entry_low_days"
+        assert sensor.is_on is True
+        assert sensor.extra_state_attributes == {"value": None, "limit": 20.0, "clears_above": 23.0}
+
+        monitor.async_shutdown()
+        await hass.async_stop(force=True)
+
+    asyncio.run(run())